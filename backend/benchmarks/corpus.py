@@ -0,0 +1,69 @@
+import re
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+
+PAGES_DIR = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "wiki_pages"
+
+# Recorded pages the corpus is built from, and how many times the article body
+# of each size class is repeated (from a few KB up to a typical long article).
+RECORDED_PAGES = ("python", "casa_de_papel", "steve_jobs")
+SIZE_CLASSES = {"small": 1, "medium": 25, "large": 200}
+
+# Titles starting with this prefix have no article.
+MISSING_PREFIX = "Inexistente"
+
+BODY = re.compile(r"<p>.*?(?=<div class=\"reflist\")", re.S)
+
+@lru_cache(maxsize=None)
+def recorded_page(name: str) -> str:
+    return (PAGES_DIR / f"{name}.html").read_text(encoding="utf-8")
+
+@lru_cache(maxsize=None)
+def page_parts(name: str, repeat: int) -> tuple[str, str, str]:
+    """
+    A recorded page split into head, article body repeated `repeat` times, and tail.
+    """
+    page = recorded_page(name)
+    match = BODY.search(page)
+
+    return page[:match.start()], match.group(0) * repeat, page[match.end():]
+
+def size_class(title: str) -> str:
+    classes = list(SIZE_CLASSES)
+
+    return classes[zlib.crc32(title.encode()) % len(classes)]
+
+def title_of_size(size: str, prefix: str = "Artigo") -> str:
+    """
+    The first title "<prefix> <n>" that falls in the size class `size`.
+    """
+    n = 0
+
+    while size_class(f"{prefix} {n}") != size:
+        n += 1
+
+    return f"{prefix} {n}"
+
+def render_page(title: str) -> Optional[str]:
+    """
+    The HTML of `title`: a recorded page with its body repeated to the size class
+    of the title, under the title's own canonical link and a stable revision id.
+    None for titles with no article.
+    """
+    if title.startswith(MISSING_PREFIX):
+        return None
+
+    checksum = zlib.crc32(title.encode())
+    head, body, tail = page_parts(RECORDED_PAGES[checksum % len(RECORDED_PAGES)], SIZE_CLASSES[size_class(title)])
+
+    # Only the head (title, canonical link, revision) differs between titles.
+    head = re.sub(r'(<link rel="canonical" href="[^"]*/wiki/)[^"]+', lambda m: m.group(1) + quote(title.replace(" ", "_"), safe=":_()"), head)
+    head = re.sub(r'"wgRevisionId":\d+', f'"wgRevisionId":{checksum % 10_000_000 + 1}', head)
+
+    return head + body + tail
+
+def missing_page() -> str:
+    return recorded_page("noarticletext")
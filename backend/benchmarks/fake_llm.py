@@ -0,0 +1,70 @@
+import asyncio
+import re
+import time
+from typing import Any, AsyncIterator, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+WORD_COUNT = re.compile(r"(\d+) words")
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model answering with as many words as the prompt asks for, after
+    `latency` seconds to the first token and at `tokens_per_second` afterwards
+    (one word per token). Reports usage like the OpenAI models do.
+    """
+
+    latency: float = 0.5
+    tokens_per_second: float = 100.0
+    default_words: int = 150
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _words(self, messages: list[BaseMessage]) -> list[str]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        match = WORD_COUNT.search(prompt)
+        count = int(match.group(1)) if match else self.default_words
+
+        return [f"palavra{i}" for i in range(count)]
+
+    def _usage(self, messages: list[BaseMessage], words: list[str]) -> dict:
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4
+
+        return {"input_tokens": input_tokens, "output_tokens": len(words), "total_tokens": input_tokens + len(words)}
+
+    def _generation_time(self, words: list[str]) -> float:
+        return self.latency + (len(words) / self.tokens_per_second if self.tokens_per_second else 0.0)
+
+    def _generate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        words = self._words(messages)
+        time.sleep(self._generation_time(words))
+
+        message = AIMessage(content=" ".join(words), usage_metadata=self._usage(messages, words))
+
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        words = self._words(messages)
+        await asyncio.sleep(self._generation_time(words))
+
+        message = AIMessage(content=" ".join(words), usage_metadata=self._usage(messages, words))
+
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        words = self._words(messages)
+        delay = 1 / self.tokens_per_second if self.tokens_per_second else 0.0
+
+        await asyncio.sleep(self.latency)
+
+        for index, word in enumerate(words):
+            if delay:
+                await asyncio.sleep(delay)
+
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if index == 0 else f" {word}"))
+
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, words)))
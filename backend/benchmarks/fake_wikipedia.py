@@ -0,0 +1,99 @@
+import multiprocessing
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import unquote, urlsplit
+
+import httpx
+
+from benchmarks.corpus import missing_page, render_page
+
+def _serve(latency: float, requests, ports) -> None:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            with requests.get_lock():
+                requests.value += 1
+
+            if latency:
+                time.sleep(latency)
+
+            path = urlsplit(self.path).path
+            title = unquote(path.removeprefix("/wiki/")).replace("_", " ") if path.startswith("/wiki/") else ""
+            page = render_page(title) if title else None
+
+            body = (page or missing_page()).encode()
+
+            self.send_response(200 if page else 404)
+            self.send_header("Content-Type", "text/html; charset=UTF-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    ports.put(server.server_port)
+    server.serve_forever()
+
+class FakeWikipedia:
+    """
+    Local stand-in for pt.wikipedia.org serving the benchmark corpus over HTTP,
+    with an optional fixed latency per page. It runs in its own process, so it
+    does not compete with the benchmarked app for the GIL.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.port: Optional[int] = None
+        self._context = multiprocessing.get_context("spawn")
+        self._requests = self._context.Value("i", 0)
+        self._process: Optional[multiprocessing.Process] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def requests(self) -> int:
+        return self._requests.value
+
+    def start(self) -> "FakeWikipedia":
+        ports = self._context.Queue()
+        self._process = self._context.Process(target=_serve, args=(self.latency, self._requests, ports), daemon=True)
+        self._process.start()
+        self.port = ports.get(timeout=30)
+
+        return self
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+class RewriteTransport(httpx.AsyncBaseTransport):
+    """
+    Send every request to `base_url`, keeping its path and query, so the Wikipedia
+    URLs built by the extractor reach the fake server unchanged.
+    """
+
+    def __init__(self, base_url: str, **kwargs) -> None:
+        self.base_url = httpx.URL(base_url)
+        self.transport = httpx.AsyncHTTPTransport(**kwargs)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.url = request.url.copy_with(
+            scheme=self.base_url.scheme,
+            host=self.base_url.host,
+            port=self.base_url.port,
+        )
+        request.headers["Host"] = request.url.netloc.decode()
+
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
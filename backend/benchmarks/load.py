@@ -0,0 +1,164 @@
+import asyncio
+import itertools
+import os
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import httpx
+
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks.fake_wikipedia import FakeWikipedia, RewriteTransport
+from benchmarks.stats import BenchmarkResult, summarize
+
+# Only the requests of the scenario run in the benchmarked process.
+os.environ.setdefault('JOB_WORKERS', '0')
+os.environ.setdefault('ARTICLE_REFRESH_AGE', '0')
+
+SCENARIOS = ('cache_hit', 'partial_hit', 'cold', 'database', 'mixed')
+
+# Share of each kind of request in the mixed scenario.
+MIXED_WEIGHTS = {'cache_hit': 60, 'partial_hit': 15, 'cold': 5, 'database': 20}
+
+Request = tuple[str, dict]
+
+@dataclass
+class LoadConfig:
+    requests: int = 500
+    concurrency: int = 32
+    terms: int = 50
+    word_count: int = 150
+    llm_latency: float = 0.5
+    llm_tokens_per_second: float = 100.0
+    wiki_latency: float = 0.05
+    seed: int = 0
+
+class Traffic:
+    """
+    Request generators of the scenarios, over a set of warm terms (article and
+    `word_count` summary saved and cached) and an endless supply of cold ones.
+    """
+
+    def __init__(self, config: LoadConfig) -> None:
+        run_id = uuid.uuid4().hex[:8]
+
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.warm_terms = [f"Bench {run_id} {i}" for i in range(config.terms)]
+        self._cold = (f"Bench {run_id} cold {i}" for i in itertools.count())
+        self._partial = itertools.count()
+
+    def cache_hit(self) -> Request:
+        return "/summarize", {"word": self.random.choice(self.warm_terms), "word_count": self.config.word_count}
+
+    def partial_hit(self) -> Request:
+        # A size not saved yet of a saved article: summarized from the stored text.
+        n = next(self._partial)
+        word = self.warm_terms[n % len(self.warm_terms)]
+
+        return "/summarize", {"word": word, "word_count": self.config.word_count + 1 + n // len(self.warm_terms)}
+
+    def cold(self) -> Request:
+        return "/summarize", {"word": next(self._cold), "word_count": self.config.word_count}
+
+    def database(self) -> Request:
+        if self.random.random() < 0.5:
+            return "/summary/database", {"limit": 100}
+
+        return f"/summary/database/{self.random.choice(self.warm_terms)}", {}
+
+    def mixed(self) -> Request:
+        kind = self.random.choices(list(MIXED_WEIGHTS), weights=list(MIXED_WEIGHTS.values()))[0]
+
+        return getattr(self, kind)()
+
+async def drive(client: httpx.AsyncClient, next_request: Callable[[], Request], requests: int, concurrency: int) -> tuple[list[float], int, float]:
+    """
+    Send `requests` requests from `concurrency` concurrent clients. Returns the
+    latency of every request, the number of failed ones and the elapsed time.
+    """
+    latencies: list[float] = []
+    errors = 0
+    remaining = itertools.count()
+
+    async def _client() -> None:
+        nonlocal errors
+
+        while next(remaining) < requests:
+            path, params = next_request()
+            started_at = time.perf_counter()
+
+            try:
+                resp = await client.get(path, params=params)
+                failed = resp.status_code != 200 or "message" in resp.json()
+            except Exception:
+                failed = True
+
+            latencies.append(time.perf_counter() - started_at)
+            errors += failed
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*[_client() for _ in range(max(1, concurrency))])
+
+    return latencies, errors, time.perf_counter() - started_at
+
+async def run_load(scenarios: list[str], config: Optional[LoadConfig] = None) -> list[BenchmarkResult]:
+    """
+    Run the scenarios against the app in this process, with Wikipedia and the
+    LLM replaced by the local fakes. The database is the one configured in the
+    environment; each run writes its own "Bench <run id> ..." terms.
+    """
+    config = config or LoadConfig()
+
+    # Imported here so the environment defaults above apply to the app modules.
+    from main import app
+    from utils import http_client as http_client_module
+    from utils import summarizer
+
+    wikipedia = FakeWikipedia(latency=config.wiki_latency).start()
+    llm = FakeChatModel(latency=config.llm_latency, tokens_per_second=config.llm_tokens_per_second)
+
+    http_client_module.build_http_client = lambda: httpx.AsyncClient(
+        headers=http_client_module.DEFAULT_HEADERS,
+        timeout=http_client_module.WIKI_HTTP_TIMEOUT,
+        transport=RewriteTransport(
+            wikipedia.url,
+            limits=httpx.Limits(
+                max_connections=http_client_module.WIKI_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=http_client_module.WIKI_HTTP_MAX_KEEPALIVE,
+            ),
+        ),
+    )
+    summarizer.get_llm = lambda: llm
+    summarizer._chains.clear()
+
+    traffic = Traffic(config)
+    results: list[BenchmarkResult] = []
+
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+                warm = iter(traffic.warm_terms)
+                _, errors, _ = await drive(
+                    client,
+                    lambda: ("/summarize", {"word": next(warm), "word_count": config.word_count}),
+                    len(traffic.warm_terms),
+                    config.concurrency,
+                )
+
+                if errors:
+                    raise RuntimeError(f"{errors} warm-up requests failed; is the database up?")
+
+                for scenario in scenarios:
+                    latencies, errors, seconds = await drive(
+                        client, getattr(traffic, scenario), config.requests, config.concurrency
+                    )
+                    results.append(summarize(f"load.{scenario}", latencies, seconds, errors))
+    finally:
+        wikipedia.stop()
+
+    return results
@@ -0,0 +1,78 @@
+import json
+import time
+from typing import Callable
+
+from benchmarks.corpus import render_page, title_of_size
+from benchmarks.stats import BenchmarkResult, summarize
+from schemas import WikiExtractorResult, WikiSavedWord, WikiWordDatabase
+from utils.article_text import compress_text, decompress_text
+from utils.html_cleaner import clean_html
+from utils.wiki_extractor import WikipediaTextExtractor, normalize_word
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional
+    orjson = None
+
+MIN_ROUNDS = 5
+
+def measure(name: str, func: Callable[[], object], seconds: float = 1.0, inner: int = 1) -> BenchmarkResult:
+    """
+    Call `func` repeatedly for about `seconds` (at least MIN_ROUNDS rounds),
+    timing rounds of `inner` calls so fast functions are not dominated by the
+    timer; each call's latency is its round's average.
+    """
+    func()
+
+    latencies: list[float] = []
+    started_at = time.perf_counter()
+
+    while time.perf_counter() - started_at < seconds or len(latencies) < MIN_ROUNDS * inner:
+        round_started_at = time.perf_counter()
+
+        for _ in range(inner):
+            func()
+
+        latencies.extend([(time.perf_counter() - round_started_at) / inner] * inner)
+
+    return summarize(name, latencies, time.perf_counter() - started_at)
+
+def _cleaner(raw_text: str) -> Callable[[], None]:
+    def run() -> None:
+        extractor = WikipediaTextExtractor("Benchmark")
+        extractor.raw_text = raw_text
+        extractor.text_cleaner()
+
+    return run
+
+def micro_benchmarks(seconds: float = 1.0) -> list[BenchmarkResult]:
+    small = render_page(title_of_size("small"))
+    large = render_page(title_of_size("large"))
+    text = clean_html(render_page(title_of_size("medium")))
+    stored = compress_text(text)
+
+    result = WikiExtractorResult(word="Steve Jobs", url="https://pt.wikipedia.org/wiki/Steve_Jobs", summary="palavra " * 150)
+    page = WikiWordDatabase(summaries=[
+        WikiSavedWord(word=f"Termo_{i}", word_count=150, created_at="2024-01-01T12:00:00+00:00") for i in range(100)
+    ])
+
+    benchmarks: list[tuple[str, Callable[[], object], int]] = [
+        ("normalize_word", lambda: normalize_word("  A casa de   papel do professor "), 1000),
+        (f"text_cleaner[{len(small) // 1024}KB]", _cleaner(small), 10),
+        (f"text_cleaner[{len(large) // 1024}KB]", _cleaner(large), 1),
+        (f"clean_html[html.parser,{len(large) // 1024}KB]", lambda: clean_html(large, "html.parser"), 1),
+        (f"article_text.compress[{len(text) // 1024}KB]", lambda: compress_text(text), 10),
+        (f"article_text.decompress[{len(text) // 1024}KB]", lambda: decompress_text(stored), 100),
+        ("serialize.result.model_dump_json", result.model_dump_json, 1000),
+        ("serialize.result.json_dumps", lambda: json.dumps(result.model_dump(), ensure_ascii=False), 1000),
+        ("serialize.page100.model_dump_json", page.model_dump_json, 100),
+        ("serialize.page100.json_dumps", lambda: json.dumps(page.model_dump(), ensure_ascii=False), 100),
+    ]
+
+    if orjson is not None:
+        benchmarks += [
+            ("serialize.result.orjson", lambda: orjson.dumps(result.model_dump()), 1000),
+            ("serialize.page100.orjson", lambda: orjson.dumps(page.model_dump()), 100),
+        ]
+
+    return [measure(f"micro.{name}", func, seconds, inner) for name, func, inner in benchmarks]
@@ -0,0 +1,83 @@
+"""
+Benchmarks, with Wikipedia and the LLM replaced by local fakes.
+
+    python -m benchmarks.run micro
+    python -m benchmarks.run startup --rounds 10
+    python -m benchmarks.run load --scenario mixed --requests 1000 --concurrency 64
+    python -m benchmarks.run load --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run load --baseline benchmarks/baseline.json
+
+`load` needs the PostgreSQL database configured in the environment (preferably
+a dedicated one); `startup` runs each round in a fresh process and needs no
+database. With --baseline, exits with status 1 if a benchmark's
+throughput or p95 latency got worse than the baseline by more than --threshold.
+"""
+import argparse
+import asyncio
+import sys
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+
+from benchmarks.load import SCENARIOS, LoadConfig, run_load
+from benchmarks.micro import micro_benchmarks
+from benchmarks.startup import startup_benchmarks
+from benchmarks.stats import compare, format_table, load_baseline, save_baseline
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the summarizer benchmarks.")
+    parser.add_argument("suite", choices=("micro", "startup", "load", "all"))
+    parser.add_argument("--seconds", type=float, default=1.0, help="Duration of each micro-benchmark.")
+    parser.add_argument("--rounds", type=int, default=5, help="Fresh processes started by the startup benchmark.")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Load scenario (repeatable; default: all).")
+    parser.add_argument("--requests", type=int, default=LoadConfig.requests, help="Requests per load scenario.")
+    parser.add_argument("--concurrency", type=int, default=LoadConfig.concurrency, help="Concurrent clients.")
+    parser.add_argument("--terms", type=int, default=LoadConfig.terms, help="Terms saved before the scenarios run.")
+    parser.add_argument("--llm-latency", type=float, default=LoadConfig.llm_latency, help="Seconds to the first token of the fake LLM.")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=LoadConfig.llm_tokens_per_second)
+    parser.add_argument("--wiki-latency", type=float, default=LoadConfig.wiki_latency, help="Seconds per page of the fake Wikipedia.")
+    parser.add_argument("--save-baseline", type=Path, metavar="PATH", help="Save the results as a baseline.")
+    parser.add_argument("--baseline", type=Path, metavar="PATH", help="Compare the results with a saved baseline.")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Tolerated regression, as a fraction (default: 0.1).")
+
+    return parser.parse_args(argv)
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    config = LoadConfig(
+        requests=args.requests,
+        concurrency=args.concurrency,
+        terms=args.terms,
+        llm_latency=args.llm_latency,
+        llm_tokens_per_second=args.llm_tokens_per_second,
+        wiki_latency=args.wiki_latency,
+    )
+    results = []
+
+    if args.suite in ("micro", "all"):
+        results += micro_benchmarks(args.seconds)
+
+    if args.suite in ("startup", "all"):
+        results += startup_benchmarks(args.rounds)
+
+    if args.suite in ("load", "all"):
+        results += asyncio.run(run_load(args.scenario or list(SCENARIOS), config))
+
+    print(format_table(results))
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results, asdict(config))
+        print(f"\nBaseline saved to {args.save_baseline}.")
+
+    if args.baseline:
+        report, regressions = compare(results, load_baseline(args.baseline), args.threshold)
+        print(f"\nCompared with {args.baseline}:\n{report}")
+
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}.")
+            return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.stats import BenchmarkResult, summarize
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+STAGES = ('import', 'lifespan', 'first_request', 'second_request', 'llm_client')
+
+# Nothing runs in the background of the probed process, and no database is needed.
+PROBE_ENV = {
+    'JOB_WORKERS': '0',
+    'ARTICLE_REFRESH_AGE': '0',
+    'OPENAI_API_KEY': 'benchmark',
+}
+
+def probe() -> None:
+    """
+    Run in a fresh interpreter: time the import of the app, its startup, its
+    first two requests and the creation of the LLM client (the import cost the
+    first summary pays), and print them in seconds as JSON.
+    """
+    import time
+
+    started_at = time.perf_counter()
+
+    from main import app
+
+    timings = {"import": time.perf_counter() - started_at}
+
+    import asyncio
+
+    import httpx
+
+    from utils import summarizer
+
+    async def _requests() -> None:
+        started_at = time.perf_counter()
+
+        async with app.router.lifespan_context(app):
+            timings["lifespan"] = time.perf_counter() - started_at
+            transport = httpx.ASGITransport(app=app)
+
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+                for stage in ("first_request", "second_request"):
+                    started_at = time.perf_counter()
+                    resp = await client.get("/health")
+                    timings[stage] = time.perf_counter() - started_at
+                    resp.raise_for_status()
+
+            started_at = time.perf_counter()
+            summarizer.get_llm()
+            timings["llm_client"] = time.perf_counter() - started_at
+
+    asyncio.run(_requests())
+    print(json.dumps(timings))
+
+def run_probe() -> dict[str, float]:
+    proc = subprocess.run(
+        [sys.executable, "-c", "from benchmarks.startup import probe; probe()"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **PROBE_ENV},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # The app may print on startup; the timings are the last line.
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def startup_benchmarks(rounds: int = 5) -> list[BenchmarkResult]:
+    """
+    Cold start of the API, from `rounds` fresh processes: import, lifespan
+    startup, first and second request, and first LLM client creation.
+    """
+    samples: dict[str, list[float]] = {stage: [] for stage in STAGES}
+
+    for _ in range(max(1, rounds)):
+        for stage, seconds in run_probe().items():
+            samples[stage].append(seconds)
+
+    return [summarize(f"startup.{stage}", latencies, sum(latencies)) for stage, latencies in samples.items()]
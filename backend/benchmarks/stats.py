@@ -0,0 +1,101 @@
+import json
+import math
+import platform
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    operations: int
+    errors: int
+    seconds: float
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+def percentile(samples: list[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of `samples` (0 for no samples).
+    """
+    if not samples:
+        return 0.0
+
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+
+    return ordered[rank - 1]
+
+def summarize(name: str, latencies: list[float], seconds: float, errors: int = 0) -> BenchmarkResult:
+    """
+    Throughput (operations per second) and latency percentiles of a run, from the
+    latency of every operation in seconds.
+    """
+    return BenchmarkResult(
+        name=name,
+        operations=len(latencies),
+        errors=errors,
+        seconds=round(seconds, 3),
+        throughput=round(len(latencies) / seconds, 2) if seconds else 0.0,
+        p50_ms=round(percentile(latencies, 50) * 1000, 3),
+        p95_ms=round(percentile(latencies, 95) * 1000, 3),
+        p99_ms=round(percentile(latencies, 99) * 1000, 3),
+    )
+
+def format_table(results: list[BenchmarkResult]) -> str:
+    header = f"{'benchmark':<36} {'ops':>8} {'errors':>6} {'ops/s':>12} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}"
+    lines = [header, "-" * len(header)]
+
+    for r in results:
+        lines.append(
+            f"{r.name:<36} {r.operations:>8} {r.errors:>6} {r.throughput:>12.2f} {r.p50_ms:>10.3f} {r.p95_ms:>10.3f} {r.p99_ms:>10.3f}"
+        )
+
+    return "\n".join(lines)
+
+def save_baseline(path: Path, results: list[BenchmarkResult], config: Optional[dict] = None) -> None:
+    data = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": config or {},
+        "results": {r.name: asdict(r) for r in results},
+    }
+
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+def load_baseline(path: Path) -> dict[str, dict]:
+    return json.loads(path.read_text())["results"]
+
+def compare(results: list[BenchmarkResult], baseline: dict[str, dict], threshold: float) -> tuple[str, list[str]]:
+    """
+    Compare a run with a baseline. Returns a report and the names of the
+    benchmarks that regressed by more than `threshold` (a fraction) in
+    throughput or p95 latency.
+    """
+    lines = [f"{'benchmark':<36} {'ops/s':>12} {'change':>8} {'p95 ms':>10} {'change':>8}"]
+    regressions: list[str] = []
+
+    for r in results:
+        base = baseline.get(r.name)
+
+        if base is None:
+            lines.append(f"{r.name:<36} {r.throughput:>12.2f} {'new':>8} {r.p95_ms:>10.3f} {'new':>8}")
+            continue
+
+        throughput_change = (r.throughput - base["throughput"]) / base["throughput"] if base["throughput"] else 0.0
+        p95_change = (r.p95_ms - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        regressed = throughput_change < -threshold or p95_change > threshold
+
+        if regressed:
+            regressions.append(r.name)
+
+        lines.append(
+            f"{r.name:<36} {r.throughput:>12.2f} {throughput_change:>+8.1%} {r.p95_ms:>10.3f} {p95_change:>+8.1%}"
+            + ("  REGRESSION" if regressed else "")
+        )
+
+    return "\n".join(lines), regressions
@@ -1,11 +1,14 @@
 import os
-from typing import Generator
+from typing import AsyncGenerator
 
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
 from dotenv import load_dotenv
 
+from utils import metrics
+
 load_dotenv()
 
 pg_user = os.getenv('POSTGRES_USER')
@@ -13,6 +16,10 @@ pg_password = os.getenv('POSTGRES_PASSWORD')
 pg_db = os.getenv('POSTGRES_DB')
 pg_host = os.getenv('POSTGRES_HOST')
 
+db_pool_size = int(os.getenv('DB_POOL_SIZE', '10'))
+db_max_overflow = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+db_lock_pool_size = int(os.getenv('DB_LOCK_POOL_SIZE', '5'))
+
 DATABASE_URL = f'postgresql+psycopg://{pg_user}:{pg_password}@{pg_host}:5432/{pg_db}'
 
 engine = create_engine(
@@ -22,9 +29,30 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
-def get_db() -> Generator[Session, None, None]:
-    db = SessionLocal()
-    try:
+# psycopg3 serves both engines from the same URL; the async one is used by the API.
+async_engine = create_async_engine(
+    DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=db_pool_size,
+    max_overflow=db_max_overflow,
+)
+
+# Connections holding the advisory locks of utils/single_flight.py, apart from the
+# API pool: a lock is held for a whole pipeline run, which takes sessions of its
+# own from async_engine. Autocommit, so they don't sit idle in a transaction.
+lock_engine = create_async_engine(
+    DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=db_lock_pool_size,
+    max_overflow=0,
+    isolation_level='AUTOCOMMIT',
+)
+
+metrics.db_pool_checked_out.set_function(async_engine.sync_engine.pool.checkedout)
+metrics.db_pool_capacity.set(db_pool_size + db_max_overflow)
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
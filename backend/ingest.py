@@ -0,0 +1,48 @@
+import argparse
+import asyncio
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from db import async_engine
+
+from utils.logs import configure_logging
+from utils.http_client import close_http_client
+from utils.ingest import Checkpoint
+from utils.ingest import INGEST_BATCH_SIZE
+from utils.ingest import ingest
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Pre-warm the database with Wikipedia articles, without calling the LLM by default.",
+    )
+    parser.add_argument("source", choices=["terms", "dump"], help="a terms file (one per line) or a pages-articles XML dump (.xml or .xml.bz2)")
+    parser.add_argument("path")
+    parser.add_argument("--checkpoint", help="progress file used to resume (default: <path>.checkpoint)")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="cleaning processes (0: clean inline)")
+    parser.add_argument("--summaries", type=int, metavar="WORD_COUNT", help="also queue a summary job of WORD_COUNT words per new article")
+
+    return parser.parse_args(argv)
+
+async def main(argv=None) -> None:
+    args = parse_args(argv)
+    configure_logging()
+
+    try:
+        await ingest(
+            args.source,
+            args.path,
+            Checkpoint(args.checkpoint or f"{args.path}.checkpoint"),
+            batch_size=args.batch_size,
+            word_count=args.summaries,
+            workers=args.workers,
+        )
+    finally:
+        await close_http_client()
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
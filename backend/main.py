@@ -1,20 +1,65 @@
+import json
+import os
+import secrets
+import time
 from contextlib import asynccontextmanager
-from typing import List
+from typing import AsyncIterator, List, Literal, Optional
 
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, HTTPException
+from fastapi import Header
+from fastapi import Response
 from fastapi import Query
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm import contains_eager
+from sqlalchemy import select, tuple_, literal
 from dotenv import load_dotenv
 
-from db import engine
+from db import async_engine
+from db import lock_engine
 from db import get_db
+from db import AsyncSessionLocal
 
-from models import Base
 from models import Article
 from models import Summary
+from models import SummaryJob
 
+from utils.logs import configure_logging
+from utils.http_client import open_http_client
+from utils.http_client import close_http_client
+from utils.html_cleaner import shutdown_cleaner_pool
+from utils.jobs import enqueue_job
+from utils.jobs import get_job
+from utils.jobs import start_job_workers
+from utils.jobs import stop_job_workers
+from utils.refresher import start_refresher
+from utils.refresher import stop_refresher
+from utils.summarizer import limiter
+from utils.summarizer import close_llm
+from utils.batch import summarize_batch
+from utils.batch import summarize_batch_stream
+from utils.pagination import InvalidCursorError
+from utils.pagination import decode_cursor
+from utils.pagination import encode_cursor
+from utils.missing_pages import purge_missing
+from utils import metrics
+from utils.profiling import ProfilingMiddleware
+from utils.profiling import profile_reports
+from utils.search import search_query
+from utils.search import article_headlines
+from utils.search import SEARCH_HEADLINE_MAX_CHARS
+from utils.article_text import stored_text
+from utils.response_cache import cache_response
+from utils.response_cache import get_cached
+from utils.response_cache import respond
+from utils.article_text import start_text_migration
+from utils.article_text import stop_text_migration
+from utils import wiki_extractor
+from utils.wiki_extractor import page_url
 from utils.wiki_extractor import normalize_word
+from utils.wiki_extractor import resolves_to
 from utils.wiki_extractor import WikipediaTextExtractor
 
 from schemas import WikiExtractorResult
@@ -23,16 +68,53 @@ from schemas import WikiSavedWord
 from schemas import WikiWordDatabase
 from schemas import WikiSavedSummary
 from schemas import WikiSummaryDatabase
+from schemas import LLMLimiterStats
+from schemas import CacheStats
+from schemas import WikiBatchRequest
+from schemas import WikiBatchResponse
+from schemas import WikiBatchStreamItem
+from schemas import MissingPagesPurge
+from schemas import WikiSummaryJob
+from schemas import WikiSearchHit
+from schemas import WikiSearchResults
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
+    # The schema is created and upgraded out of band by the migrations
+    # (`alembic upgrade head`), not on every start; the LLM client is created on
+    # first use.
+    configure_logging()
+    await open_http_client()
+    start_refresher()
+    start_text_migration()
+    start_job_workers()
     yield
+    await stop_job_workers()
+    await stop_refresher()
+    await stop_text_migration()
+    await close_llm()
+    await close_http_client()
+    shutdown_cleaner_pool()
+    await async_engine.dispose()
+    await lock_engine.dispose()
 
 app = FastAPI(title="Wikipedia Summarizer API", lifespan=lifespan)
 
+app.add_middleware(ProfilingMiddleware)
+
 load_dotenv()
 
+# Required in the X-Admin-Token header of the /admin endpoints; they are disabled without it.
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    # Without a configured token the admin endpoints are disabled, not open.
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Endpoints de administração desativados (ADMIN_TOKEN não definido).")
+
+    if not secrets.compare_digest(x_admin_token or '', ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Token de administrador inválido.")
+
 @app.get("/health", summary="Health Test")
 def health() -> dict:
     """
@@ -40,15 +122,51 @@ def health() -> dict:
     """
     return {"status": "ok"}
 
+@app.get("/health/llm", response_model=LLMLimiterStats, summary="Fila de chamadas ao LLM")
+def health_llm() -> LLMLimiterStats:
+    """
+    Estado do limitador local de chamadas ao LLM, usado para dimensionar os limites.
+
+    - **queue_depth**: chamadas aguardando vaga (concorrência ou limites por minuto).
+    - **in_flight**: chamadas em andamento.
+    - **avg_wait_seconds** / **max_wait_seconds** / **last_wait_seconds**: tempo de espera na fila.
+    """
+    return LLMLimiterStats(**limiter.stats())
+
+@app.get("/health/cache", response_model=CacheStats, summary="Cache de resumos em memória")
+def health_cache() -> CacheStats:
+    """
+    Estado do cache de resumos em memória deste processo.
+
+    - **hits** / **misses**: consultas atendidas ou não pelo cache.
+    - **size_bytes** / **max_bytes**: tamanho aproximado ocupado e limite.
+    - **evictions**: entradas removidas para respeitar o limite de tamanho.
+    """
+    return CacheStats(**wiki_extractor.summary_cache.stats())
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint() -> Response:
+    """
+    Métricas deste processo no formato do Prometheus: latência por etapa (consulta
+    ao banco, Wikipedia, limpeza, LLM, gravação), resultado de cada pedido de resumo,
+    tokens do LLM, tamanho dos artigos e ocupação das filas e pools.
+    """
+    body, content_type = metrics.render()
+
+    return Response(content=body, media_type=content_type)
+
 @app.get(
     "/summarize", 
     response_model=WikiExtractorResult | WikiExtractorError, 
     summary="Gerar resumo do artigo da Wikipedia."
 )
 async def summarize(
+    request: Request,
     word: str = Query(description='Termo da Wikipedia'), 
-    word_count: int =  Query(150, description='Número de palavras para o resumo do artigo.')
-) -> WikiExtractorResult | WikiExtractorError:
+    word_count: int =  Query(150, description='Número de palavras para o resumo do artigo.'),
+    tolerance: Optional[int] = Query(None, ge=0, description='Diferença máxima de palavras para reaproveitar um resumo salvo.'),
+    derive: Optional[bool] = Query(None, description='Derivar o resumo de um resumo salvo mais longo, quando houver.')
+) -> Response:
     """
     Gera um resumo do artigo correspondente ao termo informado na Wikipédia.
 
@@ -56,31 +174,278 @@ async def summarize(
 
     - **word**: "Steve Jobs"
     - **word_count**: "140"
+    - **tolerance** (opcional): "5", aceita um resumo salvo com 135 a 145 palavras.
+    - **derive** (opcional): "true", gera o resumo a partir de um resumo salvo mais longo em vez do artigo.
     
     Retorna um JSON com as seguintes informações:
 
     - **word**: termo da Wikipedia para o qual os resumos foram salvos.
     - **url**: url da página da Wikipedia.
     - **summary**: texto do resumo gerado.
+
+    A resposta traz os cabeçalhos `ETag` e `Cache-Control`; enviando o `ETag` recebido
+    no cabeçalho `If-None-Match`, a API responde `304` sem corpo se o resumo não mudou.
     """
+    started_at = time.perf_counter()
+
+    extractor = WikipediaTextExtractor(word=word, word_count=word_count, tolerance=tolerance, derive=derive)
+    key = ("summarize", extractor.word_slug, extractor.word, word_count, extractor.tolerance, extractor.derive)
+    cached = get_cached(key)
 
-    extractor = WikipediaTextExtractor(word=word, word_count=word_count)
+    if cached is not None:
+        metrics.observe_summary('response_cache', time.perf_counter() - started_at)
+        return respond(request, cached)
 
     result = await extractor.extract()
 
-    return result.model_dump()
+    if isinstance(result, WikiExtractorError):
+        return result.model_dump()
+
+    return respond(request, cache_response(key, result.model_dump()))
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.get(
+    "/summarize/stream",
+    response_class=StreamingResponse,
+    summary="Gerar resumo do artigo da Wikipedia via Server-Sent Events."
+)
+async def summarize_stream(
+    word: str = Query(description='Termo da Wikipedia'),
+    word_count: int = Query(150, description='Número de palavras para o resumo do artigo.'),
+    tolerance: Optional[int] = Query(None, ge=0, description='Diferença máxima de palavras para reaproveitar um resumo salvo.'),
+    derive: Optional[bool] = Query(None, description='Derivar o resumo de um resumo salvo mais longo, quando houver.')
+) -> StreamingResponse:
+    """
+    Versão em streaming do `/summarize`: o resumo é enviado como Server-Sent Events à
+    medida que é gerado pelo LLM. Resumos já salvos são enviados imediatamente.
+
+    Eventos enviados (o campo `data` é sempre um JSON):
+
+    - **start**: `{"word", "url"}`, enviado assim que a requisição é recebida.
+    - **token**: `{"text"}`, trecho do resumo gerado.
+    - **done**: mesmo JSON retornado por `/summarize`, com o resumo completo.
+    - **error**: mesmo JSON de erro retornado por `/summarize`.
+    """
+
+    extractor = WikipediaTextExtractor(word=word, word_count=word_count, tolerance=tolerance, derive=derive)
+
+    async def events() -> AsyncIterator[str]:
+        async for event, data in extractor.extract_stream():
+            yield format_sse(event, data)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post(
+    "/summarize/batch",
+    response_model=WikiBatchResponse,
+    summary="Gerar resumos para uma lista de termos da Wikipedia."
+)
+async def summarize_batch_endpoint(
+    request: WikiBatchRequest,
+    stream: bool = Query(False, description='Enviar cada resultado assim que ficar pronto (NDJSON).')
+) -> WikiBatchResponse:
+    """
+    Gera os resumos de uma lista de até 500 termos. Os resumos já salvos são buscados
+    em uma única consulta; os demais são gerados em paralelo, com concorrência limitada.
+
+    Exemplo do corpo da requisição:
+
+    ```json
+    {"items": [{"word": "Steve Jobs", "word_count": 140}, {"word": "Python"}]}
+    ```
+
+    Retorna um JSON com a lista `results`, na mesma ordem dos itens enviados, em que
+    cada item tem o mesmo formato da resposta de `/summarize` (resumo ou erro).
+
+    Com **stream**=true, retorna NDJSON: uma linha `{"index", "result"}` por item,
+    na ordem em que ficam prontos (resumos salvos primeiro).
+    """
+    if stream:
+        async def lines() -> AsyncIterator[str]:
+            async for index, result in summarize_batch_stream(request.items):
+                yield WikiBatchStreamItem(index=index, result=result).model_dump_json() + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return WikiBatchResponse(results=await summarize_batch(request.items))
+
+def summary_job(job: SummaryJob) -> WikiSummaryJob:
+    result = None
+
+    if job.status == 'done':
+        result = WikiExtractorResult(word=job.word, url=job.url, summary=job.summary_text)
+    elif job.status == 'failed':
+        result = WikiExtractorError(word=job.word, url=job.url or '', message=job.error or '')
+
+    return WikiSummaryJob(
+        job_id=job.id,
+        status=job.status,
+        word=job.word,
+        word_count=job.word_count,
+        attempts=job.attempts,
+        result=result,
+        created_at=job.created_at.isoformat(),
+        updated_at=job.updated_at.isoformat(),
+    )
+
+@app.post(
+    "/summarize/jobs",
+    status_code=202,
+    response_model=WikiSummaryJob,
+    summary="Agendar a geração de um resumo (assíncrono)."
+)
+async def summarize_job(
+    response: Response,
+    word: str = Query(description='Termo da Wikipedia'),
+    word_count: int = Query(150, description='Número de palavras para o resumo do artigo.'),
+    tolerance: Optional[int] = Query(None, ge=0, description='Diferença máxima de palavras para reaproveitar um resumo salvo.'),
+    derive: Optional[bool] = Query(None, description='Derivar o resumo de um resumo salvo mais longo, quando houver.')
+) -> WikiSummaryJob:
+    """
+    Versão assíncrona do `/summarize`, com os mesmos parâmetros: responde na hora com
+    `202 Accepted` e o **job_id**, e o resumo é gerado em segundo plano.
+
+    Consulte o resultado em `/summarize/jobs/{job_id}` (também no cabeçalho `Location`).
+    """
+    job = await enqueue_job(word, word_count, tolerance, derive)
+
+    response.headers["Location"] = f"/summarize/jobs/{job.id}"
+
+    return summary_job(job)
+
+@app.get(
+    "/summarize/jobs/{job_id}",
+    response_model=WikiSummaryJob,
+    summary="Consultar um resumo agendado."
+)
+async def summarize_job_status(job_id: str) -> WikiSummaryJob:
+    """
+    Estado de um resumo agendado em `/summarize/jobs`:
+
+    - **status**: `queued`, `running`, `done` ou `failed`.
+    - **attempts**: tentativas feitas; falhas temporárias são tentadas de novo.
+    - **result**: quando `done` ou `failed`, o mesmo JSON retornado por `/summarize`.
+    """
+    job = await get_job(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+
+    return summary_job(job)
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+SEARCH_MAX_OFFSET = 1000
+
+@app.get(
+    "/search",
+    response_model=WikiSearchResults,
+    summary="Buscar nos artigos e resumos salvos."
+)
+async def search(
+    q: str = Query(min_length=1, max_length=200, description='Texto da busca.'),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE, description='Número máximo de resultados por página.'),
+    offset: int = Query(0, ge=0, le=SEARCH_MAX_OFFSET, description='Valor de `next_offset` retornado pela página anterior.'),
+    session: AsyncSession = Depends(get_db)
+) -> WikiSearchResults:
+    """
+    Busca textual (em português) nos artigos e resumos salvos no banco de dados,
+    com correspondência aproximada do termo (erros de digitação).
+
+    A busca aceita a sintaxe de buscadores: `"frase exata"`, `or` e `-palavra`.
+    Os resultados são ordenados por relevância; para a próxima página, envie o
+    `next_offset` da resposta no parâmetro `offset` (ele é `null` na última página).
+
+    Exemplo dos parâmetros de entrada:
+
+    - **q**: "fundador da apple"
+    - **limit** (opcional): "20"
+
+    Retorna um JSON com a lista `results`, em que cada item contém:
+
+    - **word**: termo da Wikipedia.
+    - **url**: url da página da Wikipedia.
+    - **rank**: relevância do resultado.
+    - **snippet**: trechos do artigo com as palavras encontradas entre `<b>` e `</b>`.
+    - **summary_snippet**: trecho de um resumo salvo que contém a busca, ou `null`.
+    """
+    rows = (await session.execute(search_query(q, limit + 1, offset))).all()
+    hits = rows[:limit]
+
+    # The article texts are stored compressed: their snippets take a second query.
+    texts = [stored_text(row.clean_text, row.text_zstd, SEARCH_HEADLINE_MAX_CHARS) or '' for row in hits]
+    snippets = (await session.scalars(article_headlines(q, texts))).all() if hits else []
+
+    results = [
+        WikiSearchHit(
+            word=row.word,
+            url=page_url(row.word),
+            rank=row.rank,
+            snippet=snippet,
+            summary_snippet=row.summary_snippet,
+        )
+        for row, snippet in zip(hits, snippets)
+    ]
+
+    next_offset = offset + limit if len(rows) > limit and offset + limit <= SEARCH_MAX_OFFSET else None
+
+    return WikiSearchResults(results=results, next_offset=next_offset)
+
+SUMMARY_PAGE_SIZE = 100
+SUMMARY_MAX_PAGE_SIZE = 1000
+SUMMARY_STREAM_BATCH = 1000
+
+def saved_words_query(after: Optional[tuple[str, int]] = None):
+    """
+    Projection of the columns listed by /summary/database, in keyset order (word, id).
+    """
+    query = (
+        select(Article.word, Summary.id, Summary.word_count, Summary.created_at)
+        .join(Article, Summary.article_id == Article.id)
+        .order_by(Article.word, Summary.id)
+    )
+
+    if after is not None:
+        query = query.where(tuple_(Article.word, Summary.id) > tuple_(literal(after[0]), literal(after[1])))
+
+    return query
+
+def saved_word(row) -> WikiSavedWord:
+    return WikiSavedWord(
+        word=row.word,
+        word_count=row.word_count,
+        created_at=row.created_at.isoformat()
+    )
 
 @app.get(
     "/summary/database", 
     response_model=WikiWordDatabase, 
     summary="Resumos da Wikipedia armazenados no banco de dados."
 )
-async def summary_database() -> WikiWordDatabase:
+async def summary_database(
+    limit: int = Query(SUMMARY_PAGE_SIZE, ge=1, le=SUMMARY_MAX_PAGE_SIZE, description='Número máximo de resumos por página.'),
+    cursor: Optional[str] = Query(None, description='Cursor `next_cursor` retornado pela página anterior.'),
+    format: Literal['json', 'ndjson'] = Query('json', description='`ndjson` envia todos os resumos, um JSON por linha.'),
+    session: AsyncSession = Depends(get_db)
+) -> WikiWordDatabase:
     """
     Gera uma lista dos termos da Wikipedia com resumos salvos no banco de dados. 
     Um termos pode aparecer mais de uma vez se houver múltiplos resumos salvos para ele.
 
-    Parâmetros de entrada: nenhum.
+    A lista é paginada em ordem de termo. Para buscar a próxima página, envie o
+    `next_cursor` da resposta no parâmetro `cursor`; ele é `null` na última página.
+
+    Exemplo dos parâmetros de entrada (todos opcionais):
+
+    - **limit**: "100"
+    - **cursor**: valor de `next_cursor` da página anterior.
+    - **format**: "ndjson" para receber todos os resumos (a partir do cursor) em streaming, um JSON por linha.
 
     Retorna um JSON com uma lista onde cada item contém as seguintes informações:
     
@@ -88,27 +453,38 @@ async def summary_database() -> WikiWordDatabase:
     - **word_count**: número de palavras para o resumo do artigo.
     - **created_at**: data e hora em que o resumo foi criado.
     """
-    with Session(engine) as session:
-        query = select(Summary).join(Summary.article).order_by(Article.word)
-        summaries = session.scalars(query).all()
+    try:
+        after = decode_cursor(cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == 'ndjson':
+        return StreamingResponse(stream_saved_words(after), media_type="application/x-ndjson")
+
+    rows = (await session.execute(saved_words_query(after).limit(limit + 1))).all()
+
+    saved_words: List[WikiSavedWord] = [saved_word(row) for row in rows[:limit]]
+
+    next_cursor = encode_cursor(rows[limit - 1].word, rows[limit - 1].id) if len(rows) > limit else None
+
+    return WikiWordDatabase(summaries=saved_words, next_cursor=next_cursor)
 
-        saved_words: List[WikiSavedWord] = [
-            WikiSavedWord(
-                word=summary.article.word,
-                word_count=summary.word_count,
-                created_at=summary.created_at.isoformat()
-            )
-            for summary in summaries
-        ]
+async def stream_saved_words(after: Optional[tuple[str, int]]) -> AsyncIterator[str]:
+    # A dedicated session: the response body is produced after the endpoint returns.
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            saved_words_query(after).execution_options(yield_per=SUMMARY_STREAM_BATCH)
+        )
 
-    return WikiWordDatabase(summaries=saved_words)
+        async for rows in result.partitions():
+            yield "".join(saved_word(row).model_dump_json() + "\n" for row in rows)
 
 @app.get(
     "/summary/database/{word}", 
     response_model=WikiSummaryDatabase | WikiExtractorError,
     summary="Recuperar resumos salvos anteriormente para um determinado termo."
 )
-async def summary_word_database(word: str) -> WikiSummaryDatabase:
+async def summary_word_database(word: str, request: Request, session: AsyncSession = Depends(get_db)) -> Response:
     """
     Gera uma lista com as informações dos resumos salvos anteriormente para um determinado termo.
 
@@ -122,19 +498,84 @@ async def summary_word_database(word: str) -> WikiSummaryDatabase:
     - **word_count**: número de palavras para o resumo do artigo.
     - **summary**: texto do resumo salvo.
     - **created_at**: data e hora em que o resumo foi criado.
+    - **derived_from_word_count**: tamanho do resumo salvo do qual este foi derivado, ou `null` se foi gerado a partir do artigo.
+    - **stale**: `true` se o artigo mudou na Wikipedia depois que o resumo foi gerado.
+
+    Aceita `If-None-Match` como o `/summarize`.
     """
-    with Session(engine) as session:
-        query = select(Summary).join(Summary.article).where(Article.word == normalize_word(word)).order_by(Article.word)
-        summaries = session.scalars(query).all()
-
-        saved_summaries: List[WikiSavedSummary] = [
-            WikiSavedSummary(
-                word=summary.article.word,
-                word_count=summary.word_count,
-                summary=summary.summary_text,
-                created_at=summary.created_at.isoformat()
-            )
-            for summary in summaries
-        ]
-
-    return WikiSummaryDatabase(summaries=saved_summaries)
+    word_slug = normalize_word(word).lower()
+    key = ("database", word_slug)
+    cached = get_cached(key)
+
+    if cached is not None:
+        return respond(request, cached)
+
+    source = aliased(Summary)
+    query = (
+        select(Summary)
+        .join(Summary.article)
+        .outerjoin(source, Summary.derived_from)
+        .options(contains_eager(Summary.article), contains_eager(Summary.derived_from.of_type(source)))
+        .where(resolves_to(word_slug))
+        .order_by(Article.word)
+    )
+    summaries = (await session.scalars(query)).all()
+
+    saved_summaries: List[WikiSavedSummary] = [
+        WikiSavedSummary(
+            word=summary.article.word,
+            word_count=summary.word_count,
+            summary=summary.summary_text,
+            created_at=summary.created_at.isoformat(),
+            derived_from_word_count=summary.derived_from.word_count if summary.derived_from else None,
+            stale=summary.stale
+        )
+        for summary in summaries
+    ]
+
+    return respond(request, cache_response(key, WikiSummaryDatabase(summaries=saved_summaries).model_dump()))
+
+@app.delete(
+    "/admin/missing-pages",
+    response_model=MissingPagesPurge,
+    dependencies=[Depends(require_admin)],
+    summary="Limpar o cache de páginas inexistentes."
+)
+async def admin_purge_missing_pages(
+    word: Optional[str] = Query(default=None, description="Termo a remover; todos se omitido."),
+) -> MissingPagesPurge:
+    """
+    Remove termos do cache de páginas inexistentes, para que a próxima requisição
+    volte a consultar a Wikipedia (por exemplo, depois que o artigo foi criado).
+
+    - **word**: termo a remover; se omitido, remove todos.
+
+    Retorna em **purged** o número de registros removidos do banco. O filtro em
+    memória é limpo apenas neste processo; nos demais, as entradas expiram sozinhas.
+    """
+    word_slug = normalize_word(word).lower() if word is not None else None
+
+    return MissingPagesPurge(purged=await purge_missing(word_slug))
+
+@app.get(
+    "/admin/profiles/{profile_id}",
+    dependencies=[Depends(require_admin)],
+    summary="Relatório de uma requisição perfilada."
+)
+def admin_profile(profile_id: str) -> Response:
+    """
+    Relatório de uma requisição feita com o cabeçalho `X-Profile: 1` (ou `profile=1`)
+    a partir de um endereço em `PROFILE_ALLOWLIST`; o id vem no cabeçalho
+    `X-Profile-Id` da resposta. Os relatórios ficam em memória neste processo por 1 hora.
+
+    - **wall_ms**: duração da requisição, até o último byte da resposta.
+    - **loop_busy_ms** / **loop_idle_ms**: tempo em que o event loop ficou ocupado executando código ou livre, esperando I/O.
+    - **slow_callbacks**: trechos síncronos que bloquearam o loop por mais de `PROFILE_SLOW_CALLBACK_MS`.
+    - **stats**: funções com maior tempo acumulado (cProfile).
+    """
+    report = profile_reports.get(profile_id)
+
+    if report is None:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado.")
+
+    return Response(content=report, media_type="application/json")
@@ -0,0 +1,35 @@
+import asyncio
+
+from alembic import context
+from sqlalchemy.engine import Connection
+
+from db import async_engine
+from models import Base
+
+target_metadata = Base.metadata
+
+def run_migrations(connection: Connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata, compare_server_default=True)
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+async def run_migrations_online() -> None:
+    async with async_engine.connect() as connection:
+        await connection.run_sync(run_migrations)
+
+    await async_engine.dispose()
+
+def run_migrations_offline() -> None:
+    """
+    `alembic upgrade head --sql`: print the SQL instead of running it.
+    """
+    context.configure(url=async_engine.url, target_metadata=target_metadata, literal_binds=True, dialect_opts={"paramstyle": "named"})
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
@@ -0,0 +1,51 @@
+"""baseline schema
+
+The schema the first versions of the API created on startup with
+`Base.metadata.create_all`. Tables are created only if missing, so databases
+created that way are upgraded with `alembic upgrade head` like new ones.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.create_table(
+        "wiki_article",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("word", sa.String(length=255), nullable=False),
+        sa.Column("word_slug", sa.String(length=255), nullable=False),
+        sa.Column("clean_text", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("word"),
+        sa.UniqueConstraint("word_slug"),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "wiki_summary",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("article_id", sa.Integer(), nullable=False),
+        sa.Column("word_count", sa.Integer(), nullable=False),
+        sa.Column("summary_text", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.ForeignKeyConstraint(["article_id"], ["wiki_article.id"]),
+        if_not_exists=True,
+    )
+
+def downgrade() -> None:
+    op.drop_table("wiki_summary")
+    op.drop_table("wiki_article")
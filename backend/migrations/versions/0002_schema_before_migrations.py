@@ -0,0 +1,176 @@
+"""schema before migrations
+
+Columns, tables and indexes added to the models while the API still created
+the schema on startup. `create_all` only created missing tables, so a database
+created by one of those versions may have any part of this: every statement is
+skipped when its object already exists.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    # Trigram index of wiki_article.word (fuzzy search).
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Revalidation of saved articles (utils/refresher.py).
+    op.add_column("wiki_article", sa.Column("revision_id", sa.BigInteger(), nullable=True), if_not_exists=True)
+    op.add_column("wiki_article", sa.Column("etag", sa.String(length=255), nullable=True), if_not_exists=True)
+    op.add_column("wiki_article", sa.Column("last_modified", sa.String(length=64), nullable=True), if_not_exists=True)
+    op.add_column(
+        "wiki_article",
+        sa.Column("checked_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_wiki_article_checked_at", "wiki_article", ["checked_at"], if_not_exists=True)
+
+    # Full-text search.
+    op.add_column(
+        "wiki_article",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('portuguese', replace(word, '_', ' ')), 'A')"
+                " || setweight(to_tsvector('portuguese', clean_text), 'B')",
+                persisted=True,
+            ),
+            nullable=False,
+        ),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_wiki_article_search_vector", "wiki_article", ["search_vector"], postgresql_using="gin", if_not_exists=True
+    )
+    op.create_index(
+        "ix_wiki_article_word_trgm",
+        "wiki_article",
+        ["word"],
+        postgresql_using="gin",
+        postgresql_ops={"word": "gin_trgm_ops"},
+        if_not_exists=True,
+    )
+
+    op.add_column(
+        "wiki_summary",
+        sa.Column("derived_from_id", sa.Integer(), sa.ForeignKey("wiki_summary.id", ondelete="SET NULL"), nullable=True),
+        inline_references=True,
+        if_not_exists=True,
+    )
+    op.add_column(
+        "wiki_summary",
+        sa.Column("stale", sa.Boolean(), server_default="false", nullable=False),
+        if_not_exists=True,
+    )
+    op.add_column(
+        "wiki_summary",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('portuguese', summary_text)", persisted=True),
+            nullable=False,
+        ),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_wiki_summary_search_vector", "wiki_summary", ["search_vector"], postgresql_using="gin", if_not_exists=True
+    )
+
+    # One summary per size of an article. Older versions could save the same size
+    # twice: the most recent one is kept.
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_wiki_summary_article_word_count') THEN
+                DELETE FROM wiki_summary AS older
+                USING wiki_summary AS newer
+                WHERE newer.article_id = older.article_id
+                    AND newer.word_count = older.word_count
+                    AND newer.id > older.id;
+
+                ALTER TABLE wiki_summary
+                    ADD CONSTRAINT uq_wiki_summary_article_word_count UNIQUE (article_id, word_count);
+            END IF;
+        END
+        $$
+        """
+    )
+
+    op.create_table(
+        "wiki_missing_page",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("word_slug", sa.String(length=255), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("word_slug"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_wiki_missing_page_expires_at", "wiki_missing_page", ["expires_at"], if_not_exists=True)
+
+    op.create_table(
+        "wiki_summary_job",
+        sa.Column("id", sa.String(length=32), nullable=False),
+        sa.Column("word", sa.String(length=255), nullable=False),
+        sa.Column("word_count", sa.Integer(), nullable=False),
+        sa.Column("tolerance", sa.Integer(), nullable=True),
+        sa.Column("derive", sa.Boolean(), nullable=True),
+        sa.Column("status", sa.String(length=16), server_default="queued", nullable=False),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("run_after", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("locked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("url", sa.Text(), nullable=True),
+        sa.Column("summary_text", sa.Text(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_wiki_summary_job_status_run_after", "wiki_summary_job", ["status", "run_after"], if_not_exists=True
+    )
+
+    op.create_table(
+        "wiki_article_alias",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("alias_slug", sa.String(length=255), nullable=False),
+        sa.Column("article_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("alias_slug"),
+        sa.ForeignKeyConstraint(["article_id"], ["wiki_article.id"], ondelete="CASCADE"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_wiki_article_alias_article_id", "wiki_article_alias", ["article_id"], if_not_exists=True)
+
+def downgrade() -> None:
+    op.drop_table("wiki_article_alias")
+    op.drop_table("wiki_summary_job")
+    op.drop_table("wiki_missing_page")
+    op.drop_constraint("uq_wiki_summary_article_word_count", "wiki_summary", type_="unique")
+    op.drop_index("ix_wiki_summary_search_vector", table_name="wiki_summary")
+    op.drop_column("wiki_summary", "search_vector")
+    op.drop_column("wiki_summary", "stale")
+    op.drop_column("wiki_summary", "derived_from_id")
+    op.drop_index("ix_wiki_article_word_trgm", table_name="wiki_article")
+    op.drop_index("ix_wiki_article_search_vector", table_name="wiki_article")
+    op.drop_column("wiki_article", "search_vector")
+    op.drop_index("ix_wiki_article_checked_at", table_name="wiki_article")
+    op.drop_column("wiki_article", "checked_at")
+    op.drop_column("wiki_article", "last_modified")
+    op.drop_column("wiki_article", "etag")
+    op.drop_column("wiki_article", "revision_id")
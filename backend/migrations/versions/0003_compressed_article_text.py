@@ -0,0 +1,49 @@
+"""compressed article text
+
+Article texts move to wiki_article.text_zstd (zstd, see utils/article_text.py);
+the existing plain texts stay in clean_text until the API compresses them in
+the background. The search vector, computed by Postgres from clean_text so
+far, becomes a regular column written by the app, keeping its values.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.add_column("wiki_article", sa.Column("text_zstd", sa.LargeBinary(), nullable=True))
+    # Already compressed: stored out of line without TOAST trying to compress it again.
+    op.execute("ALTER TABLE wiki_article ALTER COLUMN text_zstd SET STORAGE EXTERNAL")
+    op.alter_column("wiki_article", "clean_text", existing_type=sa.Text(), nullable=True)
+    op.execute("ALTER TABLE wiki_article ALTER COLUMN search_vector DROP EXPRESSION")
+
+def downgrade() -> None:
+    # Only possible while every text is still plain: fails on compressed rows.
+    op.alter_column("wiki_article", "clean_text", existing_type=sa.Text(), nullable=False)
+    op.drop_column("wiki_article", "text_zstd")
+    op.drop_index("ix_wiki_article_search_vector", table_name="wiki_article")
+    op.drop_column("wiki_article", "search_vector")
+    op.add_column(
+        "wiki_article",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('portuguese', replace(word, '_', ' ')), 'A')"
+                " || setweight(to_tsvector('portuguese', clean_text), 'B')",
+                persisted=True,
+            ),
+            nullable=False,
+        ),
+    )
+    op.create_index("ix_wiki_article_search_vector", "wiki_article", ["search_vector"], postgresql_using="gin")
@@ -1,27 +1,70 @@
 from datetime import datetime
+from typing import Any, Optional
+from uuid import uuid4
 
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import String, Text, Integer, ForeignKey, DateTime, func
+from sqlalchemy import String, Text, Integer, BigInteger, Boolean, Computed, ForeignKey, DateTime, Index, LargeBinary, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import TSVECTOR
 
 class Base(DeclarativeBase):
     pass
 
 class Article(Base):
     __tablename__ = "wiki_article"
+    __table_args__ = (
+        Index("ix_wiki_article_search_vector", "search_vector", postgresql_using="gin"),
+        # Fuzzy matching of terms (pg_trgm); pg_trgm splits words on "_" as on spaces.
+        Index("ix_wiki_article_word_trgm", "word", postgresql_using="gin", postgresql_ops={"word": "gin_trgm_ops"}),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
     word: Mapped[str] = mapped_column(String(255), unique=True)
     word_slug: Mapped[str] = mapped_column(String(255), unique=True)
-    clean_text: Mapped[str] = mapped_column(Text)
+
+    # The article text, zstd-compressed (see utils/article_text.py). clean_text only
+    # holds the plain text of rows saved before compression, until the background
+    # migration compresses them. Both are left out of queries unless asked for.
+    text_zstd: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True, deferred=True)
+    clean_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True)
+
+    # Version of the page the text was taken from, and the validators used to
+    # revalidate it with conditional requests (see utils/refresher.py).
+    revision_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    etag: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    last_modified: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    checked_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    # Full-text search document (Portuguese), title weighted above the text;
+    # written along with the text (utils.search.article_search_vector), since
+    # Postgres cannot read the compressed text.
+    search_vector: Mapped[Any] = mapped_column(TSVECTOR, deferred=True)
 
     summaries: Mapped[list["Summary"]] = relationship("Summary", back_populates="article", cascade="all, delete-orphan")
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+class ArticleAlias(Base):
+    __tablename__ = "wiki_article_alias"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    # Every requested slug (spelling variants, Wikipedia redirects and the canonical
+    # title itself) points to the one article saved under the canonical title.
+    alias_slug: Mapped[str] = mapped_column(String(255), unique=True)
+    article_id: Mapped[int] = mapped_column(ForeignKey("wiki_article.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
 class Summary(Base):
     __tablename__ = "wiki_summary"
+    __table_args__ = (
+        # One summary per size of an article: the key of the summary upsert, and the
+        # index behind the lookups by article (and word_count).
+        UniqueConstraint("article_id", "word_count", name="uq_wiki_summary_article_word_count"),
+        Index("ix_wiki_summary_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -31,8 +74,59 @@ class Summary(Base):
     word_count: Mapped[int] = mapped_column(Integer)
     summary_text: Mapped[str] = mapped_column(Text)
 
+    # Set when the summary was condensed from a longer saved summary instead of the article.
+    derived_from_id: Mapped[Optional[int]] = mapped_column(ForeignKey("wiki_summary.id", ondelete="SET NULL"), nullable=True)
+    derived_from: Mapped[Optional["Summary"]] = relationship("Summary", remote_side=[id])
+
+    # Set when the article text changed after the summary was generated; stale
+    # summaries are no longer served and get replaced on the next request.
+    stale: Mapped[bool] = mapped_column(Boolean, server_default="false", default=False, nullable=False)
+
+    search_vector: Mapped[Any] = mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('portuguese', summary_text)", persisted=True),
+        deferred=True,
+    )
+
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
-    
+class MissingPage(Base):
+    __tablename__ = "wiki_missing_page"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
 
+    # Terms with no Wikipedia article, so retries are answered without fetching again.
+    word_slug: Mapped[str] = mapped_column(String(255), unique=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+class SummaryJob(Base):
+    __tablename__ = "wiki_summary_job"
+    __table_args__ = (
+        # Workers pick the oldest runnable job of a status.
+        Index("ix_wiki_summary_job_status_run_after", "status", "run_after"),
+    )
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True, default=lambda: uuid4().hex)
+
+    word: Mapped[str] = mapped_column(String(255))
+    word_count: Mapped[int] = mapped_column(Integer)
+    tolerance: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    derive: Mapped[Optional[bool]] = mapped_column(Boolean, nullable=True)
+
+    # queued -> running -> done | failed; a failed attempt goes back to queued
+    # (with run_after pushed back) until JOB_MAX_ATTEMPTS.
+    status: Mapped[str] = mapped_column(String(16), server_default="queued", default="queued", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, server_default="0", default=0, nullable=False)
+    run_after: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    url: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    summary_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class WikiExtractorResult(BaseModel):
     word: str
@@ -17,12 +17,74 @@ class WikiSavedWord(BaseModel):
 
 class WikiWordDatabase(BaseModel):
     summaries: list[WikiSavedWord]
+    next_cursor: str | None = None
 
 class WikiSavedSummary(BaseModel):
     word: str
     word_count: int
     summary: str
     created_at: str
+    derived_from_word_count: int | None = None
+    stale: bool = False
 
 class WikiSummaryDatabase(BaseModel):
-    summaries: list[WikiSavedSummary]
\ No newline at end of file
+    summaries: list[WikiSavedSummary]
+
+class WikiSearchHit(BaseModel):
+    word: str
+    url: str
+    rank: float
+    snippet: str
+    summary_snippet: str | None = None
+
+class WikiSearchResults(BaseModel):
+    results: list[WikiSearchHit]
+    next_offset: int | None = None
+
+class LLMLimiterStats(BaseModel):
+    max_concurrency: int
+    requests_per_minute: float
+    tokens_per_minute: float
+    queue_depth: int
+    in_flight: int
+    completed: int
+    avg_wait_seconds: float
+    max_wait_seconds: float
+    last_wait_seconds: float
+
+
+class CacheStats(BaseModel):
+    entries: int
+    size_bytes: int
+    max_bytes: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    evictions: int
+
+class WikiBatchItem(BaseModel):
+    word: str
+    word_count: int = 150
+
+class WikiBatchRequest(BaseModel):
+    items: list[WikiBatchItem] = Field(min_length=1, max_length=500)
+
+class WikiBatchResponse(BaseModel):
+    results: list[WikiExtractorResult | WikiExtractorError]
+
+class WikiBatchStreamItem(BaseModel):
+    index: int
+    result: WikiExtractorResult | WikiExtractorError
+
+class MissingPagesPurge(BaseModel):
+    purged: int
+
+class WikiSummaryJob(BaseModel):
+    job_id: str
+    status: str
+    word: str
+    word_count: int
+    attempts: int
+    result: WikiExtractorResult | WikiExtractorError | None = None
+    created_at: str
+    updated_at: str
@@ -9,10 +9,24 @@ if PROJECT_ROOT not in sys.path:
 import pytest
 
 from schemas import WikiExtractorResult
+from utils import missing_pages as missing_pages_module
 from utils import wiki_extractor as wiki_extractor_module
+from utils.cache import LRUCache
+from utils.response_cache import response_cache
 from utils.wiki_extractor import WikipediaTextExtractor
 
 
+@pytest.fixture(autouse=True)
+def fresh_summary_cache(monkeypatch):
+    monkeypatch.setattr(
+        wiki_extractor_module,
+        "summary_cache",
+        LRUCache(max_bytes=1024 * 1024, ttl=60, group=lambda key: key[0]),
+    )
+    missing_pages_module.missing_cache.clear()
+    response_cache.clear()
+
+
 @pytest.fixture
 def fake_extractor_extract(monkeypatch):
     async def _fake_extract(self: WikipediaTextExtractor) -> WikiExtractorResult:
@@ -0,0 +1,144 @@
+import random
+import threading
+
+import pytest
+import zstandard
+
+from utils import article_text
+
+
+SENTENCES = [
+    "O artigo {n} da Wikipédia em português descreve a história da cidade e da sua população.",
+    "Segundo o censo de {n}, o município tinha habitantes distribuídos em vários distritos.",
+    "A empresa foi fundada em {n} e tornou-se uma das maiores do setor de tecnologia.",
+    "Ver também: referências, ligações externas e bibliografia sobre o tema {n}.",
+]
+
+
+def _texts(count: int) -> list[str]:
+    rng = random.Random(0)
+    return [" ".join(rng.choice(SENTENCES).format(n=rng.randint(1000, 2025)) for _ in range(20)) for _ in range(count)]
+
+
+@pytest.fixture
+def dictionary(monkeypatch, tmp_path):
+    path = tmp_path / "articles.dict"
+    path.write_bytes(article_text.train_dictionary(_texts(500), size=4096, sample_bytes=1024))
+
+    monkeypatch.setattr(article_text, "ARTICLE_ZSTD_DICTS", str(path))
+    monkeypatch.setattr(article_text, "_local", article_text.threading.local())
+    article_text.get_dictionaries.cache_clear()
+    yield zstandard.ZstdCompressionDict(path.read_bytes())
+    article_text.get_dictionaries.cache_clear()
+
+
+def test_round_trip_and_prefix() -> None:
+    text = "Introdução à computação: " + "çãõé " * 5000
+
+    data = article_text.compress_text(text)
+
+    assert len(data) < len(text.encode()) / 10
+    assert article_text.decompress_text(data) == text
+    assert article_text.decompress_text(data, max_chars=30) == text[:30]
+    assert article_text.stored_text(None, data, max_chars=5) == text[:5]
+
+
+@pytest.mark.asyncio
+async def test_large_texts_are_decompressed_off_the_event_loop(monkeypatch) -> None:
+    small = article_text.compress_text("texto curto")
+    large = article_text.compress_text(" ".join(_texts(1)) * 2)
+    threads: list[str] = []
+    decompress_text = article_text.decompress_text
+
+    def _decompress(data: bytes, max_chars=None) -> str:
+        threads.append(threading.current_thread().name)
+        return decompress_text(data, max_chars)
+
+    monkeypatch.setattr(article_text, "decompress_text", _decompress)
+    monkeypatch.setattr(article_text, "ARTICLE_TEXT_INLINE_BYTES", len(small))
+
+    assert await article_text.stored_text_async(None, small) == "texto curto"
+    assert await article_text.stored_text_async(None, large) == " ".join(_texts(1)) * 2
+    assert await article_text.stored_text_async("texto antigo", None) == "texto antigo"
+
+    assert threads[0] == threading.current_thread().name
+    assert threads[1] != threading.current_thread().name
+
+
+def test_plain_rows_are_read_as_is() -> None:
+    assert article_text.stored_text("texto antigo", None) == "texto antigo"
+    assert article_text.stored_text("texto antigo", None, max_chars=5) == "texto"
+    assert article_text.stored_text(None, None) is None
+
+
+def test_dictionary_is_recorded_in_the_frame(dictionary) -> None:
+    text = _texts(1)[0]
+
+    data = article_text.compress_text(text)
+
+    assert zstandard.get_frame_parameters(data).dict_id == dictionary.dict_id()
+    assert len(data) < len(zstandard.ZstdCompressor(level=article_text.ARTICLE_ZSTD_LEVEL).compress(text.encode()))
+    assert article_text.decompress_text(data) == text
+
+
+def test_unknown_dictionary_fails_loudly(dictionary, monkeypatch) -> None:
+    data = article_text.compress_text("texto comprimido com dicionário")
+
+    monkeypatch.setattr(article_text, "ARTICLE_ZSTD_DICTS", "")
+    monkeypatch.setattr(article_text, "_local", article_text.threading.local())
+    article_text.get_dictionaries.cache_clear()
+
+    with pytest.raises(article_text.UnknownDictionaryError):
+        article_text.decompress_text(data)
+
+
+class _Rows:
+    def __init__(self, rows: list) -> None:
+        self.rows = rows
+
+    def all(self) -> list:
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, batches: list[list]) -> None:
+        self.batches = batches
+        self.updates: list = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None) -> _Rows:
+        if params is not None:
+            self.updates.append((statement, params))
+            return _Rows([])
+
+        return _Rows(self.batches.pop(0) if self.batches else [])
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+    async def __aenter__(self) -> "FakeSession":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+
+@pytest.mark.asyncio
+async def test_background_migration_compresses_plain_rows_until_none_left(monkeypatch) -> None:
+    class Row:
+        def __init__(self, id: int, clean_text: str) -> None:
+            self.id, self.clean_text = id, clean_text
+
+    session = FakeSession([[Row(1, "texto um"), Row(2, "texto dois")], [Row(3, "texto três")]])
+    monkeypatch.setattr(article_text, "AsyncSessionLocal", lambda: session)
+    monkeypatch.setattr(article_text, "ARTICLE_TEXT_MIGRATION_PAUSE", 0)
+
+    await article_text.run_text_migration()
+
+    assert session.commits == 2
+    statement, params = session.updates[0]
+    assert "SET text_zstd=" in str(statement) and "clean_text=" in str(statement)
+    assert [(p["row_id"], article_text.decompress_text(p["row_text_zstd"])) for p in params] == [
+        (1, "texto um"), (2, "texto dois"),
+    ]
+    assert article_text.decompress_text(session.updates[1][1][0]["row_text_zstd"]) == "texto três"
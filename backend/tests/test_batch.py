@@ -0,0 +1,170 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from schemas import WikiBatchItem, WikiExtractorError, WikiExtractorResult
+from utils import batch
+from utils import mediawiki
+from utils.wiki_extractor import WikipediaTextExtractor
+
+
+@pytest.fixture
+def saved_summaries(monkeypatch):
+    saved = {("python", 150): "resumo salvo"}
+
+    async def _fake_load_saved_summaries(items):
+        return saved
+
+    monkeypatch.setattr(batch, "load_saved_summaries", _fake_load_saved_summaries)
+
+    return saved
+
+
+@pytest.fixture
+def slow_extract(monkeypatch):
+    state = {"in_flight": 0, "max_in_flight": 0, "calls": []}
+
+    async def _fake_extract(self: WikipediaTextExtractor):
+        state["calls"].append(self.word)
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        await asyncio.sleep(0.01)
+        state["in_flight"] -= 1
+
+        if self.word == "Quebrado":
+            raise RuntimeError("LLM down")
+
+        return WikiExtractorResult(word=self.word, url=self.url, summary=f"novo {self.word_count}")
+
+    monkeypatch.setattr(WikipediaTextExtractor, "extract", _fake_extract)
+
+    return state
+
+
+def test_item_key_normalizes_word() -> None:
+    assert batch.item_key(WikiBatchItem(word=" casa de  papel ", word_count=80)) == ("casa_de_papel", 80)
+
+
+@pytest.mark.asyncio
+async def test_summarize_batch_keeps_order_and_skips_saved(saved_summaries, slow_extract) -> None:
+    items = [
+        WikiBatchItem(word="Steve Jobs", word_count=100),
+        WikiBatchItem(word="Python"),
+        WikiBatchItem(word="Quebrado"),
+    ]
+
+    results = await batch.summarize_batch(items)
+
+    assert [type(result) for result in results] == [WikiExtractorResult, WikiExtractorResult, WikiExtractorError]
+    assert results[0].summary == "novo 100"
+    assert results[1].summary == "resumo salvo"
+    assert results[1].url == "https://pt.wikipedia.org/wiki/Python"
+    assert sorted(slow_extract["calls"]) == ["Quebrado", "Steve Jobs"]
+
+
+@pytest.mark.asyncio
+async def test_summarize_batch_prefetches_misses_with_api_backend(saved_summaries, slow_extract, monkeypatch) -> None:
+    prefetched: list[list[str]] = []
+
+    async def _fake_prefetch(items):
+        prefetched.append([item.word for item in items])
+        yield "steve_jobs"
+
+    monkeypatch.setattr(mediawiki, "WIKI_FETCH_BACKEND", "api")
+    monkeypatch.setattr(batch, "prefetch_articles", _fake_prefetch)
+
+    await batch.summarize_batch([WikiBatchItem(word="Steve Jobs"), WikiBatchItem(word="Python")])
+
+    assert prefetched == [["Steve Jobs"]]
+    assert slow_extract["calls"] == ["Steve Jobs"]
+
+
+@pytest.mark.asyncio
+async def test_summarize_batch_starts_items_as_their_article_is_prefetched(saved_summaries, slow_extract, monkeypatch) -> None:
+    release = asyncio.Event()
+
+    async def _fake_prefetch(items):
+        yield "steve_jobs"
+        await release.wait()
+        yield "pixar"
+
+    monkeypatch.setattr(mediawiki, "WIKI_FETCH_BACKEND", "api")
+    monkeypatch.setattr(batch, "prefetch_articles", _fake_prefetch)
+
+    stream = batch.summarize_batch_stream([WikiBatchItem(word="Steve Jobs"), WikiBatchItem(word="Pixar")])
+
+    assert await anext(stream) == (0, WikiExtractorResult(word="Steve Jobs", url="https://pt.wikipedia.org/wiki/Steve_Jobs", summary="novo 150"))
+    assert slow_extract["calls"] == ["Steve Jobs"]
+
+    release.set()
+
+    assert [index async for index, _ in stream] == [1]
+    assert slow_extract["calls"] == ["Steve Jobs", "Pixar"]
+
+
+@pytest.mark.asyncio
+async def test_summarize_batch_runs_items_when_prefetch_fails(saved_summaries, slow_extract, monkeypatch) -> None:
+    async def _failing_prefetch(items):
+        raise RuntimeError("API down")
+        yield
+
+    monkeypatch.setattr(mediawiki, "WIKI_FETCH_BACKEND", "api")
+    monkeypatch.setattr(batch, "prefetch_articles", _failing_prefetch)
+
+    results = await batch.summarize_batch([WikiBatchItem(word="Steve Jobs")])
+
+    assert results[0].summary == "novo 150"
+
+
+@pytest.mark.asyncio
+async def test_summarize_batch_bounds_concurrency(saved_summaries, slow_extract) -> None:
+    items = [WikiBatchItem(word=f"Termo {i}") for i in range(10)]
+
+    results = await batch.summarize_batch(items, concurrency=3)
+
+    assert len(results) == 10
+    assert slow_extract["max_in_flight"] == 3
+
+
+@pytest.mark.asyncio
+async def test_summarize_batch_stream_yields_saved_first(saved_summaries, slow_extract) -> None:
+    items = [WikiBatchItem(word="Steve Jobs"), WikiBatchItem(word="Python")]
+
+    indexes = [index async for index, _ in batch.summarize_batch_stream(items)]
+
+    assert indexes == [1, 0]
+
+
+def test_batch_endpoint(saved_summaries, slow_extract) -> None:
+    client = TestClient(app)
+
+    resp = client.post("/summarize/batch", json={"items": [{"word": "Python"}, {"word": "Steve Jobs", "word_count": 50}]})
+
+    assert resp.status_code == 200
+    assert [result["summary"] for result in resp.json()["results"]] == ["resumo salvo", "novo 50"]
+
+
+def test_batch_endpoint_streams_ndjson(saved_summaries, slow_extract) -> None:
+    client = TestClient(app)
+
+    resp = client.post(
+        "/summarize/batch",
+        params={"stream": "true"},
+        json={"items": [{"word": "Steve Jobs"}, {"word": "Python"}]},
+    )
+
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["index"] for line in lines] == [1, 0]
+    assert lines[0]["result"]["summary"] == "resumo salvo"
+
+
+def test_batch_endpoint_rejects_empty_list() -> None:
+    client = TestClient(app)
+
+    resp = client.post("/summarize/batch", json={"items": []})
+
+    assert resp.status_code == 422
@@ -0,0 +1,97 @@
+import httpx
+import pytest
+
+from benchmarks.corpus import render_page, size_class, title_of_size
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks.fake_wikipedia import FakeWikipedia, RewriteTransport
+from benchmarks.startup import STAGES, startup_benchmarks
+from benchmarks.stats import BenchmarkResult, compare, percentile, summarize
+from utils import http_client as http_client_module
+from utils import summarizer
+from utils.wiki_extractor import WikipediaPageNotFoundError, WikipediaTextExtractor
+
+
+def test_percentile_and_summary() -> None:
+    latencies = [i / 1000 for i in range(1, 101)]
+
+    assert percentile(latencies, 50) == 0.05
+    assert percentile(latencies, 99) == 0.099
+    assert percentile([], 95) == 0.0
+
+    result = summarize("bench", latencies, seconds=2.0, errors=1)
+
+    assert result.throughput == 50.0
+    assert (result.p50_ms, result.p95_ms, result.p99_ms) == (50.0, 95.0, 99.0)
+    assert result.errors == 1
+
+
+def test_compare_flags_regressions() -> None:
+    baseline = {
+        "fast": {"throughput": 100.0, "p95_ms": 10.0},
+        "slow": {"throughput": 100.0, "p95_ms": 10.0},
+    }
+    results = [
+        BenchmarkResult("fast", 100, 0, 1.0, 105.0, 5.0, 10.5, 12.0),
+        BenchmarkResult("slow", 100, 0, 1.0, 80.0, 5.0, 10.0, 12.0),
+        BenchmarkResult("new", 100, 0, 1.0, 80.0, 5.0, 10.0, 12.0),
+    ]
+
+    report, regressions = compare(results, baseline, threshold=0.1)
+
+    assert regressions == ["slow"]
+    assert "REGRESSION" in report
+
+
+def test_corpus_pages_vary_in_size() -> None:
+    small = render_page(title_of_size("small"))
+    large = render_page(title_of_size("large"))
+
+    assert size_class(title_of_size("large")) == "large"
+    assert len(large) > 50 * len(small) / 2
+    assert render_page("Inexistente 1") is None
+
+
+@pytest.mark.asyncio
+async def test_fake_wikipedia_serves_the_extractor(monkeypatch) -> None:
+    wikipedia = FakeWikipedia().start()
+    monkeypatch.setattr(
+        http_client_module,
+        "build_http_client",
+        lambda: httpx.AsyncClient(transport=RewriteTransport(wikipedia.url)),
+    )
+
+    try:
+        extractor = WikipediaTextExtractor("Artigo de teste")
+        await extractor.fecth_article()
+        extractor.text_cleaner()
+
+        assert extractor.canonical_title == "Artigo de Teste"
+        assert extractor.revision_id
+        assert extractor.clean_text
+
+        with pytest.raises(WikipediaPageNotFoundError):
+            await WikipediaTextExtractor("Inexistente 1").fecth_article()
+    finally:
+        await http_client_module.close_http_client()
+        wikipedia.stop()
+
+    assert wikipedia.requests == 2
+
+
+@pytest.mark.asyncio
+async def test_fake_llm_streams_requested_words(monkeypatch) -> None:
+    llm = FakeChatModel(latency=0, tokens_per_second=0)
+    monkeypatch.setattr(summarizer, "get_llm", lambda: llm)
+    monkeypatch.setattr(summarizer, "_chains", {})
+
+    chunks = [chunk async for chunk in summarizer.text_summarizer_stream("Texto do artigo.", word_count=12)]
+
+    assert len("".join(chunks).split()) == 12
+    assert len((await summarizer.text_condenser("Resumo longo.", word_count=5)).split()) == 5
+
+
+def test_startup_benchmark_runs_in_fresh_processes() -> None:
+    results = startup_benchmarks(rounds=1)
+
+    assert [r.name for r in results] == [f"startup.{stage}" for stage in STAGES]
+    assert all(r.operations == 1 and r.p50_ms > 0 for r in results)
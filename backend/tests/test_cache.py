@@ -0,0 +1,106 @@
+import time
+
+from utils.cache import LRUCache
+
+
+def _sizeof(value) -> int:
+    return len(value) if isinstance(value, str) else 0
+
+
+def test_cache_counts_hits_and_misses() -> None:
+    cache = LRUCache(max_bytes=100, ttl=60, sizeof=_sizeof)
+
+    assert cache.get(("python", 150)) is None
+    cache.set(("python", 150), "resumo")
+
+    assert cache.get(("python", 150)) == "resumo"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_evicts_least_recently_used_over_byte_budget() -> None:
+    cache = LRUCache(max_bytes=10, ttl=60, sizeof=_sizeof)
+
+    cache.set("a", "aaaa")
+    cache.set("b", "bbbb")
+    cache.get("a")
+    cache.set("c", "cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa"
+    assert cache.get("c") == "cccc"
+    assert cache.size == 10
+    assert cache.evictions == 1
+
+
+def test_cache_skips_values_larger_than_budget() -> None:
+    cache = LRUCache(max_bytes=3, ttl=60, sizeof=_sizeof)
+
+    cache.set("a", "aaaa")
+
+    assert len(cache) == 0
+
+
+def test_cache_expires_entries(monkeypatch) -> None:
+    cache = LRUCache(max_bytes=100, ttl=10, sizeof=_sizeof)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+
+    cache.set("a", "aaaa")
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+
+    assert cache.get("a") is None
+    assert cache.size == 0
+
+
+def test_cache_invalidate_and_disable() -> None:
+    cache = LRUCache(max_bytes=100, ttl=60, sizeof=_sizeof)
+    cache.set("a", "aaaa")
+    cache.invalidate("a")
+
+    assert cache.get("a") is None
+
+    disabled = LRUCache(max_bytes=0, ttl=60, sizeof=_sizeof)
+    disabled.set("a", "aaaa")
+
+    assert disabled.get("a") is None
+
+
+def test_cache_entry_ttl_is_capped(monkeypatch) -> None:
+    cache = LRUCache(max_bytes=100, ttl=10, sizeof=_sizeof)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+
+    cache.set("short", "aaaa", ttl=2)
+    cache.set("long", "bbbb", ttl=60)
+    cache.set("expired", "cccc", ttl=-1)
+    monkeypatch.setattr(time, "monotonic", lambda: now + 5)
+
+    assert cache.get("short") is None
+    assert cache.get("long") == "bbbb"
+    assert cache.get("expired") is None
+
+
+def test_cache_invalidates_a_group_of_keys() -> None:
+    cache = LRUCache(max_bytes=100, ttl=60, sizeof=_sizeof, group=lambda key: key[1])
+    cache.set(("summarize", "steve_jobs", 150), "a")
+    cache.set(("database", "steve_jobs"), "b")
+    cache.set(("database", "pixar"), "c")
+
+    assert cache.invalidate_group("steve_jobs") == 2
+    assert cache.invalidate_group("steve_jobs") == 0
+
+    assert cache.get(("database", "steve_jobs")) is None
+    assert cache.get(("database", "pixar")) == "c"
+    assert cache.size == 1
+
+
+def test_cache_group_index_follows_evictions() -> None:
+    cache = LRUCache(max_bytes=2, ttl=60, sizeof=_sizeof, group=lambda key: key[1])
+    cache.set(("database", "steve_jobs"), "a")
+    cache.set(("database", "pixar"), "b")
+    cache.set(("database", "python"), "c")
+
+    assert cache.invalidate_group("steve_jobs") == 0
+    assert cache.invalidate_group("pixar") == 1
+    assert len(cache) == 1
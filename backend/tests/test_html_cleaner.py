@@ -0,0 +1,83 @@
+from pathlib import Path
+
+import pytest
+
+from utils import html_cleaner
+from utils.html_cleaner import CLEANER_BACKENDS, REFERENCE_BACKEND, NoArticleTextError, canonical_title, clean_html, clean_wikitext
+
+FIXTURES = Path(__file__).parent / "fixtures" / "wiki_pages"
+
+# Each saved page has the text produced by the reference backend next to it.
+PAGES = sorted(path.stem for path in FIXTURES.glob("*.html") if path.with_suffix(".txt").exists())
+
+
+def _read(name: str, suffix: str) -> str:
+    return (FIXTURES / f"{name}{suffix}").read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("backend", sorted(CLEANER_BACKENDS))
+@pytest.mark.parametrize("page", PAGES)
+def test_backends_match_reference_output(page: str, backend: str) -> None:
+    expected = _read(page, ".txt").rstrip("\n")
+
+    assert clean_html(_read(page, ".html"), backend) == expected
+
+
+@pytest.mark.parametrize("backend", sorted(CLEANER_BACKENDS))
+def test_backends_detect_missing_article(backend: str) -> None:
+    with pytest.raises(NoArticleTextError):
+        clean_html(_read("noarticletext", ".html"), backend)
+
+
+@pytest.mark.parametrize("backend", sorted(CLEANER_BACKENDS))
+def test_backends_agree_on_fragments(backend: str) -> None:
+    fragments = [
+        "",
+        "plain text",
+        "<p>a<!-- comment -->b</p>tail",
+        "<div>a<br>b &amp; c<sup class=\"reference\">[1]</sup> d</div>",
+        "<html><head><title>T</title></head><body><p>sem conteúdo</p></body></html>",
+        '<?xml version="1.0" encoding="utf-8"?><html><body><p>declaração XML</p></body></html>',
+        "<div><p>a<![CDATA[ b < c ]]>d</p><script><![CDATA[var x = 1;]]></script></div>",
+    ]
+
+    for fragment in fragments:
+        assert clean_html(fragment, backend) == clean_html(fragment, REFERENCE_BACKEND)
+
+
+@pytest.mark.asyncio
+async def test_clean_html_async_runs_on_process_pool() -> None:
+    try:
+        text = await html_cleaner.clean_html_async(_read("python", ".html"))
+    finally:
+        html_cleaner.shutdown_cleaner_pool()
+
+    assert text == _read("python", ".txt").rstrip("\n")
+
+
+def test_canonical_title_follows_redirects() -> None:
+    assert canonical_title(_read("casa_de_papel", ".html")) == "La casa de papel"
+    assert canonical_title(_read("steve_jobs", ".html")) == "Steve Jobs"
+    assert canonical_title("<p>sem link</p>") is None
+
+
+def test_clean_wikitext_drops_templates_tables_and_references() -> None:
+    wikitext = """{{Info/Empresário
+| nome = Steve Jobs
+| imagem = {{Imagem|Jobs.jpg}}
+}}
+'''Steven Paul Jobs''' ([[São Francisco (Califórnia)|São Francisco]], [[1955]]) foi um [[empresário]].<ref name="a">{{citar web|url=x}}</ref>
+[[Ficheiro:Steve Jobs.jpg|thumb|Jobs em [[2010]]]]
+== Biografia ==
+Texto&nbsp;aqui. Veja [https://apple.com site da Apple].
+{| class="wikitable"
+| a || b
+|}
+<!-- comentario -->
+[[Categoria:Empresários]]
+"""
+
+    assert clean_wikitext(wikitext) == (
+        "Steven Paul Jobs (São Francisco, 1955) foi um empresário.\n\n"
+        "Biografia\nTexto\xa0aqui. Veja site da Apple."
+    )
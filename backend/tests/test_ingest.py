@@ -0,0 +1,195 @@
+import bz2
+
+import pytest
+
+import ingest as ingest_cli
+from utils import ingest
+from utils.wiki_extractor import normalize_word
+
+DUMP = """<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/" version="0.11" xml:lang="pt">
+  <siteinfo><sitename>Wikipedia</sitename></siteinfo>
+  <page>
+    <title>Steve Jobs</title>
+    <ns>0</ns>
+    <id>1</id>
+    <revision><id>101</id><text>'''Steven Paul Jobs''' foi um [[empresário]].{{Info}}</text></revision>
+  </page>
+  <page>
+    <title>Wikipédia:Sobre</title>
+    <ns>4</ns>
+    <id>2</id>
+    <revision><id>102</id><text>projeto</text></revision>
+  </page>
+  <page>
+    <title>Steven Paul Jobs</title>
+    <ns>0</ns>
+    <id>3</id>
+    <redirect title="Steve Jobs" />
+    <revision><id>103</id><text>#REDIRECT [[Steve Jobs]]</text></revision>
+  </page>
+  <page>
+    <title>Python</title>
+    <ns>0</ns>
+    <id>4</id>
+    <revision><id>104</id><text>'''Python''' é uma [[linguagem de programação|linguagem]].</text></revision>
+  </page>
+</mediawiki>
+"""
+
+
+@pytest.fixture
+def dump_path(tmp_path) -> str:
+    path = tmp_path / "ptwiki-pages-articles.xml.bz2"
+    path.write_bytes(bz2.compress(DUMP.encode("utf-8")))
+
+    return str(path)
+
+
+@pytest.fixture
+def saved_batches(monkeypatch) -> list:
+    batches: list = []
+
+    async def _fake_save_batch(pages, texts, word_count=None) -> tuple[int, list]:
+        batches.append([(page.slug, page.redirect, text) for page, text in zip(pages, texts)])
+        return sum(1 for page in pages if page.redirect is None), []
+
+    monkeypatch.setattr(ingest, "save_batch", _fake_save_batch)
+
+    return batches
+
+
+class FakeSession:
+    def __init__(self, saved_slugs: set[str]) -> None:
+        self.saved_slugs = saved_slugs
+        self.statements: list = []
+        self.commits = 0
+
+    async def scalars(self, statement) -> set[str]:
+        return self.saved_slugs
+
+    async def execute(self, statement) -> None:
+        self.statements.append(statement)
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+    async def __aenter__(self) -> "FakeSession":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+
+def test_iter_dump_pages_streams_main_namespace(dump_path) -> None:
+    pages = list(ingest.iter_dump_pages(dump_path))
+
+    assert [(page.slug, page.title, page.redirect) for page in pages] == [
+        ("steve_jobs", "Steve Jobs", None),
+        ("steven_paul_jobs", "Steven Paul Jobs", "Steve Jobs"),
+        ("python", "Python", None),
+    ]
+    assert pages[0].revision_id == 101
+
+
+def test_iter_terms_skips_blanks_and_comments(tmp_path) -> None:
+    path = tmp_path / "terms.txt"
+    path.write_text("Steve Jobs\n\n# comentario\n  Python  \n", encoding="utf-8")
+
+    assert list(ingest.iter_terms(str(path))) == ["Steve Jobs", "Python"]
+
+
+@pytest.mark.asyncio
+async def test_ingest_dump_cleans_saves_and_checkpoints(dump_path, saved_batches) -> None:
+    checkpoint = ingest.Checkpoint(f"{dump_path}.checkpoint")
+
+    created = await ingest.ingest("dump", dump_path, checkpoint, batch_size=2)
+
+    assert created == 2
+    assert checkpoint.load() == 3
+    assert saved_batches == [
+        [("steve_jobs", None, "Steven Paul Jobs foi um empresário."), ("steven_paul_jobs", "Steve Jobs", "")],
+        [("python", None, "Python é uma linguagem.")],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_ingest_resumes_from_checkpoint(dump_path, saved_batches) -> None:
+    checkpoint = ingest.Checkpoint(f"{dump_path}.checkpoint")
+    checkpoint.save(2)
+
+    await ingest.ingest("dump", dump_path, checkpoint)
+
+    assert [[slug for slug, _, _ in batch] for batch in saved_batches] == [["python"]]
+    assert checkpoint.load() == 3
+
+
+@pytest.mark.asyncio
+async def test_save_redirects_returns_the_ones_without_target() -> None:
+    session = FakeSession({"steve_jobs"})
+
+    unresolved = await ingest.save_redirects(session, [("steven_paul_jobs", "steve_jobs"), ("jobs", "pixar")])
+
+    assert unresolved == [("jobs", "pixar")]
+    assert "INSERT INTO wiki_article_alias" in str(session.statements[0])
+
+
+@pytest.mark.asyncio
+async def test_redirects_before_their_target_are_saved_in_a_final_pass(dump_path, monkeypatch) -> None:
+    # The redirect is in the first batch, its target only in the second.
+    dump = DUMP.replace("<title>Steve Jobs</title>", "<title>Steve Jobs (1)</title>").replace(
+        "</mediawiki>",
+        "<page><title>Steve Jobs</title><ns>0</ns><id>5</id><revision><id>105</id><text>Fundador.</text></revision></page></mediawiki>",
+    )
+    with bz2.open(dump_path, "wt", encoding="utf-8") as f:
+        f.write(dump)
+
+    saved: set[str] = set()
+    calls: list = []
+    save_redirects = ingest.save_redirects
+
+    async def _fake_save_articles(session, articles):
+        saved.update(articles)
+        return {slug: (1, True) for slug in articles}
+
+    async def _recording_save_redirects(session, redirects):
+        unresolved = await save_redirects(session, redirects)
+        calls.append((redirects, unresolved))
+        return unresolved
+
+    monkeypatch.setattr(ingest, "save_articles", _fake_save_articles)
+    monkeypatch.setattr(ingest, "save_redirects", _recording_save_redirects)
+    monkeypatch.setattr(ingest, "AsyncSessionLocal", lambda: FakeSession(set(saved)))
+    checkpoint = ingest.Checkpoint(f"{dump_path}.checkpoint")
+
+    await ingest.ingest("dump", dump_path, checkpoint, batch_size=2)
+
+    redirect = ("steven_paul_jobs", "steve_jobs")
+    assert calls == [([redirect], [redirect]), ([], []), ([redirect], [])]
+    assert list(checkpoint.iter_redirects()) == []
+
+
+@pytest.mark.asyncio
+async def test_summary_jobs_are_queued_under_the_canonical_title(monkeypatch) -> None:
+    session = FakeSession(set())
+
+    async def _fake_save_articles(session, articles):
+        return {slug: (1, True) for slug in articles}
+
+    monkeypatch.setattr(ingest, "save_articles", _fake_save_articles)
+    monkeypatch.setattr(ingest, "AsyncSessionLocal", lambda: session)
+
+    pages = [ingest.Page("jobs", "Steve Jobs"), ingest.Page("teorema", "Teorema de Pitágoras")]
+    created, _ = await ingest.save_batch(pages, ["Fundador.", "Geometria."], word_count=100)
+
+    [jobs] = session.statements
+    params = jobs.compile().params
+    assert created == 2
+    assert [params["word_m0"], params["word_m1"]] == ["Steve Jobs", "Teorema de Pitágoras"]
+    assert [normalize_word(params[key]) for key in ("word_m0", "word_m1")] == ["Steve_Jobs", "Teorema_de_Pitágoras"]
+
+
+def test_cli_arguments() -> None:
+    args = ingest_cli.parse_args(["dump", "pages.xml.bz2", "--summaries", "150", "--workers", "0"])
+
+    assert (args.source, args.path, args.summaries, args.workers) == ("dump", "pages.xml.bz2", 150, 0)
+    assert args.checkpoint is None
@@ -24,6 +24,8 @@ def _require_env(*keys: str) -> None:
 
 def _ensure_db_ready() -> None:
     try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         Base.metadata.create_all(bind=engine)
         with engine.connect() as conn:
             conn.execute(text("SELECT 1"))
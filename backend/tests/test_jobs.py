@@ -0,0 +1,222 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+import main
+from main import app
+from schemas import WikiExtractorError, WikiExtractorResult
+from utils import jobs
+from utils.wiki_extractor import WikipediaTextExtractor
+
+
+def _job(attempts: int = 1) -> SimpleNamespace:
+    return SimpleNamespace(id="abc", word="Python", word_count=100, tolerance=None, derive=None, attempts=attempts)
+
+
+@pytest.fixture
+def updates(monkeypatch) -> list[dict]:
+    updates: list[dict] = []
+
+    async def _fake_update(job_id: str, **values) -> None:
+        updates.append(values)
+
+    monkeypatch.setattr(jobs, "update_job", _fake_update)
+
+    return updates
+
+
+def _fake_extract(monkeypatch, outcome) -> None:
+    async def _extract(self: WikipediaTextExtractor):
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(WikipediaTextExtractor, "extract", _extract)
+
+
+@pytest.mark.asyncio
+async def test_run_job_records_summary(monkeypatch, updates) -> None:
+    _fake_extract(monkeypatch, WikiExtractorResult(word="Python", url="http://wiki/Python", summary="resumo"))
+
+    await jobs.run_job(_job())
+
+    assert updates == [{"status": "done", "url": "http://wiki/Python", "summary_text": "resumo", "locked_at": None}]
+
+
+@pytest.mark.asyncio
+async def test_run_job_missing_page_is_final(monkeypatch, updates) -> None:
+    _fake_extract(monkeypatch, WikiExtractorError(word="Nada", url="http://wiki/Nada", message="não encontrada"))
+
+    await jobs.run_job(_job())
+
+    assert updates[0]["status"] == "failed"
+    assert updates[0]["error"] == "não encontrada"
+
+
+@pytest.mark.asyncio
+async def test_run_job_retries_then_fails(monkeypatch, updates) -> None:
+    _fake_extract(monkeypatch, RuntimeError("LLM down"))
+
+    await jobs.run_job(_job(attempts=1))
+    await jobs.run_job(_job(attempts=jobs.JOB_MAX_ATTEMPTS))
+
+    retry, final = updates
+    assert retry["status"] == "queued"
+    assert "run_after" in retry
+    assert final["status"] == "failed"
+    assert final["error"] == jobs.JOB_FAILED_MESSAGE
+
+
+@pytest.mark.asyncio
+async def test_pool_requeues_jobs_cut_short_by_shutdown(monkeypatch, updates) -> None:
+    queue = [_job(attempts=1)]
+    started = asyncio.Event()
+
+    async def _fake_claim():
+        return queue.pop() if queue else None
+
+    async def _slow_extract(self: WikipediaTextExtractor):
+        started.set()
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(jobs, "claim_job", _fake_claim)
+    monkeypatch.setattr(WikipediaTextExtractor, "extract", _slow_extract)
+
+    pool = jobs.JobWorkerPool(workers=2)
+    pool.start()
+    await asyncio.wait_for(started.wait(), 1)
+    await pool.stop(timeout=0.01)
+
+    assert updates == [{"status": "queued", "attempts": 0, "locked_at": None}]
+
+
+@pytest.mark.asyncio
+async def test_pool_worker_survives_a_failing_update(monkeypatch) -> None:
+    queue = [SimpleNamespace(**{**vars(_job()), "id": job_id}) for job_id in ("second", "first")]
+    recorded: list[str] = []
+    done = asyncio.Event()
+
+    async def _fake_claim():
+        return queue.pop() if queue else None
+
+    async def _flaky_update(job_id: str, **values) -> None:
+        if job_id == "first":
+            raise RuntimeError("database down")
+        recorded.append(job_id)
+        done.set()
+
+    monkeypatch.setattr(jobs, "claim_job", _fake_claim)
+    monkeypatch.setattr(jobs, "update_job", _flaky_update)
+    _fake_extract(monkeypatch, WikiExtractorResult(word="Python", url="http://wiki/Python", summary="resumo"))
+
+    pool = jobs.JobWorkerPool(workers=1)
+    pool.start()
+    await asyncio.wait_for(done.wait(), 1)
+    await pool.stop(timeout=0.01)
+
+    assert recorded == ["second"]
+    assert pool.busy == 0
+
+
+@pytest.mark.asyncio
+async def test_claim_job_skips_locked_jobs(monkeypatch) -> None:
+    statements: list = []
+
+    class _Session:
+        async def execute(self, statement):
+            statements.append(statement)
+            return SimpleNamespace(first=lambda: None)
+
+        async def commit(self) -> None:
+            pass
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc) -> None:
+            return None
+
+    monkeypatch.setattr(jobs, "AsyncSessionLocal", _Session)
+
+    assert await jobs.claim_job() is None
+
+    sql = str(statements[1].compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "attempts=(wiki_summary_job.attempts + %(attempts_1)s)" in sql
+
+
+@pytest.mark.asyncio
+async def test_claim_job_fails_expired_jobs_out_of_attempts(monkeypatch) -> None:
+    # One job, running with an expired lease and every attempt spent.
+    job = {"status": "running", "locked_at": "expired", "attempts": jobs.JOB_MAX_ATTEMPTS}
+    statements: list = []
+
+    class _Session:
+        async def execute(self, statement):
+            statements.append(statement)
+            params = statement.compile().params
+            sql = str(statement.compile(dialect=postgresql.dialect()))
+
+            if "wiki_summary_job.attempts >= " in sql and job["attempts"] >= params["attempts_1"]:
+                job.update(status=params["status"], locked_at=None)
+                return SimpleNamespace(first=lambda: None)
+
+            # The claim: reclaims an expired job only below the max attempts.
+            claimable = job["status"] == "running" and job["attempts"] < jobs.JOB_MAX_ATTEMPTS
+            assert "wiki_summary_job.attempts < " in sql
+            return SimpleNamespace(first=lambda: SimpleNamespace(id="abc") if claimable else None)
+
+        async def commit(self) -> None:
+            pass
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc) -> None:
+            return None
+
+    monkeypatch.setattr(jobs, "AsyncSessionLocal", _Session)
+
+    assert await jobs.claim_job() is None
+    assert job == {"status": "failed", "locked_at": None, "attempts": jobs.JOB_MAX_ATTEMPTS}
+
+    fail = statements[0].compile().params
+    assert fail["error"] == jobs.JOB_FAILED_MESSAGE
+
+
+def _saved_job(**values) -> SimpleNamespace:
+    now = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+    job = dict(id="abc", status="queued", word="Python", word_count=150, attempts=0,
+               url=None, summary_text=None, error=None, created_at=now, updated_at=now)
+
+    return SimpleNamespace(**{**job, **values})
+
+
+def test_job_endpoints(monkeypatch) -> None:
+    async def _fake_enqueue(word, word_count, tolerance, derive):
+        return _saved_job(word=word, word_count=word_count)
+
+    async def _fake_get(job_id: str):
+        if job_id == "abc":
+            return _saved_job(status="done", attempts=1, url="http://wiki/Python", summary_text="resumo")
+        return None
+
+    monkeypatch.setattr(main, "enqueue_job", _fake_enqueue)
+    monkeypatch.setattr(main, "get_job", _fake_get)
+    client = TestClient(app)
+
+    resp = client.post("/summarize/jobs", params={"word": "Python"})
+
+    assert resp.status_code == 202
+    assert resp.headers["location"] == "/summarize/jobs/abc"
+    assert resp.json()["status"] == "queued"
+    assert resp.json()["result"] is None
+
+    resp = client.get("/summarize/jobs/abc")
+
+    assert resp.json()["result"] == {"word": "Python", "url": "http://wiki/Python", "summary": "resumo"}
+    assert client.get("/summarize/jobs/nope").status_code == 404
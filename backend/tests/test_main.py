@@ -1,6 +1,17 @@
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
 from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
 
+import main
+from db import get_db
+from schemas import WikiExtractorError, WikiExtractorResult
 from main import app
+from utils.article_text import compress_text
+from utils.pagination import decode_cursor, encode_cursor
+from utils.response_cache import invalidate_words
 from utils.wiki_extractor import WikipediaTextExtractor
 
 
@@ -12,6 +23,24 @@ def test_health_endpoint() -> None:
     assert resp.status_code == 200
     assert resp.json() == {"status": "ok"}
 
+def test_health_llm_endpoint() -> None:
+    client = TestClient(app)
+
+    resp = client.get("/health/llm")
+
+    assert resp.status_code == 200
+    assert resp.json()["queue_depth"] == 0
+    assert "avg_wait_seconds" in resp.json()
+
+def test_health_cache_endpoint() -> None:
+    client = TestClient(app)
+
+    resp = client.get("/health/cache")
+
+    assert resp.status_code == 200
+    assert resp.json()["hits"] == 0
+    assert resp.json()["entries"] == 0
+
 def test_summarize_endpoint(fake_extractor_extract) -> None:
     client = TestClient(app)
 
@@ -23,3 +52,334 @@ def test_summarize_endpoint(fake_extractor_extract) -> None:
         "url": "http://example.com/wiki/Test",
         "summary": "ok",
     }
+
+
+def test_summarize_serves_cached_bytes_with_etag(monkeypatch) -> None:
+    calls: list[str] = []
+
+    async def _fake_extract(self: WikipediaTextExtractor) -> WikiExtractorResult:
+        calls.append(self.word)
+        return WikiExtractorResult(word=self.word, url=self.url, summary=f"resumo {len(calls)}")
+
+    monkeypatch.setattr(WikipediaTextExtractor, "extract", _fake_extract)
+    client = TestClient(app)
+
+    first = client.get("/summarize", params={"word": "Steve Jobs", "word_count": 10})
+    second = client.get("/summarize", params={"word": "Steve Jobs", "word_count": 10})
+
+    assert calls == ["Steve Jobs"]
+    assert second.content == first.content
+    assert second.json()["summary"] == "resumo 1"
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.headers["cache-control"] == "public, max-age=60"
+
+    not_modified = client.get(
+        "/summarize",
+        params={"word": "Steve Jobs", "word_count": 10},
+        headers={"If-None-Match": f'W/{first.headers["etag"]}'},
+    )
+
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == first.headers["etag"]
+
+    # A new summary of the term drops its cached responses.
+    invalidate_words(["steve_jobs"])
+    changed = client.get(
+        "/summarize",
+        params={"word": "Steve Jobs", "word_count": 10},
+        headers={"If-None-Match": first.headers["etag"]},
+    )
+
+    assert changed.status_code == 200
+    assert changed.json()["summary"] == "resumo 2"
+    assert changed.headers["etag"] != first.headers["etag"]
+
+
+def test_summarize_does_not_cache_errors(monkeypatch) -> None:
+    calls: list[str] = []
+
+    async def _fake_extract(self: WikipediaTextExtractor) -> WikiExtractorError:
+        calls.append(self.word)
+        return WikiExtractorError(word=self.word, url=self.url, message="Página não encontrada.")
+
+    monkeypatch.setattr(WikipediaTextExtractor, "extract", _fake_extract)
+    client = TestClient(app)
+
+    for _ in range(2):
+        resp = client.get("/summarize", params={"word": "Inexistente", "word_count": 10})
+        assert resp.json()["message"] == "Página não encontrada."
+        assert "etag" not in resp.headers
+
+    assert len(calls) == 2
+
+
+class FakeScalarResult:
+    def __init__(self, rows: list) -> None:
+        self.rows = rows
+
+    def all(self) -> list:
+        return self.rows
+
+
+class FakeStreamResult:
+    def __init__(self, rows: list) -> None:
+        self.rows = rows
+
+    async def partitions(self):
+        for i in range(0, len(self.rows), 2):
+            yield self.rows[i:i + 2]
+
+
+class FakeSession:
+    def __init__(self, rows: list) -> None:
+        self.rows = rows
+        self.queries: list = []
+
+    async def scalars(self, query) -> FakeScalarResult:
+        self.queries.append(query)
+        return FakeScalarResult(self.rows)
+
+    async def execute(self, query) -> FakeScalarResult:
+        self.queries.append(query)
+        return FakeScalarResult(self.rows)
+
+    async def stream(self, query) -> FakeStreamResult:
+        self.queries.append(query)
+        return FakeStreamResult(self.rows)
+
+    async def __aenter__(self) -> "FakeSession":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+
+def _fake_summary(word: str, word_count: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        article=SimpleNamespace(word=word),
+        word_count=word_count,
+        summary_text=f"resumo {word}",
+        created_at=datetime(2024, 1, 1, 12, tzinfo=timezone.utc),
+        derived_from=None,
+        stale=False,
+    )
+
+
+def test_summary_word_database_uses_async_session() -> None:
+    async def _fake_db():
+        yield FakeSession([_fake_summary("Steve_Jobs", 140)])
+
+    app.dependency_overrides[get_db] = _fake_db
+    try:
+        client = TestClient(app)
+        resp = client.get("/summary/database/Steve Jobs")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "summaries": [
+            {
+                "word": "Steve_Jobs",
+                "word_count": 140,
+                "summary": "resumo Steve_Jobs",
+                "created_at": "2024-01-01T12:00:00+00:00",
+                "derived_from_word_count": None,
+                "stale": False,
+            }
+        ]
+    }
+
+
+def test_summary_word_database_is_cached_until_a_summary_is_saved() -> None:
+    sessions: list[FakeSession] = []
+
+    async def _fake_db():
+        session = FakeSession([_fake_summary("Steve_Jobs", 140)])
+        sessions.append(session)
+        yield session
+
+    app.dependency_overrides[get_db] = _fake_db
+    try:
+        client = TestClient(app)
+        first = client.get("/summary/database/Steve Jobs")
+        not_modified = client.get("/summary/database/steve_jobs", headers={"If-None-Match": first.headers["etag"]})
+        invalidate_words(["steve_jobs"])
+        after_save = client.get("/summary/database/Steve Jobs")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert not_modified.status_code == 304
+    assert [len(session.queries) for session in sessions] == [1, 0, 1]
+    assert after_save.json() == first.json()
+
+
+def test_summarize_stream_endpoint(monkeypatch) -> None:
+    async def _fake_stream_summary(self: WikipediaTextExtractor):
+        self.summary_text = "Olá mundo"
+        for chunk in ["Olá", " mundo"]:
+            yield chunk
+
+    monkeypatch.setattr(WikipediaTextExtractor, "stream_summary", _fake_stream_summary)
+
+    client = TestClient(app)
+    resp = client.get("/summarize/stream", params={"word": "Test", "word_count": 10})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+
+    events = [block.split("\n") for block in resp.text.strip().split("\n\n")]
+    assert [lines[0] for lines in events] == [
+        "event: start",
+        "event: token",
+        "event: token",
+        "event: done",
+    ]
+    assert events[1][1] == 'data: {"text": "Olá"}'
+    assert json.loads(events[-1][1].removeprefix("data: ")) == {
+        "word": "Test",
+        "url": "https://pt.wikipedia.org/wiki/Test",
+        "summary": "Olá mundo",
+    }
+
+
+def _fake_row(word: str, summary_id: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        word=word,
+        id=summary_id,
+        word_count=100 + summary_id,
+        created_at=datetime(2024, 1, 1, 12, tzinfo=timezone.utc),
+    )
+
+
+def test_summary_database_returns_page_and_cursor() -> None:
+    session = FakeSession([_fake_row("Python", 1), _fake_row("Python", 2), _fake_row("Steve_Jobs", 3)])
+
+    async def _fake_db():
+        yield session
+
+    app.dependency_overrides[get_db] = _fake_db
+    try:
+        client = TestClient(app)
+        resp = client.get("/summary/database", params={"limit": 2})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [item["word_count"] for item in data["summaries"]] == [101, 102]
+    assert decode_cursor(data["next_cursor"]) == ("Python", 2)
+    assert "LIMIT" in str(session.queries[0])
+
+
+def test_summary_database_rejects_bad_cursor() -> None:
+    client = TestClient(app)
+
+    resp = client.get("/summary/database", params={"cursor": "not-a-cursor"})
+
+    assert resp.status_code == 400
+
+
+def test_summary_database_streams_ndjson(monkeypatch) -> None:
+    session = FakeSession([_fake_row("Python", 1), _fake_row("Python", 2), _fake_row("Steve_Jobs", 3)])
+    monkeypatch.setattr(main, "AsyncSessionLocal", lambda: session)
+
+    async def _fake_db():
+        yield session
+
+    app.dependency_overrides[get_db] = _fake_db
+    try:
+        client = TestClient(app)
+        resp = client.get("/summary/database", params={"format": "ndjson", "cursor": encode_cursor("A", 1)})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["word"] for line in lines] == ["Python", "Python", "Steve_Jobs"]
+    assert "wiki_article.word, wiki_summary.id) >" in str(session.queries[0])
+
+
+def test_admin_purge_missing_pages(monkeypatch) -> None:
+    purged: list = []
+
+    async def _fake_purge(word_slug=None):
+        purged.append(word_slug)
+        return 1
+
+    monkeypatch.setattr(main, "purge_missing", _fake_purge)
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "segredo")
+    client = TestClient(app)
+
+    assert client.delete("/admin/missing-pages").status_code == 403
+
+    resp = client.delete("/admin/missing-pages", params={"word": "palavra inexistente"}, headers={"X-Admin-Token": "segredo"})
+
+    assert resp.status_code == 200
+    assert resp.json() == {"purged": 1}
+    assert purged == ["palavra_inexistente"]
+
+
+def test_admin_endpoints_are_disabled_without_token(monkeypatch) -> None:
+    async def _unexpected(word_slug=None):
+        raise AssertionError("should not purge")
+
+    monkeypatch.setattr(main, "purge_missing", _unexpected)
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    client = TestClient(app)
+
+    assert client.delete("/admin/missing-pages").status_code == 403
+    assert client.delete("/admin/missing-pages", headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def _fake_hit(word: str, rank: float) -> SimpleNamespace:
+    # Saved compressed, except Pixar, saved as plain text before compression.
+    if word == "Pixar":
+        return SimpleNamespace(word=word, rank=rank, clean_text=f"texto {word}", text_zstd=None, summary_snippet=None)
+
+    return SimpleNamespace(word=word, rank=rank, clean_text=None, text_zstd=compress_text(f"texto {word}"), summary_snippet=None)
+
+
+class FakeSearchSession(FakeSession):
+    async def scalars(self, query) -> FakeScalarResult:
+        self.queries.append(query)
+        texts = query.compile().params["param_1"]
+        return FakeScalarResult([f"<b>{text}</b>" for text in texts])
+
+
+def test_search_returns_ranked_page_and_next_offset() -> None:
+    session = FakeSearchSession([_fake_hit("Steve_Jobs", 0.9), _fake_hit("Pixar", 0.5), _fake_hit("Apple_Inc.", 0.1)])
+
+    async def _fake_db():
+        yield session
+
+    app.dependency_overrides[get_db] = _fake_db
+    try:
+        client = TestClient(app)
+        resp = client.get("/search", params={"q": "fundador da apple", "limit": 2})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [hit["word"] for hit in data["results"]] == ["Steve_Jobs", "Pixar"]
+    assert [hit["snippet"] for hit in data["results"]] == ["<b>texto Steve_Jobs</b>", "<b>texto Pixar</b>"]
+    assert data["results"][0]["url"] == "https://pt.wikipedia.org/wiki/Steve_Jobs"
+    assert data["next_offset"] == 2
+
+    search, headlines = session.queries
+    sql = str(search.compile(dialect=postgresql.dialect()))
+    assert "websearch_to_tsquery('portuguese'::regconfig" in sql
+    assert "wiki_article.search_vector @@" in sql
+    assert "wiki_summary.search_vector @@" in sql
+    assert "wiki_article.word %%" in sql
+    assert "wiki_article.text_zstd" in sql
+    assert "ts_headline(" in str(headlines.compile(dialect=postgresql.dialect()))
+
+
+def test_search_requires_query() -> None:
+    client = TestClient(app)
+
+    assert client.get("/search", params={"q": ""}).status_code == 422
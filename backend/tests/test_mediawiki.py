@@ -0,0 +1,144 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import pytest_asyncio
+
+from utils import http_client as http_client_module
+from utils import mediawiki
+from utils.wiki_extractor import WikipediaPageNotFoundError, WikipediaTextExtractor
+
+RESPONSES = json.loads((Path(__file__).parent / "fixtures" / "mediawiki" / "responses.json").read_text())
+
+
+@pytest_asyncio.fixture
+async def wiki_api(monkeypatch):
+    """
+    Local stand-in for the action API, replaying the recorded responses.
+    """
+    requests: list[dict[str, str]] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+            requests.append(params)
+
+            for recorded in RESPONSES:
+                if recorded["titles"] == params.get("titles") and recorded["excontinue"] == params.get("excontinue"):
+                    body, status = json.dumps(recorded["response"]).encode(), 200
+                    break
+            else:
+                body, status = b'{"error": {"code": "unrecorded"}}', 404
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(mediawiki, "WIKI_API_URL", f"http://127.0.0.1:{server.server_port}/w/api.php")
+
+    yield requests
+
+    await http_client_module.close_http_client()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_extracts_resolves_a_batch(wiki_api) -> None:
+    titles = ["steve jobs", "Python", "Casa_De_Papel", "Palavra Inexistente"]
+
+    extracts = await mediawiki.fetch_extracts(titles)
+
+    assert list(extracts) == titles
+    assert extracts["steve jobs"].title == "Steve Jobs"
+    assert extracts["steve jobs"].text.startswith("Steven Paul Jobs")
+    assert extracts["Python"].text.startswith("Python e uma linguagem")
+    assert extracts["Casa_De_Papel"].title == "La casa de papel"
+    assert extracts["Casa_De_Papel"].revision_id == 67000042
+    assert extracts["Palavra Inexistente"] is None
+
+    # One query resolves the batch, then the pages it has no text for are fetched one each.
+    assert wiki_api[0]["titles"] == "|".join(titles)
+    assert sorted(r["titles"] for r in wiki_api[1:]) == ["La casa de papel", "Python"]
+    assert not any("excontinue" in r for r in wiki_api)
+    assert wiki_api[0]["redirects"] == "1"
+    assert wiki_api[0]["explaintext"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_fetch_extracts_queries_pages_concurrently(wiki_api, monkeypatch) -> None:
+    in_flight = max_in_flight = 0
+    query = mediawiki._query
+
+    async def _counting_query(params: dict) -> dict:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        try:
+            await asyncio.sleep(0.05)
+            return await query(params)
+        finally:
+            in_flight -= 1
+
+    monkeypatch.setattr(mediawiki, "_query", _counting_query)
+
+    extracts = await mediawiki.fetch_extracts(["steve jobs", "Python", "Casa_De_Papel", "Palavra Inexistente"])
+
+    assert extracts["Python"].text.startswith("Python e uma linguagem")
+    assert max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_iter_extracts_yields_each_page_when_fetched(wiki_api) -> None:
+    titles = ["steve jobs", "Python", "Casa_De_Papel", "Palavra Inexistente"]
+
+    yielded = [title async for title, _ in mediawiki.iter_extracts(titles)]
+
+    # Resolved by the batch query first, then the pages fetched on their own.
+    assert sorted(yielded[:2]) == ["Palavra Inexistente", "steve jobs"]
+    assert sorted(yielded[2:]) == ["Casa_De_Papel", "Python"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_extracts_splits_large_batches(wiki_api, monkeypatch) -> None:
+    monkeypatch.setattr(mediawiki, "WIKI_API_BATCH_SIZE", 1)
+
+    extracts = await mediawiki.fetch_extracts(["Python", "Palavra Inexistente", "Python"])
+
+    assert list(extracts) == ["Python", "Palavra Inexistente"]
+    assert [r["titles"] for r in wiki_api] == ["Python", "Palavra Inexistente"]
+
+
+@pytest.mark.asyncio
+async def test_extractor_uses_api_backend(wiki_api, monkeypatch) -> None:
+    monkeypatch.setattr(mediawiki, "WIKI_FETCH_BACKEND", "api")
+
+    extractor = WikipediaTextExtractor("Python")
+    await extractor.fecth_article()
+    await extractor.text_cleaner_async()
+
+    assert extractor.canonical_title == "Python"
+    assert extractor.clean_text == (
+        "Python e uma linguagem de programacao de alto nivel.\n\nCriada por Guido van Rossum."
+    )
+
+
+@pytest.mark.asyncio
+async def test_extractor_api_backend_missing_page(wiki_api, monkeypatch) -> None:
+    monkeypatch.setattr(mediawiki, "WIKI_FETCH_BACKEND", "api")
+
+    with pytest.raises(WikipediaPageNotFoundError):
+        await WikipediaTextExtractor("Palavra Inexistente").fecth_article()
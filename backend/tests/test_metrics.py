@@ -0,0 +1,52 @@
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from main import app
+from utils import metrics
+from utils import wiki_extractor as wiki_extractor_module
+from utils.wiki_extractor import WikipediaTextExtractor
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_timed_observes_stage_even_when_it_raises() -> None:
+    before = _sample("wiki_stage_duration_seconds_count", stage="fetch")
+
+    with pytest.raises(RuntimeError):
+        with metrics.timed("fetch"):
+            raise RuntimeError("boom")
+
+    assert _sample("wiki_stage_duration_seconds_count", stage="fetch") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_extract_records_outcome() -> None:
+    wiki_extractor_module.summary_cache.set(("steve_jobs", 140), "resumo")
+    before = _sample("wiki_summary_duration_seconds_count", outcome="cache_hit")
+
+    await WikipediaTextExtractor("Steve Jobs", word_count=140).extract()
+
+    assert _sample("wiki_summary_duration_seconds_count", outcome="cache_hit") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_extract_records_not_found(monkeypatch) -> None:
+    monkeypatch.setattr(wiki_extractor_module, "is_known_missing", lambda word_slug: True)
+    before = _sample("wiki_summary_duration_seconds_count", outcome="not_found")
+
+    await WikipediaTextExtractor("Palavra Inexistente").extract()
+
+    assert _sample("wiki_summary_duration_seconds_count", outcome="not_found") == before + 1
+
+
+def test_metrics_endpoint() -> None:
+    resp = TestClient(app).get("/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert "wiki_stage_duration_seconds_bucket" in resp.text
+    assert "wiki_llm_queue_depth" in resp.text
+    assert "wiki_db_pool_checked_out" in resp.text
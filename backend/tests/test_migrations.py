@@ -0,0 +1,82 @@
+import importlib.util
+import io
+import re
+from pathlib import Path
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from models import Base
+
+VERSIONS_DIR = Path(__file__).resolve().parent.parent / "migrations" / "versions"
+
+
+def _load(path: Path):
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _upgrade_sql(glob: str = "[0-9]*.py") -> str:
+    # The SQL of the migrations, in order, as `alembic upgrade head --sql` prints it.
+    buffer = io.StringIO()
+    context = MigrationContext.configure(dialect_name="postgresql", opts={"as_sql": True, "output_buffer": buffer})
+
+    with Operations.context(context):
+        for path in sorted(VERSIONS_DIR.glob(glob)):
+            _load(path).upgrade()
+
+    return buffer.getvalue()
+
+
+def _columns(sql: str) -> dict[str, set[str]]:
+    columns: dict[str, set[str]] = {}
+
+    for table, body in re.findall(r"CREATE TABLE (?:IF NOT EXISTS )?(\w+) \((.*?)\n\);", sql, re.S):
+        columns[table] = {line.split()[0] for line in body.strip().splitlines() if not line.split()[0].isupper()}
+
+    for table, column in re.findall(r"ALTER TABLE (\w+) ADD COLUMN (?:IF NOT EXISTS )?(\w+)", sql):
+        columns[table].add(column)
+
+    return columns
+
+
+def test_migrations_create_the_models_schema() -> None:
+    sql = _upgrade_sql()
+
+    assert _columns(sql) == {table.name: {column.name for column in table.columns} for table in Base.metadata.sorted_tables}
+    assert set(re.findall(r"CREATE INDEX (?:IF NOT EXISTS )?(\w+)", sql)) == {
+        index.name for table in Base.metadata.sorted_tables for index in table.indexes
+    }
+
+
+def test_baseline_is_the_schema_created_before_migrations() -> None:
+    # What Base.metadata.create_all created in the first versions of the API.
+    assert _columns(_upgrade_sql("0001_*.py")) == {
+        "wiki_article": {"id", "word", "word_slug", "clean_text", "created_at", "updated_at"},
+        "wiki_summary": {"id", "article_id", "word_count", "summary_text", "created_at", "updated_at"},
+    }
+
+
+def test_databases_created_before_migrations_are_upgraded_in_place() -> None:
+    # Any part of 0001/0002 may already exist in a database created by create_all,
+    # so `alembic upgrade head` must skip it instead of failing.
+    sql = _upgrade_sql("000[12]_*.py")
+    statements = [statement.strip() for statement in re.split(r";\n\n(?=\S|$)", sql) if statement.strip()]
+
+    for statement in statements:
+        if statement.startswith(("CREATE TABLE", "CREATE INDEX", "ALTER TABLE")):
+            assert "IF NOT EXISTS" in statement.splitlines()[0], statement
+        elif statement.startswith("DO $$"):
+            assert "IF NOT EXISTS (SELECT 1 FROM pg_constraint" in statement
+        else:
+            assert statement == "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+
+
+def test_compressed_text_migration_alters_article_columns_in_place() -> None:
+    sql = _upgrade_sql()
+
+    assert "ALTER TABLE wiki_article ALTER COLUMN search_vector DROP EXPRESSION" in sql
+    assert "ALTER TABLE wiki_article ALTER COLUMN clean_text DROP NOT NULL" in sql
+    assert "ALTER TABLE wiki_article ALTER COLUMN text_zstd SET STORAGE EXTERNAL" in sql
@@ -0,0 +1,25 @@
+import pytest
+
+from utils.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip() -> None:
+    cursor = encode_cursor("Casa_de_Papel", 42)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == ("Casa_de_Papel", 42)
+
+
+def test_cursor_keeps_non_ascii_words() -> None:
+    assert decode_cursor(encode_cursor("São_Paulo", 7)) == ("São_Paulo", 7)
+
+
+def test_empty_cursor_is_first_page() -> None:
+    assert decode_cursor(None) is None
+    assert decode_cursor("") is None
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor("x", 1)[:-2], "WyJ4IiwgIjEiXQ"])
+def test_invalid_cursor_raises(cursor: str) -> None:
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
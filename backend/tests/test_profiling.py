@@ -0,0 +1,87 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import main
+from utils import profiling
+from utils.profiling import ProfilingMiddleware, parse_allowlist
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/slow")
+    async def slow() -> dict:
+        await asyncio.sleep(0.01)
+        time.sleep(0.05)
+        return {"ok": True}
+
+    return app
+
+
+async def _get(app: FastAPI, client_ip: str, **kwargs) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app, client=(client_ip, 1234))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get("/slow", **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_profiling_is_off_without_allowlist(monkeypatch) -> None:
+    monkeypatch.setattr(profiling, "allowed_networks", [])
+
+    resp = await _get(_app(), "127.0.0.1", headers={"X-Profile": "1"})
+
+    assert resp.status_code == 200
+    assert "x-profile-id" not in resp.headers
+
+
+@pytest.mark.asyncio
+async def test_profiling_requires_allowlisted_client(monkeypatch) -> None:
+    monkeypatch.setattr(profiling, "allowed_networks", parse_allowlist("10.0.0.0/8"))
+
+    resp = await _get(_app(), "192.168.0.1", params={"profile": "1"})
+
+    assert "x-profile-id" not in resp.headers
+
+
+@pytest.mark.asyncio
+async def test_profiled_request_reports_blocking_callbacks(monkeypatch) -> None:
+    monkeypatch.setattr(profiling, "allowed_networks", parse_allowlist("127.0.0.1, 10.0.0.0/8"))
+
+    resp = await _get(_app(), "10.1.2.3", params={"profile": "1"})
+
+    assert resp.status_code == 200
+    report = json.loads(profiling.profile_reports.get(resp.headers["x-profile-id"]))
+
+    assert report["path"] == "/slow"
+    assert report["status"] == 200
+    assert report["wall_ms"] >= 60
+    assert report["loop_busy_ms"] >= 50
+    assert report["loop_busy_ms"] + report["loop_idle_ms"] == pytest.approx(report["wall_ms"], abs=0.01)
+    assert report["slow_callbacks"][0]["ms"] >= 50
+    assert "cumulative" in report["stats"]
+
+
+def test_admin_profile_endpoint(monkeypatch) -> None:
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "segredo")
+    profiling.profile_reports.set("abc", json.dumps({"profile_id": "abc", "wall_ms": 1.0}))
+    client = TestClient(main.app, headers={"X-Admin-Token": "segredo"})
+
+    assert client.get("/admin/profiles/abc").json() == {"profile_id": "abc", "wall_ms": 1.0}
+    assert client.get("/admin/profiles/missing").status_code == 404
+
+
+def test_admin_profile_requires_configured_token(monkeypatch) -> None:
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    profiling.profile_reports.set("abc", json.dumps({"profile_id": "abc", "path": "/summarize"}))
+    client = TestClient(main.app)
+
+    assert client.get("/admin/profiles/abc").status_code == 403
+    assert client.get("/admin/profiles/abc", headers={"X-Admin-Token": ""}).status_code == 403
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from utils.rate_limiter import ConcurrencyLimiter, LLMLimiter, TokenBucket
+
+
+def test_token_bucket_reserves_in_arrival_order() -> None:
+    bucket = TokenBucket(rate_per_minute=60, capacity=2)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+    assert bucket.reserve() == pytest.approx(2.0, abs=0.05)
+
+
+def test_token_bucket_clamps_oversized_requests() -> None:
+    bucket = TokenBucket(rate_per_minute=600, capacity=10)
+
+    assert bucket.reserve(50) == 0
+    assert bucket.reserve(1) == pytest.approx(0.1, abs=0.02)
+
+
+@pytest.mark.asyncio
+async def test_limiter_caps_concurrency_and_reports_queue() -> None:
+    limiter = LLMLimiter(max_concurrency=2)
+    in_flight = 0
+    max_in_flight = 0
+    queue_depths: list[int] = []
+
+    async def _call() -> None:
+        nonlocal in_flight, max_in_flight
+        async with limiter.slot():
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            queue_depths.append(limiter.queue_depth)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    await asyncio.gather(*[_call() for _ in range(6)])
+
+    stats = limiter.stats()
+    assert max_in_flight == 2
+    assert max(queue_depths) > 0
+    assert stats["completed"] == 6
+    assert stats["queue_depth"] == 0
+    assert stats["in_flight"] == 0
+    assert stats["max_wait_seconds"] > 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_applies_tokens_per_minute() -> None:
+    limiter = LLMLimiter(tokens_per_minute=6000)
+
+    async with limiter.slot(tokens=6000):
+        pass
+    async with limiter.slot(tokens=10):
+        pass
+
+    assert limiter.stats()["last_wait_seconds"] == pytest.approx(0.1, abs=0.05)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limiter_only_caps_concurrency() -> None:
+    limiter = ConcurrencyLimiter(max_concurrency=1)
+    order: list[str] = []
+
+    async def _call(name: str) -> None:
+        async with limiter.slot():
+            order.append(f"{name} start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name} end")
+
+    await asyncio.gather(_call("a"), _call("b"))
+
+    assert order == ["a start", "a end", "b start", "b end"]
+    assert "tokens_per_minute" not in limiter.stats()
+    assert limiter.stats()["completed"] == 2
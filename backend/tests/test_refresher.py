@@ -0,0 +1,190 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from utils import html_cleaner
+from utils.article_text import compress_text, decompress_text
+from utils import refresher
+from utils import wiki_extractor as wiki_extractor_module
+from utils.rate_limiter import TokenBucket
+from utils.response_cache import response_cache, serialize
+
+PAGE = '<script>RLCONF={"wgRevisionId":200};</script><div id="mw-content-text"><p>Texto novo.</p></div>'
+PAGE_WITHOUT_REVISION = '<div id="mw-content-text"><p>Texto novo.</p></div>'
+
+
+class FakeSession:
+    def __init__(self, rows: list | None = None, text_row: tuple | None = None, slugs: tuple = ()) -> None:
+        self.rows = rows or []
+        self.text_row = text_row
+        self.slugs = slugs
+        self.statements: list = []
+        self.committed = False
+
+    async def execute(self, statement) -> SimpleNamespace:
+        self.statements.append(statement)
+        return SimpleNamespace(all=lambda: self.rows, one_or_none=lambda: self.text_row)
+
+    async def scalars(self, statement) -> list:
+        self.statements.append(statement)
+        return list(self.slugs)
+
+    async def commit(self) -> None:
+        self.committed = True
+
+    async def __aenter__(self) -> "FakeSession":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def _row(revision_id: int | None = 100) -> SimpleNamespace:
+    return SimpleNamespace(id=1, word="Steve_Jobs", revision_id=revision_id, etag='"v1"', last_modified=None)
+
+
+@pytest.fixture
+def wikipedia(monkeypatch):
+    state = {"status": 200, "page": PAGE, "requests": []}
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        state["requests"].append(request)
+
+        if state["status"] == 304:
+            return httpx.Response(304)
+
+        return httpx.Response(200, text=state["page"], headers={"ETag": '"v2"'})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+    monkeypatch.setattr(wiki_extractor_module, "get_http_client", lambda: client)
+    monkeypatch.setattr(html_cleaner, "HTML_CLEANER_WORKERS", 0)
+
+    return state
+
+
+@pytest.fixture
+def session(monkeypatch) -> FakeSession:
+    session = FakeSession()
+    monkeypatch.setattr(refresher, "AsyncSessionLocal", lambda: session)
+
+    return session
+
+
+@pytest.mark.asyncio
+async def test_not_modified_only_keeps_the_claim(wikipedia, session) -> None:
+    wikipedia["status"] = 304
+
+    assert await refresher.refresh_article(_row()) is False
+
+    request = wikipedia["requests"][0]
+    assert str(request.url) == "https://pt.wikipedia.org/wiki/Steve_Jobs"
+    assert request.headers["If-None-Match"] == '"v1"'
+    assert session.statements == []
+
+
+@pytest.mark.asyncio
+async def test_new_revision_replaces_text_and_marks_summaries_stale(wikipedia, session) -> None:
+    assert await refresher.refresh_article(_row()) is True
+
+    article, summaries, _ = session.statements
+    assert article.compile().params["clean_text"] is None
+    assert decompress_text(article.compile().params["text_zstd"]) == "Texto novo."
+    assert "search_vector=(setweight(to_tsvector(" in _sql(article)
+    assert article.compile().params["revision_id"] == 200
+    assert article.compile().params["etag"] == '"v2"'
+    assert "SET stale" in _sql(summaries)
+    assert session.committed
+
+
+@pytest.mark.asyncio
+async def test_new_revision_drops_cached_summaries_of_every_slug(wikipedia, session) -> None:
+    session.slugs = ("steve_jobs", "steven_paul_jobs")
+    summary_cache = wiki_extractor_module.summary_cache
+
+    for slug in ("steve_jobs", "steven_paul_jobs", "pixar"):
+        summary_cache.set((slug, 100), "resumo antigo")
+        summary_cache.set((slug, 50), "resumo antigo")
+        response_cache.set(("database", slug), serialize({"summaries": []}))
+
+    assert await refresher.refresh_article(_row()) is True
+
+    assert "wiki_article_alias.article_id IN" in _sql(session.statements[-1])
+    for slug, kept in (("steve_jobs", False), ("steven_paul_jobs", False), ("pixar", True)):
+        assert (summary_cache.get((slug, 100)) is not None) is kept
+        assert (summary_cache.get((slug, 50)) is not None) is kept
+        assert (response_cache.get(("database", slug)) is not None) is kept
+
+
+@pytest.mark.asyncio
+async def test_same_revision_only_updates_validators(wikipedia, session) -> None:
+    assert await refresher.refresh_article(_row(revision_id=200)) is False
+
+    [article] = session.statements
+    assert "clean_text" not in article.compile().params
+    assert "text_zstd" not in article.compile().params
+    assert article.compile().params["etag"] == '"v2"'
+
+
+@pytest.mark.asyncio
+async def test_without_revision_ids_unchanged_text_only_updates_validators(wikipedia, session) -> None:
+    wikipedia["page"] = PAGE_WITHOUT_REVISION
+    session.text_row = (None, compress_text("Texto novo."))
+
+    assert await refresher.refresh_article(_row(revision_id=None)) is False
+
+    load, article = session.statements
+    assert "wiki_article.text_zstd" in _sql(load)
+    assert "text_zstd" not in article.compile().params
+    assert article.compile().params["etag"] == '"v2"'
+
+
+@pytest.mark.asyncio
+async def test_without_revision_ids_new_text_replaces_it(wikipedia, session) -> None:
+    wikipedia["page"] = PAGE_WITHOUT_REVISION
+    session.text_row = ("Texto antigo.", None)
+
+    assert await refresher.refresh_article(_row()) is True
+
+    load, article, summaries, _ = session.statements
+    assert decompress_text(article.compile().params["text_zstd"]) == "Texto novo."
+    assert article.compile().params["revision_id"] is None
+    assert "SET stale" in _sql(summaries)
+
+
+@pytest.mark.asyncio
+async def test_claim_skips_locked_rows(monkeypatch) -> None:
+    session = FakeSession(rows=[_row()])
+    monkeypatch.setattr(refresher, "AsyncSessionLocal", lambda: session)
+
+    assert await refresher.claim_stale_articles(10) == [_row()]
+
+    sql = _sql(session.statements[0])
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "ORDER BY wiki_article.checked_at" in sql
+    assert sql.startswith("UPDATE wiki_article SET checked_at=now()")
+
+
+@pytest.mark.asyncio
+async def test_refresh_round_keeps_going_after_failures(monkeypatch) -> None:
+    refreshed: list[str] = []
+
+    async def _fake_claim(limit: int) -> list:
+        return [SimpleNamespace(word="Quebrado"), SimpleNamespace(word="Python")]
+
+    async def _fake_refresh(row) -> bool:
+        if row.word == "Quebrado":
+            raise httpx.ConnectError("down")
+        refreshed.append(row.word)
+        return True
+
+    monkeypatch.setattr(refresher, "claim_stale_articles", _fake_claim)
+    monkeypatch.setattr(refresher, "refresh_article", _fake_refresh)
+
+    assert await refresher.refresh_stale_articles(TokenBucket(6000)) == 2
+    assert refreshed == ["Python"]
@@ -0,0 +1,191 @@
+import asyncio
+
+import pytest
+
+from utils import wiki_extractor as wiki_extractor_module
+from utils import single_flight
+from utils.single_flight import AdvisoryLockSingleFlight, SingleFlight, advisory_lock_id
+from utils.wiki_extractor import WikipediaPageNotFoundError, WikipediaTextExtractor
+
+
+@pytest.mark.asyncio
+async def test_single_flight_runs_once_per_key() -> None:
+    flight = SingleFlight()
+    calls = 0
+
+    async def _work() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "done"
+
+    results = await asyncio.gather(*[flight.do(("a", 1), _work) for _ in range(10)])
+
+    assert results == ["done"] * 10
+    assert calls == 1
+    assert not flight.in_flight(("a", 1))
+
+
+@pytest.mark.asyncio
+async def test_single_flight_keeps_keys_separate() -> None:
+    flight = SingleFlight()
+    calls: list[str] = []
+
+    def _work(key: str):
+        async def _run() -> str:
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+        return _run
+
+    results = await asyncio.gather(flight.do("a", _work("a")), flight.do("b", _work("b")))
+
+    assert results == ["a", "b"]
+    assert sorted(calls) == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_exception() -> None:
+    flight = SingleFlight()
+
+    async def _fail() -> None:
+        await asyncio.sleep(0.01)
+        raise WikipediaPageNotFoundError("missing")
+
+    results = await asyncio.gather(*[flight.do("k", _fail) for _ in range(3)], return_exceptions=True)
+
+    assert all(isinstance(result, WikipediaPageNotFoundError) for result in results)
+    assert not flight.in_flight("k")
+
+
+@pytest.mark.asyncio
+async def test_single_flight_survives_cancelled_leader() -> None:
+    flight = SingleFlight()
+
+    async def _work() -> str:
+        await asyncio.sleep(0.02)
+        return "done"
+
+    leader = asyncio.ensure_future(flight.do("k", _work))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flight.do("k", _work))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "done"
+
+
+def test_advisory_lock_id_is_stable_bigint() -> None:
+    lock_id = advisory_lock_id(("steve_jobs", 150))
+
+    assert lock_id == advisory_lock_id(("steve_jobs", 150))
+    assert lock_id != advisory_lock_id(("steve_jobs", 140))
+    assert -(2 ** 63) <= lock_id < 2 ** 63
+
+
+class FakeLockEngine:
+    """
+    Stand-in for db.lock_engine: every lock is free, connections are counted.
+    """
+
+    def __init__(self) -> None:
+        self.open = 0
+        self.max_open = 0
+        self.statements: list[str] = []
+
+    def connect(self) -> "FakeLockEngine":
+        return self
+
+    async def scalar(self, statement, params: dict) -> bool:
+        self.statements.append(str(statement))
+        return True
+
+    async def execute(self, statement, params: dict) -> None:
+        self.statements.append(str(statement))
+
+    async def __aenter__(self) -> "FakeLockEngine":
+        self.open += 1
+        self.max_open = max(self.max_open, self.open)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.open -= 1
+
+
+@pytest.mark.asyncio
+async def test_advisory_lock_holders_use_their_own_capped_connections(monkeypatch) -> None:
+    engine = FakeLockEngine()
+    monkeypatch.setattr(single_flight, "lock_engine", engine)
+    flight = AdvisoryLockSingleFlight(max_holders=2)
+
+    async def _work() -> str:
+        await asyncio.sleep(0.01)
+        return "done"
+
+    results = await asyncio.gather(*[flight.do(key, _work) for key in range(6)])
+
+    assert results == ["done"] * 6
+    assert engine.max_open == 2
+    assert engine.statements.count("SELECT pg_advisory_unlock(:id)") == 6
+
+
+@pytest.mark.asyncio
+async def test_extract_coalesces_concurrent_requests(monkeypatch) -> None:
+    monkeypatch.setattr(wiki_extractor_module, "summary_flight", SingleFlight())
+    calls = 0
+
+    async def _fake_load_summary(self: WikipediaTextExtractor) -> None:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        self.summary_text = "summary"
+
+    monkeypatch.setattr(WikipediaTextExtractor, "load_summary", _fake_load_summary)
+
+    extractors = [WikipediaTextExtractor("Steve Jobs", word_count=140) for _ in range(5)]
+    results = await asyncio.gather(*[extractor.extract() for extractor in extractors])
+
+    assert calls == 1
+    assert [result.summary for result in results] == ["summary"] * 5
+
+
+@pytest.mark.asyncio
+async def test_concurrent_streams_share_one_generation(monkeypatch) -> None:
+    monkeypatch.setattr(wiki_extractor_module, "summary_flight", SingleFlight())
+    generations = 0
+    saved: list[str] = []
+
+    async def _fake_lookup(self: WikipediaTextExtractor) -> None:
+        self.article, self.article_id, self.summary = object(), 1, None
+
+    async def _fake_load_article_text(self: WikipediaTextExtractor) -> None:
+        self.clean_text = "texto do artigo"
+
+    async def _fake_stream(text: str, word_count: int):
+        nonlocal generations
+        generations += 1
+        for chunk in ["um ", "dois"]:
+            await asyncio.sleep(0.01)
+            yield chunk
+
+    async def _fake_save_summary(self: WikipediaTextExtractor) -> None:
+        saved.append(self.summary_text)
+
+    monkeypatch.setattr(WikipediaTextExtractor, "lookup_summary", _fake_lookup)
+    monkeypatch.setattr(WikipediaTextExtractor, "load_article_text", _fake_load_article_text)
+    monkeypatch.setattr(WikipediaTextExtractor, "save_summary", _fake_save_summary)
+    monkeypatch.setattr(wiki_extractor_module, "text_summarizer_stream", _fake_stream)
+
+    async def _stream() -> list[str]:
+        return [chunk async for chunk in WikipediaTextExtractor("Steve Jobs", word_count=140).stream_summary()]
+
+    leader, *followers, result = await asyncio.gather(
+        *[_stream() for _ in range(4)],
+        WikipediaTextExtractor("Steve Jobs", word_count=140).extract(),
+    )
+
+    assert generations == 1
+    assert saved == ["um dois"]
+    assert leader == ["um ", "dois"]
+    assert followers == [["um dois"]] * 3
+    assert result.summary == "um dois"
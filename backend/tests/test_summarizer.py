@@ -1,6 +1,20 @@
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
 import pytest
 
 from utils import summarizer
+from utils.rate_limiter import LLMLimiter
+
+
+@pytest.fixture(autouse=True)
+def reset_llm(monkeypatch):
+    monkeypatch.setattr(summarizer, "_llm", None)
+    monkeypatch.setattr(summarizer, "_chains", {})
+    monkeypatch.setattr(summarizer, "limiter", LLMLimiter())
 
 
 @pytest.mark.asyncio
@@ -24,7 +38,10 @@ async def test_text_summarizer_uses_chain(monkeypatch) -> None:
             return DummyChain()
 
     class DummyLLM:
-        def __init__(self, model: str, temperature: int) -> None:
+        instances = 0
+
+        def __init__(self, model: str, temperature: int, **kwargs) -> None:
+            DummyLLM.instances += 1
             self.model = model
             self.temperature = temperature
 
@@ -38,3 +55,182 @@ async def test_text_summarizer_uses_chain(monkeypatch) -> None:
         "original_text": "Hello world",
         "word_count": 5,
     }
+
+    await summarizer.text_summarizer("Hello again", word_count=5)
+
+    assert DummyLLM.instances == 1
+    assert summarizer.limiter.stats()["completed"] == 2
+
+
+class FakeLLMChain:
+    """
+    Stand-in for an LCEL chain: records payloads and answers with a short text.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.payloads: list[dict] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def ainvoke(self, payload: dict) -> SimpleNamespace:
+        self.payloads.append(payload)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+
+        return SimpleNamespace(content=f"{self.name}:{payload['original_text'][:10]}")
+
+
+def _long_text(paragraphs: int) -> str:
+    return "\n".join(f"Paragrafo {i} " + "palavra " * 40 for i in range(paragraphs))
+
+
+def test_split_by_tokens_respects_budget() -> None:
+    text = _long_text(50)
+
+    chunks = summarizer.split_by_tokens(text, max_tokens=200)
+
+    assert len(chunks) > 1
+    assert all(summarizer.count_tokens(chunk) <= 200 for chunk in chunks)
+    assert "\n".join(chunks).split() == text.split()
+
+
+def test_split_by_tokens_breaks_long_lines() -> None:
+    chunks = summarizer.split_by_tokens("x" * 5000, max_tokens=100)
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == "x" * 5000
+
+
+@pytest.mark.asyncio
+async def test_map_summaries_bounds_concurrency() -> None:
+    chain = FakeLLMChain("map")
+
+    partials = await summarizer.map_summaries(chain, [f"chunk {i}" for i in range(10)], word_count=50, concurrency=3)
+
+    assert partials == [f"map:chunk {i}" for i in range(10)]
+    assert chain.max_in_flight == 3
+    assert [payload["part"] for payload in chain.payloads] == list(range(1, 11))
+    assert all(payload["parts"] == 10 and payload["word_count"] == 50 for payload in chain.payloads)
+
+
+@pytest.mark.asyncio
+async def test_reduce_summaries_uses_requested_word_count() -> None:
+    map_chain, reduce_chain = FakeLLMChain("map"), FakeLLMChain("reduce")
+
+    result = await summarizer.reduce_summaries(map_chain, reduce_chain, ["parte 1", "parte 2"], word_count=80)
+
+    assert result == "reduce:parte 1\n\np"
+    assert map_chain.payloads == []
+    assert reduce_chain.payloads == [{"original_text": "parte 1\n\nparte 2", "word_count": 80}]
+
+
+@pytest.mark.asyncio
+async def test_text_summarizer_map_reduce_for_long_text(monkeypatch) -> None:
+    chains: dict[str, FakeLLMChain] = {}
+
+    def _fake_build_chain(template: str, input_variables=("original_text", "word_count")) -> FakeLLMChain:
+        name = {
+            summarizer.SYSTEM_PROMPT: "single",
+            summarizer.MAP_PROMPT: "map",
+            summarizer.REDUCE_PROMPT: "reduce",
+        }[template]
+        return chains.setdefault(name, FakeLLMChain(name))
+
+    monkeypatch.setattr(summarizer, "build_chain", _fake_build_chain)
+    monkeypatch.setattr(summarizer, "SUMMARY_SINGLE_CALL_TOKENS", 300)
+    monkeypatch.setattr(summarizer, "SUMMARY_CHUNK_TOKENS", 200)
+
+    result = await summarizer.text_summarizer(_long_text(30), word_count=100)
+
+    assert result.startswith("reduce:")
+    assert "single" not in chains
+    assert len(chains["map"].payloads) > 1
+    assert chains["reduce"].payloads[0]["word_count"] == 100
+
+
+@pytest.mark.asyncio
+async def test_text_summarizer_single_call_for_short_text(monkeypatch) -> None:
+    chains: dict[str, FakeLLMChain] = {}
+
+    def _fake_build_chain(template: str, input_variables=("original_text", "word_count")) -> FakeLLMChain:
+        return chains.setdefault(template, FakeLLMChain("single"))
+
+    monkeypatch.setattr(summarizer, "build_chain", _fake_build_chain)
+
+    result = await summarizer.text_summarizer("Texto curto.", word_count=20)
+
+    assert result == "single:Texto curt"
+    assert list(chains) == [summarizer.SYSTEM_PROMPT]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("lines", [1, 30])
+async def test_text_summarizer_tokenizes_the_text_once(monkeypatch, lines: int) -> None:
+    counted: list[str] = []
+    count_tokens = summarizer.count_tokens
+
+    def _counting(text: str) -> int:
+        counted.append(text)
+        return count_tokens(text)
+
+    monkeypatch.setattr(summarizer, "build_chain", lambda template, input_variables=None: FakeLLMChain("llm"))
+    monkeypatch.setattr(summarizer, "SUMMARY_SINGLE_CALL_TOKENS", 300)
+    monkeypatch.setattr(summarizer, "SUMMARY_CHUNK_TOKENS", 200)
+    text = _long_text(lines)
+    chunks = summarizer.split_by_tokens(text)
+    monkeypatch.setattr(summarizer, "count_tokens", _counting)
+
+    await summarizer.text_summarizer(text, word_count=20)
+
+    assert counted.count(text) == 1
+    assert not any(chunk in counted for chunk in chunks if "\n" in chunk)
+
+
+def test_split_by_tokens_counted_covers_each_chunk() -> None:
+    text = _long_text(30)
+
+    counted = summarizer.split_by_tokens_counted(text, max_tokens=200)
+
+    assert [chunk for chunk, _ in counted] == summarizer.split_by_tokens(text, max_tokens=200)
+    assert all(summarizer.count_tokens(chunk) <= tokens <= 200 for chunk, tokens in counted)
+
+
+@pytest.mark.asyncio
+async def test_text_summarizer_stream_yields_chunks(monkeypatch) -> None:
+    class FakeStreamingChain:
+        payloads: list[dict] = []
+
+        async def astream(self, payload: dict):
+            FakeStreamingChain.payloads.append(payload)
+            for piece in ["Re", "", "sumo"]:
+                yield SimpleNamespace(content=piece)
+
+    monkeypatch.setattr(summarizer, "build_chain", lambda template, input_variables=None: FakeStreamingChain())
+
+    chunks = [chunk async for chunk in summarizer.text_summarizer_stream("Texto curto.", word_count=20)]
+
+    assert chunks == ["Re", "sumo"]
+    assert FakeStreamingChain.payloads == [{"original_text": "Texto curto.", "word_count": 20}]
+    assert summarizer.limiter.stats()["completed"] == 1
+
+
+def test_langchain_is_imported_on_first_use() -> None:
+    # A fresh process: importing the app must not load LangChain/OpenAI, which is
+    # about half of the import time; the first use of the LLM does.
+    code = (
+        "import sys, main\n"
+        "from utils import summarizer\n"
+        "assert 'langchain_openai' not in sys.modules\n"
+        "assert summarizer.ChatOpenAI.__name__ == 'ChatOpenAI'\n"
+        "assert 'langchain_openai' in sys.modules\n"
+    )
+
+    subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parent.parent, check=True)
+
+
+def test_unknown_attribute_still_raises() -> None:
+    with pytest.raises(AttributeError):
+        summarizer.NotThere
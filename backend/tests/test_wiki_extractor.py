@@ -1,7 +1,16 @@
+from types import SimpleNamespace
+
+import httpx
 import pytest
+from sqlalchemy.dialects import postgresql
 
 from schemas import WikiExtractorResult
-from utils.wiki_extractor import WikipediaPageNotFoundError, WikipediaTextExtractor
+from utils import http_client as http_client_module
+from utils.article_text import compress_text, decompress_text
+from utils.response_cache import response_cache, serialize
+from utils import missing_pages as missing_pages_module
+from utils import wiki_extractor as wiki_extractor_module
+from utils.wiki_extractor import WikipediaPageNotFoundError, WikipediaTextExtractor, select_summaries
 
 
 def test_normalize_word_handles_stopwords() -> None:
@@ -57,3 +66,467 @@ async def test_extract_returns_schema(fake_load_summary) -> None:
     assert isinstance(result, WikiExtractorResult)
     assert result.word == "Teste"
     assert result.summary == "summary"
+
+
+def _mock_client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True)
+
+
+@pytest.mark.asyncio
+async def test_fetch_article_uses_shared_client(monkeypatch) -> None:
+    requested: list[str] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        return httpx.Response(200, text="<p>ok</p>")
+
+    client = _mock_client(_handler)
+    monkeypatch.setattr(wiki_extractor_module, "get_http_client", lambda: client)
+
+    extractor = WikipediaTextExtractor("Steve Jobs")
+    await extractor.fecth_article()
+
+    assert extractor.raw_text == "<p>ok</p>"
+    assert requested == ["https://pt.wikipedia.org/wiki/Steve_Jobs"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_article_raises_on_404(monkeypatch) -> None:
+    client = _mock_client(lambda request: httpx.Response(404))
+    monkeypatch.setattr(wiki_extractor_module, "get_http_client", lambda: client)
+
+    extractor = WikipediaTextExtractor("Nada")
+
+    with pytest.raises(WikipediaPageNotFoundError):
+        await extractor.fecth_article()
+
+
+@pytest.mark.asyncio
+async def test_get_http_client_is_reused_until_closed() -> None:
+    client = http_client_module.get_http_client()
+
+    assert http_client_module.get_http_client() is client
+
+    await http_client_module.close_http_client()
+
+    assert client.is_closed
+    assert http_client_module.get_http_client() is not client
+
+    await http_client_module.close_http_client()
+
+
+@pytest.mark.asyncio
+async def test_stream_summary_replays_saved_summary(monkeypatch) -> None:
+    async def _fake_lookup(self: WikipediaTextExtractor) -> None:
+        self.article = object()
+        self.summary = SimpleNamespace(word_count=10, summary_text="resumo salvo")
+
+    monkeypatch.setattr(WikipediaTextExtractor, "lookup_summary", _fake_lookup)
+
+    extractor = WikipediaTextExtractor("Teste", word_count=10)
+    chunks = [chunk async for chunk in extractor.stream_summary()]
+
+    assert chunks == ["resumo salvo"]
+
+
+@pytest.mark.asyncio
+async def test_stream_summary_streams_and_saves(monkeypatch) -> None:
+    saved: list[str] = []
+
+    async def _fake_lookup(self: WikipediaTextExtractor) -> None:
+        self.article = object()
+        self.article_id = 1
+        self.summary = None
+
+    async def _fake_load_article_text(self: WikipediaTextExtractor) -> None:
+        self.clean_text = "texto do artigo"
+
+    async def _fake_stream(text: str, word_count: int):
+        for chunk in ["um ", "dois"]:
+            yield chunk
+
+    async def _fake_save_summary(self: WikipediaTextExtractor) -> None:
+        saved.append(self.summary_text)
+
+    monkeypatch.setattr(WikipediaTextExtractor, "lookup_summary", _fake_lookup)
+    monkeypatch.setattr(WikipediaTextExtractor, "load_article_text", _fake_load_article_text)
+    monkeypatch.setattr(WikipediaTextExtractor, "save_summary", _fake_save_summary)
+    monkeypatch.setattr(wiki_extractor_module, "text_summarizer_stream", _fake_stream)
+
+    extractor = WikipediaTextExtractor("Teste", word_count=10)
+    events = [event async for event in extractor.extract_stream()]
+
+    assert [event for event, _ in events] == ["start", "token", "token", "done"]
+    assert events[-1][1]["summary"] == "um dois"
+    assert saved == ["um dois"]
+
+
+@pytest.mark.asyncio
+async def test_extract_stream_reports_missing_page(monkeypatch) -> None:
+    async def _fake_stream_summary(self: WikipediaTextExtractor):
+        raise WikipediaPageNotFoundError("missing")
+        yield ""
+
+    monkeypatch.setattr(WikipediaTextExtractor, "stream_summary", _fake_stream_summary)
+
+    events = [event async for event in WikipediaTextExtractor("Nada").extract_stream()]
+
+    assert [event for event, _ in events] == ["start", "error"]
+
+
+@pytest.mark.asyncio
+async def test_extract_stream_ends_with_error_when_the_llm_fails(monkeypatch) -> None:
+    async def _fake_lookup(self: WikipediaTextExtractor) -> None:
+        self.article, self.article_id, self.summary = object(), 1, None
+
+    async def _fake_load_article_text(self: WikipediaTextExtractor) -> None:
+        self.clean_text = "texto do artigo"
+
+    async def _failing_stream(text: str, word_count: int):
+        yield "um "
+        raise httpx.ReadTimeout("LLM timeout")
+
+    monkeypatch.setattr(WikipediaTextExtractor, "lookup_summary", _fake_lookup)
+    monkeypatch.setattr(WikipediaTextExtractor, "load_article_text", _fake_load_article_text)
+    monkeypatch.setattr(wiki_extractor_module, "text_summarizer_stream", _failing_stream)
+
+    extractor = WikipediaTextExtractor("Teste", word_count=10)
+    events = [event async for event in extractor.extract_stream()]
+
+    assert [event for event, _ in events] == ["start", "token", "error"]
+    assert events[-1][1]["message"] == "Erro ao gerar o resumo para o termo solicitado."
+    assert extractor.outcome == "error"
+
+
+def _saved(summary_id: int, word_count: int, derived_from_id: int | None = None, stale: bool = False) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=summary_id,
+        word_count=word_count,
+        derived_from_id=derived_from_id,
+        summary_text=f"resumo {word_count}",
+        stale=stale,
+    )
+
+
+def test_select_summaries_prefers_closest_within_tolerance() -> None:
+    summaries = [_saved(1, 140), _saved(2, 150), _saved(3, 300)]
+
+    assert select_summaries(summaries, 148, tolerance=5) == (summaries[1], None)
+    assert select_summaries(summaries, 145, tolerance=5) == (summaries[1], None)
+    assert select_summaries(summaries, 140, tolerance=0) == (summaries[0], None)
+
+
+def test_select_summaries_derives_from_nearest_longer_original() -> None:
+    summaries = [_saved(1, 300), _saved(2, 140), _saved(3, 120, derived_from_id=1)]
+
+    assert select_summaries(summaries, 100) == (None, summaries[1])
+    assert select_summaries(summaries, 100, derive=False) == (None, None)
+    assert select_summaries(summaries, 500) == (None, None)
+
+
+def test_select_summaries_skips_stale() -> None:
+    summaries = [_saved(1, 150, stale=True), _saved(2, 300, stale=True), _saved(3, 200)]
+
+    assert select_summaries(summaries, 150) == (None, summaries[2])
+
+
+@pytest.mark.asyncio
+async def test_load_summary_derives_from_saved_summary(monkeypatch) -> None:
+    saved: list[tuple[str, int]] = []
+    condensed: list[tuple[str, int]] = []
+
+    async def _fake_lookup(self: WikipediaTextExtractor) -> None:
+        self.article = object()
+        self.article_id = 1
+        self.summary, self.source_summary = select_summaries([_saved(7, 300)], self.word_count)
+
+    async def _fake_condenser(text: str, word_count: int) -> str:
+        condensed.append((text, word_count))
+        return "resumo curto"
+
+    async def _fake_save_summary(self: WikipediaTextExtractor) -> None:
+        saved.append((self.summary_text, self.derived_from_id))
+
+    monkeypatch.setattr(WikipediaTextExtractor, "lookup_summary", _fake_lookup)
+    monkeypatch.setattr(WikipediaTextExtractor, "save_summary", _fake_save_summary)
+    monkeypatch.setattr(wiki_extractor_module, "text_condenser", _fake_condenser)
+
+    extractor = WikipediaTextExtractor("Teste", word_count=100, derive=True)
+    await extractor.load_summary()
+
+    assert extractor.summary_text == "resumo curto"
+    assert condensed == [("resumo 300", 100)]
+    assert saved == [("resumo curto", 7)]
+
+
+
+@pytest.mark.asyncio
+async def test_load_summary_serves_hot_terms_from_cache(monkeypatch) -> None:
+    lookups = 0
+
+    async def _fake_lookup(self: WikipediaTextExtractor) -> None:
+        nonlocal lookups
+        lookups += 1
+        self.article = object()
+        self.article_id = 1
+        self.summary, self.source_summary = SimpleNamespace(word_count=140, summary_text="resumo salvo"), None
+
+    monkeypatch.setattr(WikipediaTextExtractor, "lookup_summary", _fake_lookup)
+
+    for _ in range(3):
+        extractor = WikipediaTextExtractor("Steve Jobs", word_count=140)
+        await extractor.load_summary()
+        assert extractor.summary_text == "resumo salvo"
+
+    assert lookups == 1
+    assert wiki_extractor_module.summary_cache.hits == 2
+
+
+@pytest.mark.asyncio
+async def test_summary_matched_within_tolerance_is_cached_under_its_word_count(monkeypatch) -> None:
+    async def _fake_lookup(self: WikipediaTextExtractor) -> None:
+        self.article = object()
+        self.article_id = 1
+        self.summary, self.source_summary = select_summaries(
+            [_saved(1, 150)], self.word_count, self.tolerance, self.derive
+        )
+
+    monkeypatch.setattr(WikipediaTextExtractor, "lookup_summary", _fake_lookup)
+
+    extractor = WikipediaTextExtractor("Steve Jobs", word_count=148, tolerance=5)
+    await extractor.load_summary()
+
+    assert extractor.summary_text == "resumo 150"
+    assert wiki_extractor_module.summary_cache.get(("steve_jobs", 148)) is None
+    assert wiki_extractor_module.summary_cache.get(("steve_jobs", 150)) == "resumo 150"
+
+
+@pytest.mark.asyncio
+async def test_known_missing_page_fails_without_io(monkeypatch) -> None:
+    async def _unexpected(self: WikipediaTextExtractor) -> None:
+        raise AssertionError("should not reach the database")
+
+    monkeypatch.setattr(WikipediaTextExtractor, "lookup_summary", _unexpected)
+    missing_pages_module.missing_cache.set("palavra_inexistente", True)
+
+    result = await WikipediaTextExtractor("Palavra Inexistente").extract()
+
+    assert result.message == "Página da Wikipedia não encontrada para o termo solicitado."
+
+
+@pytest.mark.asyncio
+async def test_missing_page_is_remembered(monkeypatch) -> None:
+    remembered: list[list[str]] = []
+
+    async def _fake_lookup(self: WikipediaTextExtractor) -> None:
+        self.article = None
+
+    async def _fake_is_missing(word_slug: str) -> bool:
+        return False
+
+    async def _fake_fetch(self: WikipediaTextExtractor) -> None:
+        raise WikipediaPageNotFoundError("missing")
+
+    async def _fake_remember(word_slugs: list[str]) -> None:
+        remembered.append(word_slugs)
+
+    monkeypatch.setattr(WikipediaTextExtractor, "lookup_summary", _fake_lookup)
+    monkeypatch.setattr(WikipediaTextExtractor, "fecth_article", _fake_fetch)
+    monkeypatch.setattr(wiki_extractor_module, "is_missing", _fake_is_missing)
+    monkeypatch.setattr(wiki_extractor_module, "remember_missing", _fake_remember)
+
+    result = await WikipediaTextExtractor("Palavra Inexistente").extract()
+
+    assert result.message == "Página da Wikipedia não encontrada para o termo solicitado."
+    assert remembered == [["palavra_inexistente"]]
+
+
+class _ScriptedResult:
+    def __init__(self, rows: list) -> None:
+        self.rows = rows
+
+    def all(self) -> list:
+        return self.rows
+
+
+class _ScriptedSession:
+    def __init__(self, *results: list) -> None:
+        self.results = list(results)
+        self.statements: list = []
+
+    async def execute(self, statement) -> _ScriptedResult:
+        self.statements.append(statement)
+        return _ScriptedResult(self.results.pop(0))
+
+
+@pytest.mark.asyncio
+async def test_save_articles_aliases_redirects_to_saved_article() -> None:
+    # Steve_Jobs is already saved; only La_casa_de_papel gets inserted.
+    session = _ScriptedSession([("la_casa_de_papel", 2)], [("steve_jobs", 1)], [])
+
+    saved = await wiki_extractor_module.save_articles(session, {
+        "steven_paul_jobs": {"word": "Steve_Jobs", "clean_text": "texto"},
+        "casa_de_papel": {"word": "La_casa_de_papel", "clean_text": "texto"},
+    })
+
+    assert saved == {"steven_paul_jobs": (1, False), "casa_de_papel": (2, True)}
+
+    aliases = session.statements[2].compile().params
+    assert sorted(value for key, value in aliases.items() if key.startswith("alias_slug")) == [
+        "casa_de_papel", "la_casa_de_papel", "steve_jobs", "steven_paul_jobs",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_redirected_term_reuses_saved_summary(monkeypatch) -> None:
+    lookups: list[str | None] = []
+    aliases: list[tuple[str, int]] = []
+
+    async def _fake_lookup(self: WikipediaTextExtractor, word_slug: str | None = None) -> None:
+        lookups.append(word_slug)
+        if word_slug == "steve_jobs":
+            self.article, self.article_id = object(), 1
+            self.summary = SimpleNamespace(word_count=self.word_count, summary_text="resumo salvo")
+
+    async def _fake_is_missing(word_slug: str) -> bool:
+        return False
+
+    async def _fake_fetch(self: WikipediaTextExtractor) -> None:
+        self.clean_text = "texto"
+        self.canonical_title = "Steve Jobs"
+
+    async def _fake_save_alias(self: WikipediaTextExtractor) -> None:
+        aliases.append((self.word_slug, self.article_id))
+
+    async def _unexpected(*args, **kwargs) -> str:
+        raise AssertionError("should not call the LLM")
+
+    monkeypatch.setattr(WikipediaTextExtractor, "lookup_summary", _fake_lookup)
+    monkeypatch.setattr(WikipediaTextExtractor, "fetch_article_text", _fake_fetch)
+    monkeypatch.setattr(WikipediaTextExtractor, "save_alias", _fake_save_alias)
+    monkeypatch.setattr(wiki_extractor_module, "is_missing", _fake_is_missing)
+    monkeypatch.setattr(wiki_extractor_module, "text_summarizer", _unexpected)
+
+    result = await WikipediaTextExtractor("Steven Paul Jobs").extract()
+
+    assert result.summary == "resumo salvo"
+    assert lookups == [None, "steve_jobs"]
+    assert aliases == [("steven_paul_jobs", 1)]
+
+
+class _CapturingSession:
+    def __init__(self, row: SimpleNamespace, slugs: tuple[str, ...] = ()) -> None:
+        self.row = row
+        self.slugs = slugs
+        self.statements: list = []
+
+    async def execute(self, statement) -> SimpleNamespace:
+        self.statements.append(statement)
+        return SimpleNamespace(one=lambda: self.row)
+
+    async def scalars(self, statement) -> list:
+        self.statements.append(statement)
+        return list(self.slugs)
+
+    async def commit(self) -> None:
+        pass
+
+    async def __aenter__(self) -> "_CapturingSession":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_save_summary_writes_new_article_in_one_statement(monkeypatch) -> None:
+    session = _CapturingSession(SimpleNamespace(id=10, article_id=3))
+    monkeypatch.setattr(wiki_extractor_module, "AsyncSessionLocal", lambda: session)
+
+    for slug in ("steven_paul_jobs", "steve_jobs", "pixar"):
+        response_cache.set(("database", slug), serialize({"summaries": []}))
+
+    extractor = WikipediaTextExtractor("Steven Paul Jobs", word_count=100)
+    extractor.canonical_title, extractor.clean_text, extractor.summary_text = "Steve Jobs", "texto", "resumo"
+
+    await extractor.save_summary()
+
+    assert [response_cache.get(("database", slug)) is None for slug in ("steven_paul_jobs", "steve_jobs", "pixar")] == [
+        True, True, False,
+    ]
+
+    statement, slugs = session.statements
+    assert "wiki_article_alias.article_id IN" in _sql(slugs)
+    sql = _sql(statement)
+    assert sql.startswith("WITH article AS \n(INSERT INTO wiki_article")
+    assert "ON CONFLICT (word_slug) DO UPDATE" in sql
+    assert "INSERT INTO wiki_article_alias" in sql
+    assert "ON CONFLICT (article_id, word_count) DO UPDATE" in sql
+    assert sorted(v for k, v in statement.compile().params.items() if v in ("steve_jobs", "steven_paul_jobs")) == [
+        "steve_jobs", "steve_jobs", "steven_paul_jobs",
+    ]
+    assert "setweight(to_tsvector(" in sql
+    assert [decompress_text(v) for v in statement.compile().params.values() if isinstance(v, bytes)] == ["texto"]
+    assert extractor.article_id == 3
+
+
+@pytest.mark.asyncio
+async def test_save_summary_through_an_alias_drops_responses_of_every_slug(monkeypatch) -> None:
+    slugs = ("steve_jobs", "steven_paul_jobs", "jobs")
+    session = _CapturingSession(SimpleNamespace(id=10, article_id=3), slugs=slugs)
+    monkeypatch.setattr(wiki_extractor_module, "AsyncSessionLocal", lambda: session)
+
+    for slug in (*slugs, "pixar"):
+        response_cache.set(("database", slug), serialize({"summaries": []}))
+        wiki_extractor_module.summary_cache.set((slug, 100), "resumo antigo")
+    wiki_extractor_module.summary_cache.set(("jobs", 50), "resumo curto")
+
+    # Found through an alias: the canonical title is not known.
+    extractor = WikipediaTextExtractor("Steven Paul Jobs", word_count=100)
+    extractor.article_id, extractor.summary_text = 3, "resumo"
+
+    await extractor.save_summary()
+
+    assert [response_cache.get(("database", slug)) is None for slug in (*slugs, "pixar")] == [True, True, True, False]
+    assert [wiki_extractor_module.summary_cache.get((slug, 100)) is None for slug in (*slugs, "pixar")] == [True, True, True, False]
+    assert wiki_extractor_module.summary_cache.get(("jobs", 50)) == "resumo curto"
+
+
+@pytest.mark.asyncio
+async def test_load_article_text_decompresses_stored_text(monkeypatch) -> None:
+    session = _CapturingSession(None)
+    row = SimpleNamespace(clean_text=None, text_zstd=compress_text("texto salvo"))
+
+    async def _execute(statement) -> SimpleNamespace:
+        session.statements.append(statement)
+        return SimpleNamespace(one_or_none=lambda: row)
+
+    session.execute = _execute
+    monkeypatch.setattr(wiki_extractor_module, "AsyncSessionLocal", lambda: session)
+
+    extractor = WikipediaTextExtractor("Steve Jobs")
+    extractor.article_id = 3
+    await extractor.load_article_text()
+
+    assert extractor.clean_text == "texto salvo"
+    assert "wiki_article.text_zstd" in _sql(session.statements[0])
+
+
+@pytest.mark.asyncio
+async def test_save_summary_upserts_for_saved_article(monkeypatch) -> None:
+    session = _CapturingSession(SimpleNamespace(id=10, article_id=3))
+    monkeypatch.setattr(wiki_extractor_module, "AsyncSessionLocal", lambda: session)
+
+    extractor = WikipediaTextExtractor("Python", word_count=100)
+    extractor.article_id, extractor.summary_text = 3, "resumo"
+
+    await extractor.save_summary()
+
+    sql = _sql(session.statements[0])
+    assert sql.startswith("INSERT INTO wiki_summary")
+    assert "wiki_article" not in sql
+    assert "stale = " in sql
@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Optional
+
+import zstandard
+from sqlalchemy import bindparam, select, update
+
+from db import AsyncSessionLocal
+
+from models import Article
+
+from utils import metrics
+from utils.search import article_search_vector
+
+logger = logging.getLogger(__name__)
+
+# Article texts are stored zstd-compressed (wiki_article.text_zstd). Texts are
+# written once and read many times, so a high level pays off.
+ARTICLE_ZSTD_LEVEL = int(os.getenv('ARTICLE_ZSTD_LEVEL', '9'))
+
+# Trained dictionaries (comma separated paths, see zstd_dict.py). The first one
+# compresses new texts; keep the previous ones listed after a new dictionary is
+# trained, texts compressed with them still need them to be read.
+ARTICLE_ZSTD_DICTS = os.getenv('ARTICLE_ZSTD_DICTS', '')
+
+# Articles saved as plain text (wiki_article.clean_text) before compression are
+# compressed in the background, ARTICLE_TEXT_MIGRATION_BATCH at a time (0
+# disables), pausing ARTICLE_TEXT_MIGRATION_PAUSE seconds between batches.
+ARTICLE_TEXT_MIGRATION_BATCH = int(os.getenv('ARTICLE_TEXT_MIGRATION_BATCH', '200'))
+ARTICLE_TEXT_MIGRATION_PAUSE = float(os.getenv('ARTICLE_TEXT_MIGRATION_PAUSE', '1'))
+ARTICLE_TEXT_MIGRATION_RETRY_DELAY = 60
+
+# Compressed texts up to this size are decompressed inline: below it a thread
+# hop costs more than the decompression itself.
+ARTICLE_TEXT_INLINE_BYTES = 16 * 1024
+
+class UnknownDictionaryError(Exception):
+    pass
+
+# zstd compressors and decompressors are not thread safe: one set per thread.
+_local = threading.local()
+_task: Optional[asyncio.Task] = None
+
+@lru_cache(maxsize=1)
+def get_dictionaries() -> tuple[zstandard.ZstdCompressionDict, ...]:
+    dictionaries = []
+
+    for path in (item.strip() for item in ARTICLE_ZSTD_DICTS.split(',')):
+        if path:
+            with open(path, 'rb') as f:
+                dictionaries.append(zstandard.ZstdCompressionDict(f.read()))
+
+    return tuple(dictionaries)
+
+def _compressor() -> zstandard.ZstdCompressor:
+    compressor = getattr(_local, 'compressor', None)
+
+    if compressor is None:
+        dictionaries = get_dictionaries()
+        compressor = _local.compressor = zstandard.ZstdCompressor(
+            level=ARTICLE_ZSTD_LEVEL,
+            dict_data=dictionaries[0] if dictionaries else None,
+        )
+
+    return compressor
+
+def _decompressor(dict_id: int) -> zstandard.ZstdDecompressor:
+    decompressors = _local.__dict__.setdefault('decompressors', {})
+    decompressor = decompressors.get(dict_id)
+
+    if decompressor is None:
+        if dict_id:
+            dictionary = next((d for d in get_dictionaries() if d.dict_id() == dict_id), None)
+
+            if dictionary is None:
+                raise UnknownDictionaryError(f'zstd dictionary {dict_id} is not in ARTICLE_ZSTD_DICTS.')
+
+            decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+        else:
+            decompressor = zstandard.ZstdDecompressor()
+
+        decompressors[dict_id] = decompressor
+
+    return decompressor
+
+def compress_text(text: str) -> bytes:
+    """
+    zstd frame of the text; the frame records the id of the dictionary used, if any.
+    """
+    data = _compressor().compress(text.encode())
+    metrics.article_bytes.labels('zstd').observe(len(data))
+
+    return data
+
+def decompress_text(data: bytes, max_chars: Optional[int] = None) -> str:
+    """
+    The text of a zstd frame, or only its first `max_chars` characters, which
+    decompresses only the blocks they are in.
+    """
+    decompressor = _decompressor(zstandard.get_frame_parameters(data).dict_id)
+
+    if max_chars is None:
+        return decompressor.decompress(data).decode()
+
+    # At most 4 bytes per character in UTF-8; a character cut at the end is dropped.
+    with decompressor.stream_reader(data) as reader:
+        return reader.read(max_chars * 4).decode(errors='ignore')[:max_chars]
+
+async def compress_texts(texts: list[str]) -> list[bytes]:
+    """
+    Compress in a thread: zstd releases the GIL, so long articles do not block
+    the event loop.
+    """
+    return await asyncio.to_thread(lambda: [compress_text(text) for text in texts])
+
+def stored_text(clean_text: Optional[str], text_zstd: Optional[bytes], max_chars: Optional[int] = None) -> Optional[str]:
+    """
+    The text of an article row, compressed or (not migrated yet) plain.
+    """
+    if text_zstd is not None:
+        return decompress_text(text_zstd, max_chars)
+
+    return clean_text if clean_text is None or max_chars is None else clean_text[:max_chars]
+
+async def stored_text_async(clean_text: Optional[str], text_zstd: Optional[bytes]) -> Optional[str]:
+    """
+    stored_text, decompressing large texts in a thread so they do not block
+    the event loop.
+    """
+    if text_zstd is None or len(text_zstd) <= ARTICLE_TEXT_INLINE_BYTES:
+        return stored_text(clean_text, text_zstd)
+
+    return await asyncio.to_thread(stored_text, clean_text, text_zstd)
+
+def text_values(word: Any, text: str, text_zstd: bytes) -> dict:
+    """
+    Article column values storing `text`: the compressed text and the search
+    vector, which Postgres cannot compute from it.
+    """
+    return {
+        "clean_text": None,
+        "text_zstd": text_zstd,
+        "search_vector": article_search_vector(word, text),
+    }
+
+async def compress_plain_articles(limit: int) -> int:
+    """
+    Compress one batch of articles still stored as plain text. Returns the number compressed.
+    """
+    table = Article.__table__
+
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(
+            select(Article.id, Article.clean_text)
+            .where(Article.text_zstd.is_(None), Article.clean_text.is_not(None))
+            .order_by(Article.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )).all()
+
+        if not rows:
+            return 0
+
+        compressed = await compress_texts([row.clean_text for row in rows])
+
+        # The search vector was computed from the plain text and stays as is.
+        await session.execute(
+            update(table)
+            .where(table.c.id == bindparam('row_id'))
+            .values(text_zstd=bindparam('row_text_zstd'), clean_text=None, updated_at=table.c.updated_at),
+            [{"row_id": row.id, "row_text_zstd": data} for row, data in zip(rows, compressed)],
+        )
+        await session.commit()
+
+    return len(rows)
+
+async def run_text_migration() -> None:
+    compressed = 0
+
+    while True:
+        try:
+            count = await compress_plain_articles(ARTICLE_TEXT_MIGRATION_BATCH)
+        except Exception:
+            logger.exception('Article text compression round failed.')
+            await asyncio.sleep(ARTICLE_TEXT_MIGRATION_RETRY_DELAY)
+            continue
+
+        # Every writer compresses, so once no plain text is left the job is done.
+        if not count:
+            break
+
+        compressed += count
+        await asyncio.sleep(ARTICLE_TEXT_MIGRATION_PAUSE)
+
+    if compressed:
+        logger.info('Compressed the text of %s articles.', compressed)
+
+def start_text_migration() -> None:
+    global _task
+
+    if ARTICLE_TEXT_MIGRATION_BATCH > 0 and _task is None:
+        _task = asyncio.create_task(run_text_migration())
+
+async def stop_text_migration() -> None:
+    global _task
+
+    if _task is None:
+        return
+
+    _task.cancel()
+
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+
+    _task = None
+
+def train_dictionary(texts: list[str], size: int, sample_bytes: int) -> bytes:
+    """
+    Train a zstd dictionary on the start (`sample_bytes`) of each text.
+    """
+    samples = [text.encode()[:sample_bytes] for text in texts if text]
+
+    return zstandard.train_dictionary(size, samples, level=ARTICLE_ZSTD_LEVEL).as_bytes()
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import os
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import or_, select, tuple_
+
+from db import AsyncSessionLocal
+
+from models import Article, ArticleAlias, Summary
+
+from schemas import WikiBatchItem
+from schemas import WikiExtractorResult
+from schemas import WikiExtractorError
+
+from utils import mediawiki
+from utils import metrics
+from utils.html_cleaner import normalize_lines
+from utils.missing_pages import remember_missing
+from utils.wiki_extractor import WikipediaTextExtractor
+from utils.wiki_extractor import format_url
+from utils.wiki_extractor import normalize_word
+from utils.wiki_extractor import save_articles
+from utils.wiki_extractor import summary_cache
+
+logger = logging.getLogger(__name__)
+
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '8'))
+
+def item_key(item: WikiBatchItem) -> tuple[str, int]:
+    return normalize_word(item.word).lower(), item.word_count
+
+async def load_saved_summaries(items: list[WikiBatchItem]) -> dict[tuple[str, int], str]:
+    """
+    Fetch the saved summaries that exactly match batch items: from the summary
+    cache when possible, the rest in a single query.
+    """
+    saved: dict[tuple[str, int], str] = {}
+    keys: set[tuple[str, int]] = set()
+
+    for item in items:
+        if not item.word.strip():
+            continue
+
+        key = item_key(item)
+        cached = summary_cache.get(key)
+
+        if cached is not None:
+            saved[key] = cached
+        else:
+            keys.add(key)
+
+    if not keys:
+        return saved
+
+    # Terms resolve through their alias, or their own word_slug for articles saved
+    # before aliases were recorded.
+    query = (
+        select(Article.word_slug, ArticleAlias.alias_slug, Summary.word_count, Summary.summary_text)
+        .join(Summary, Summary.article_id == Article.id)
+        .outerjoin(ArticleAlias, ArticleAlias.article_id == Article.id)
+        .where(Summary.stale.is_(False))
+        .where(or_(
+            tuple_(ArticleAlias.alias_slug, Summary.word_count).in_(list(keys)),
+            tuple_(Article.word_slug, Summary.word_count).in_(list(keys)),
+        ))
+    )
+
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(query)).all()
+
+    for row in rows:
+        for slug in (row.alias_slug, row.word_slug):
+            key = (slug, row.word_count)
+
+            if key in keys:
+                saved[key] = row.summary_text
+                summary_cache.set(key, row.summary_text)
+
+    return saved
+
+async def prefetch_articles(items: list[WikiBatchItem]) -> AsyncIterator[str]:
+    """
+    Fetch, through the action API, the articles of the items that are not saved
+    yet and save them, so each item only has to be summarized. Yields the slug
+    of each term as soon as its article is saved (or known to be missing).
+    """
+    words = {normalize_word(item.word).lower(): normalize_word(item.word) for item in items if item.word.strip()}
+
+    if not words:
+        return
+
+    async with AsyncSessionLocal() as session:
+        stored = set(await session.scalars(
+            select(ArticleAlias.alias_slug).where(ArticleAlias.alias_slug.in_(list(words)))
+            .union(select(Article.word_slug).where(Article.word_slug.in_(list(words))))
+        ))
+
+    for slug in stored:
+        yield slug
+
+    extracts = mediawiki.iter_extracts([word for slug, word in words.items() if slug not in stored])
+
+    try:
+        while True:
+            with metrics.timed('fetch'):
+                fetched = await anext(extracts, None)
+
+            if fetched is None:
+                break
+
+            word, extract = fetched
+
+            if extract is None:
+                await remember_missing([word.lower()])
+            elif clean_text := normalize_lines(extract.text):
+                async with AsyncSessionLocal() as session:
+                    with metrics.timed('save'):
+                        await save_articles(session, {
+                            word.lower(): {
+                                "word": extract.title.replace(" ", "_"),
+                                "clean_text": clean_text,
+                                "revision_id": extract.revision_id,
+                            },
+                        })
+                        await session.commit()
+
+            yield word.lower()
+    finally:
+        await extracts.aclose()
+
+async def extract_item(item: WikiBatchItem) -> WikiExtractorResult | WikiExtractorError:
+    extractor = WikipediaTextExtractor(word=item.word, word_count=item.word_count)
+
+    try:
+        return await extractor.extract()
+    except Exception:
+        # One failing term (Wikipedia or LLM error) must not fail the whole batch.
+        logger.exception('Batch item "%s" failed.', item.word)
+
+        return WikiExtractorError(
+            word=extractor.word,
+            url=extractor.url,
+            message='Erro ao gerar o resumo para o termo solicitado.'
+        )
+
+async def summarize_batch_stream(
+    items: list[WikiBatchItem],
+    concurrency: Optional[int] = None,
+) -> AsyncIterator[tuple[int, WikiExtractorResult | WikiExtractorError]]:
+    """
+    Yield (index, result) for every item as soon as it is ready: saved summaries
+    first, then the misses as the extractor pipeline finishes them.
+    """
+    saved = await load_saved_summaries(items)
+    pending: list[tuple[int, WikiBatchItem]] = []
+
+    for index, item in enumerate(items):
+        summary_text = saved.get(item_key(item))
+
+        if summary_text is None:
+            pending.append((index, item))
+            continue
+
+        yield index, WikiExtractorResult(word=item.word.strip(), url=format_url(item.word), summary=summary_text)
+
+    # Each item starts as soon as its own article is prefetched, not the whole batch.
+    prefetched: dict[str, asyncio.Event] = {}
+
+    async def _prefetch() -> None:
+        try:
+            async for slug in prefetch_articles([item for _, item in pending]):
+                if slug in prefetched:
+                    prefetched[slug].set()
+        except Exception:
+            # Not fatal: each item falls back to fetching its own article.
+            logger.exception('Batch prefetch failed.')
+        finally:
+            for event in prefetched.values():
+                event.set()
+
+    semaphore = asyncio.Semaphore(max(1, concurrency or BATCH_CONCURRENCY))
+
+    async def _run(index: int, item: WikiBatchItem) -> tuple[int, WikiExtractorResult | WikiExtractorError]:
+        ready = prefetched.get(item_key(item)[0])
+
+        if ready is not None:
+            await ready.wait()
+
+        async with semaphore:
+            return index, await extract_item(item)
+
+    tasks = []
+
+    if pending and mediawiki.WIKI_FETCH_BACKEND == 'api':
+        prefetched.update({item_key(item)[0]: asyncio.Event() for _, item in pending if item.word.strip()})
+        tasks.append(asyncio.ensure_future(_prefetch()))
+
+    results = [asyncio.ensure_future(_run(index, item)) for index, item in pending]
+    tasks.extend(results)
+
+    try:
+        for task in asyncio.as_completed(results):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def summarize_batch(
+    items: list[WikiBatchItem],
+    concurrency: Optional[int] = None,
+) -> list[WikiExtractorResult | WikiExtractorError]:
+    results: list = [None] * len(items)
+
+    async for index, result in summarize_batch_stream(items, concurrency):
+        results[index] = result
+
+    return results
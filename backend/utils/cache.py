@@ -0,0 +1,125 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+class LRUCache:
+    """
+    In-memory cache bounded by an approximate size in bytes, with LRU eviction
+    and a per-entry time to live. A max_bytes of 0 disables the cache.
+
+    With `group`, entries are also indexed by group(key), so all the entries of
+    a group can be invalidated without scanning the cache.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: float,
+        sizeof: Callable[[Any], int] = sys.getsizeof,
+        group: Optional[Callable[[Hashable], Hashable]] = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.group = group
+
+        self._entries: OrderedDict[Hashable, tuple[Any, int, float]] = OrderedDict()
+        self._groups: dict[Hashable, set[Hashable]] = {}
+        self.size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, _, expires_at = entry
+
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+
+        if self.max_bytes <= 0 or ttl <= 0:
+            return
+
+        size = self.sizeof(key) + self.sizeof(value)
+
+        if size > self.max_bytes:
+            return
+
+        self._remove(key)
+        self._entries[key] = (value, size, time.monotonic() + ttl)
+        self.size += size
+
+        if self.group is not None:
+            self._groups.setdefault(self.group(key), set()).add(key)
+
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._remove(key)
+
+    def invalidate_group(self, group: Hashable) -> int:
+        """
+        Remove the entries of a group. Returns the number removed.
+        """
+        keys = self._groups.pop(group, set())
+
+        for key in keys:
+            self._remove(key)
+
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._groups.clear()
+        self.size = 0
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+
+        if entry is None:
+            return
+
+        self.size -= entry[1]
+
+        if self.group is not None:
+            keys = self._groups.get(self.group(key))
+
+            if keys is not None:
+                keys.discard(key)
+
+                if not keys:
+                    del self._groups[self.group(key)]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
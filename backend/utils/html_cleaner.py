@@ -0,0 +1,277 @@
+import asyncio
+import html
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+from urllib.parse import unquote
+
+HTML_CLEANER_BACKEND = os.getenv('HTML_CLEANER_BACKEND', 'lxml')
+HTML_CLEANER_WORKERS = int(os.getenv('HTML_CLEANER_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+REFERENCE_BACKEND = 'html.parser'
+
+REMOVED_SELECTOR = (
+    "script, style, noscript, svg, img, figure, table, "
+    "div.navbox, div.infobox, div.metadata, div.reflist, "
+    "ol.references, sup.reference, span.mw-editsection"
+)
+
+def _has_class(tag: str, css_class: str) -> str:
+    return f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')]"
+
+# XPath equivalent of REMOVED_SELECTOR for the lxml backend.
+REMOVED_XPATH = " | ".join(
+    [f".//{tag}" for tag in ("script", "style", "noscript", "svg", "img", "figure", "table")]
+    + [_has_class("div", css_class) for css_class in ("navbox", "infobox", "metadata", "reflist")]
+    + [_has_class("ol", "references"), _has_class("sup", "reference"), _has_class("span", "mw-editsection")]
+)
+
+CANONICAL_LINK = re.compile(r'<link rel="canonical" href="[^"]*/wiki/([^"#?]+)"')
+REVISION_ID = re.compile(r'"wgRevisionId":(\d+)')
+
+# Markup libxml2 handles differently from html.parser, normalized before parsing
+# with lxml: an XML declaration (lxml refuses str input declaring an encoding)
+# and CDATA sections (dropped by libxml2, kept as text by html.parser).
+XML_DECLARATION = re.compile(r'^\s*<\?xml[^>]*\?>')
+CDATA_SECTION = re.compile(r'<!\[CDATA\[(.*?)\]\]>', re.DOTALL)
+
+# Wikitext (dump pages) counterpart of REMOVED_SELECTOR: templates (infoboxes,
+# navboxes), tables, references, files and categories.
+WIKITEXT_INNERMOST = [
+    re.compile(r"\{\{[^{}]*\}\}"),
+    re.compile(r"\{\|(?:(?!\{\|).)*?\|\}", re.DOTALL),
+]
+WIKITEXT_REMOVED = [
+    re.compile(r"<!--.*?-->", re.DOTALL),
+    re.compile(r"<ref[^>/]*/>", re.IGNORECASE),
+    re.compile(r"<ref[^>]*>.*?</ref>", re.IGNORECASE | re.DOTALL),
+    re.compile(r"<(gallery|math|score|syntaxhighlight|timeline)[^>]*>.*?</\1>", re.IGNORECASE | re.DOTALL),
+    re.compile(r"__[A-Z]+__"),
+]
+WIKITEXT_MEDIA_LINK = re.compile(
+    r"\[\[(?:File|Ficheiro|Arquivo|Imagem|Image|Categoria|Category):[^\[\]]*\]\]", re.IGNORECASE
+)
+WIKITEXT_LINK = re.compile(r"\[\[(?!(?:File|Ficheiro|Arquivo|Imagem|Image|Categoria|Category):)(?:[^\[\]|]*\|)?([^\[\]|]*)\]\]", re.IGNORECASE)
+WIKITEXT_EXTERNAL_LINK = re.compile(r"\[(?:https?:)?//[^\s\]]+\s*([^\]]*)\]")
+WIKITEXT_HEADING = re.compile(r"^(=+)\s*(.*?)\s*\1\s*$", re.MULTILINE)
+WIKITEXT_FORMATTING = re.compile(r"'{2,}")
+WIKITEXT_TAG = re.compile(r"</?[a-zA-Z][^>]*>")
+WIKITEXT_LIST_MARKER = re.compile(r"^[*#:;]+\s*", re.MULTILINE)
+
+class NoArticleTextError(Exception):
+    """
+    Raised when the page is the MediaWiki "no article with this name" placeholder.
+    """
+
+def normalize_lines(text: str) -> str:
+    lines = [ln.strip() for ln in text.splitlines()]
+    cleaned_lines = []
+    last_blank = False
+    for ln in lines:
+        if not ln:
+            if not last_blank:
+                cleaned_lines.append("")
+            last_blank = True
+        else:
+            cleaned_lines.append(ln)
+            last_blank = False
+
+    return "\n".join(cleaned_lines).strip()
+
+def canonical_title(raw_text: str) -> Optional[str]:
+    """
+    Title the page is served under after redirects, from its canonical link.
+    """
+    match = CANONICAL_LINK.search(raw_text)
+
+    return unquote(match.group(1)).replace("_", " ") if match else None
+
+def revision_id(raw_text: str) -> Optional[int]:
+    """
+    Revision the page was rendered from, from the MediaWiki page config.
+    """
+    match = REVISION_ID.search(raw_text)
+
+    if not match:
+        return None
+
+    # Placeholder pages (e.g. "no article with this name") report revision 0.
+    return int(match.group(1)) or None
+
+def _clean_with_bs4(raw_text: str) -> str:
+    """
+    Reference backend: BeautifulSoup on the pure-Python html.parser.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(raw_text, "html.parser")
+
+    if soup.select_one("div.noarticletext"):
+        raise NoArticleTextError()
+
+    content = soup.select_one("div#mw-content-text") or soup
+
+    for tag in content.select(REMOVED_SELECTOR):
+        tag.decompose()
+
+    return normalize_lines(content.get_text(separator="\n", strip=True))
+
+def _clean_with_lxml(raw_text: str) -> str:
+    """
+    Fast backend: libxml2 through lxml.html, producing the same text as the reference.
+    """
+    import lxml.html
+    from lxml import etree
+
+    if not raw_text.strip():
+        return ''
+
+    raw_text = XML_DECLARATION.sub('', raw_text, count=1)
+    if '<![CDATA[' in raw_text:
+        raw_text = CDATA_SECTION.sub(lambda match: f'<span>{html.escape(match.group(1), quote=False)}</span>', raw_text)
+
+    # Malformed entity references are still resolved differently: html.parser
+    # also expands a known name followed by letters ("&notin x" as "∉ x") and drops
+    # the ";" of unknown ones ("&unknown;" as "&unknown"), where libxml2 follows
+    # the HTML spec ("¬in x", "&unknown;"). MediaWiki only emits well-formed
+    # references, so rendered pages clean the same on both backends.
+    root = lxml.html.document_fromstring(raw_text)
+
+    if root.xpath(_has_class("div", "noarticletext")):
+        raise NoArticleTextError()
+
+    content = next(iter(root.xpath(".//div[@id='mw-content-text']")), root)
+    removed = set(content.xpath(REMOVED_XPATH))
+
+    # Walk the tree instead of dropping nodes, so every text node stays a separate
+    # string (as with BeautifulSoup.decompose) and tails come after the subtree.
+    strings: list[str] = []
+    walker = etree.iterwalk(content, events=("start", "end", "comment", "pi"))
+    for event, element in walker:
+        if event == "start":
+            if element in removed:
+                walker.skip_subtree()
+            elif element.text:
+                strings.append(element.text)
+        elif element is not content and element.tail:
+            # "end" of an element, or a comment/processing instruction whose own
+            # text is dropped like BeautifulSoup does.
+            strings.append(element.tail)
+
+    return normalize_lines("\n".join(s.strip() for s in strings if s.strip()))
+
+def _remove_nested(pattern: re.Pattern, text: str) -> str:
+    # Remove innermost matches until none is left, so nested blocks go as a whole.
+    while True:
+        text, count = pattern.subn("", text)
+        if not count:
+            return text
+
+def clean_wikitext(raw_text: str) -> str:
+    """
+    Extract the article text from wikitext (the page source found in the dumps),
+    dropping the same kind of content as clean_html.
+    """
+    text = raw_text
+
+    for pattern in WIKITEXT_REMOVED:
+        text = pattern.sub("", text)
+    for pattern in WIKITEXT_INNERMOST:
+        text = _remove_nested(pattern, text)
+
+    # Plain links first, so media captions holding links become removable.
+    while True:
+        text, count = WIKITEXT_LINK.subn(r"\1", text)
+        if not count:
+            break
+
+    text = _remove_nested(WIKITEXT_MEDIA_LINK, text)
+    text = WIKITEXT_EXTERNAL_LINK.sub(r"\1", text)
+    text = WIKITEXT_HEADING.sub(r"\2", text)
+    text = WIKITEXT_FORMATTING.sub("", text)
+    text = WIKITEXT_TAG.sub("", text)
+    text = WIKITEXT_LIST_MARKER.sub("", text)
+
+    return normalize_lines(html.unescape(text))
+
+CLEANER_BACKENDS: dict[str, Callable[[str], str]] = {
+    'html.parser': _clean_with_bs4,
+    'lxml': _clean_with_lxml,
+}
+
+def clean_html(raw_text: str, backend: Optional[str] = None) -> str:
+    """
+    Extract the article text from a rendered Wikipedia page.
+    """
+    return CLEANER_BACKENDS[backend or HTML_CLEANER_BACKEND](raw_text)
+
+def clean_pages(pages: list[tuple[str, str]]) -> list[str]:
+    """
+    Clean a batch of (format, raw text) pages, format being "html", "wikitext" or
+    "text", in one call (one round trip to a pool worker). Pages with no article
+    text come back empty.
+    """
+    cleaned: list[str] = []
+
+    for raw_format, raw_text in pages:
+        if raw_format == "wikitext":
+            cleaned.append(clean_wikitext(raw_text))
+        elif raw_format == "text":
+            cleaned.append(normalize_lines(raw_text))
+        else:
+            try:
+                cleaned.append(clean_html(raw_text))
+            except NoArticleTextError:
+                cleaned.append("")
+
+    return cleaned
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_slots: Optional[asyncio.Semaphore] = None
+_pool_slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+
+    if _pool is None:
+        # spawn avoids forking a process that already runs the event loop and
+        # the HTTP/DB client threads.
+        _pool = ProcessPoolExecutor(
+            max_workers=HTML_CLEANER_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+
+    return _pool
+
+async def clean_html_async(raw_text: str, backend: Optional[str] = None) -> str:
+    """
+    Run clean_html on the process pool so large pages don't hold the event loop.
+
+    In-flight jobs are bounded to twice the pool size; with HTML_CLEANER_WORKERS=0
+    the cleaning runs inline.
+    """
+    global _pool_slots, _pool_slots_loop
+
+    if HTML_CLEANER_WORKERS <= 0:
+        return clean_html(raw_text, backend)
+
+    loop = asyncio.get_running_loop()
+
+    if _pool_slots is None or _pool_slots_loop is not loop:
+        _pool_slots = asyncio.Semaphore(HTML_CLEANER_WORKERS * 2)
+        _pool_slots_loop = loop
+
+    async with _pool_slots:
+        return await loop.run_in_executor(_get_pool(), clean_html, raw_text, backend)
+
+def shutdown_cleaner_pool() -> None:
+    global _pool, _pool_slots, _pool_slots_loop
+
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+
+    _pool = None
+    _pool_slots = None
+    _pool_slots_loop = None
@@ -0,0 +1,68 @@
+import asyncio
+import os
+from typing import Optional
+
+import httpx
+
+WIKI_HTTP_TIMEOUT = float(os.getenv('WIKI_HTTP_TIMEOUT', '15'))
+WIKI_HTTP_CONNECT_TIMEOUT = float(os.getenv('WIKI_HTTP_CONNECT_TIMEOUT', '5'))
+WIKI_HTTP_MAX_CONNECTIONS = int(os.getenv('WIKI_HTTP_MAX_CONNECTIONS', '100'))
+WIKI_HTTP_MAX_KEEPALIVE = int(os.getenv('WIKI_HTTP_MAX_KEEPALIVE', '20'))
+WIKI_HTTP_KEEPALIVE_EXPIRY = float(os.getenv('WIKI_HTTP_KEEPALIVE_EXPIRY', '30'))
+WIKI_HTTP2 = os.getenv('WIKI_HTTP2', '1') == '1'
+
+DEFAULT_HEADERS: dict = {
+    "User-Agent": "Mozilla/5.0 (compatible; WikipediaFetcher/1.0; +https://example.com)",
+    "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
+}
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def build_http_client() -> httpx.AsyncClient:
+    """
+    Build the pooled client used for Wikipedia fetches.
+
+    The client only talks to Wikipedia, so the pool limits are effectively the
+    per-host connection limits.
+    """
+    return httpx.AsyncClient(
+        headers=DEFAULT_HEADERS,
+        http2=WIKI_HTTP2,
+        follow_redirects=True,
+        timeout=httpx.Timeout(WIKI_HTTP_TIMEOUT, connect=WIKI_HTTP_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=WIKI_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=WIKI_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=WIKI_HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared client, creating it on first use.
+
+    Pooled connections belong to the event loop that opened them, so a client
+    created on another (already finished) loop is replaced instead of reused.
+    """
+    global _client, _client_loop
+
+    loop = asyncio.get_running_loop()
+
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = build_http_client()
+        _client_loop = loop
+
+    return _client
+
+async def open_http_client() -> httpx.AsyncClient:
+    return get_http_client()
+
+async def close_http_client() -> None:
+    global _client, _client_loop
+
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+
+    _client = None
+    _client_loop = None
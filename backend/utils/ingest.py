@@ -0,0 +1,341 @@
+import asyncio
+import bz2
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+from xml.etree import ElementTree
+
+from sqlalchemy import String, column, insert as sa_insert, select, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import AsyncSessionLocal
+
+from models import Article, ArticleAlias, SummaryJob
+
+from utils import mediawiki
+from utils.html_cleaner import clean_pages
+from utils.missing_pages import remember_missing
+from utils.wiki_extractor import WikipediaPageNotFoundError
+from utils.wiki_extractor import WikipediaTextExtractor
+from utils.wiki_extractor import normalize_word
+from utils.wiki_extractor import save_articles
+
+logger = logging.getLogger(__name__)
+
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '500'))
+INGEST_FETCH_CONCURRENCY = int(os.getenv('INGEST_FETCH_CONCURRENCY', '8'))
+
+@dataclass
+class Page:
+    """
+    An article to ingest: `slug` is the requested term (or dump title) it is saved
+    under, `title` its canonical title, `raw_format` as accepted by clean_pages.
+    Redirect pages carry only `redirect`, the title they point to.
+    """
+    slug: str
+    title: str
+    raw_format: str = 'wikitext'
+    raw_text: str = ''
+    revision_id: Optional[int] = None
+    redirect: Optional[str] = None
+
+class Checkpoint:
+    """
+    Number of source entries already ingested, saved after every committed batch
+    so an interrupted run resumes where it stopped, and the dump redirects whose
+    target was not saved yet (appended to `<path>.redirects`, one JSON pair per line).
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.redirects_path = f"{path}.redirects"
+
+    def load(self) -> int:
+        try:
+            with open(self.path) as f:
+                return int(json.load(f)["position"])
+        except FileNotFoundError:
+            return 0
+
+    def save(self, position: int) -> None:
+        tmp = f"{self.path}.tmp"
+
+        with open(tmp, "w") as f:
+            json.dump({"position": position}, f)
+
+        os.replace(tmp, self.path)
+
+    def add_redirects(self, redirects: list[tuple[str, str]]) -> None:
+        if not redirects:
+            return
+
+        with open(self.redirects_path, "a") as f:
+            f.writelines(json.dumps(redirect) + "\n" for redirect in redirects)
+
+    def iter_redirects(self) -> Iterator[tuple[str, str]]:
+        try:
+            with open(self.redirects_path) as f:
+                for line in f:
+                    alias_slug, target = json.loads(line)
+                    yield alias_slug, target
+        except FileNotFoundError:
+            return
+
+    def clear_redirects(self) -> None:
+        try:
+            os.remove(self.redirects_path)
+        except FileNotFoundError:
+            pass
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+def iter_dump_pages(path: str) -> Iterator[Page]:
+    """
+    Stream the main namespace pages of a pages-articles XML dump (optionally .bz2)
+    in constant memory: each page is dropped from the tree once read.
+    """
+    opener = bz2.open if path.endswith(".bz2") else open
+
+    with opener(path, "rb") as f:
+        events = ElementTree.iterparse(f, events=("start", "end"))
+        _, root = next(events)
+
+        for event, element in events:
+            if event != "end" or _local_name(element.tag) != "page":
+                continue
+
+            if element.findtext("{*}ns") == "0":
+                title = element.findtext("{*}title") or ""
+                redirect = element.find("{*}redirect")
+                revision_id = element.findtext("{*}revision/{*}id")
+
+                yield Page(
+                    slug=normalize_word(title).lower(),
+                    title=title,
+                    raw_text=element.findtext("{*}revision/{*}text") or "",
+                    revision_id=int(revision_id) if revision_id else None,
+                    redirect=redirect.get("title") if redirect is not None else None,
+                )
+
+            root.clear()
+
+def iter_terms(path: str) -> Iterator[str]:
+    """
+    Terms from a text file, one per line; blank lines and # comments are skipped.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            term = line.strip()
+
+            if term and not term.startswith("#"):
+                yield term
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+async def stored_slugs(slugs: list[str]) -> set[str]:
+    async with AsyncSessionLocal() as session:
+        return set(await session.scalars(
+            select(ArticleAlias.alias_slug).where(ArticleAlias.alias_slug.in_(slugs))
+            .union(select(Article.word_slug).where(Article.word_slug.in_(slugs)))
+        ))
+
+async def fetch_terms(terms: list[str]) -> list[Page]:
+    """
+    Fetch the articles of the terms not saved yet: in batches through the action
+    API with WIKI_FETCH_BACKEND=api, otherwise one page at a time (bounded).
+    """
+    words = {normalize_word(term).lower(): normalize_word(term) for term in terms if normalize_word(term)}
+    stored = await stored_slugs(list(words))
+    words = {slug: word for slug, word in words.items() if slug not in stored}
+    missing: list[str] = []
+    pages: list[Page] = []
+
+    if mediawiki.WIKI_FETCH_BACKEND == 'api':
+        for word, extract in (await mediawiki.fetch_extracts(list(words.values()))).items():
+            if extract is None:
+                missing.append(word.lower())
+            else:
+                pages.append(Page(word.lower(), extract.title, 'text', extract.text, extract.revision_id))
+    else:
+        semaphore = asyncio.Semaphore(INGEST_FETCH_CONCURRENCY)
+
+        async def _fetch(word: str) -> None:
+            extractor = WikipediaTextExtractor(word)
+
+            async with semaphore:
+                try:
+                    await extractor.fecth_article()
+                except WikipediaPageNotFoundError:
+                    missing.append(extractor.word_slug)
+                    return
+                except Exception as e:
+                    logger.warning('Could not fetch "%s": %r', word, e)
+                    return
+
+            pages.append(Page(
+                extractor.word_slug,
+                extractor.canonical_title or word,
+                'html',
+                extractor.raw_text,
+                extractor.revision_id,
+            ))
+
+        await asyncio.gather(*[_fetch(word) for word in words.values()])
+
+    await remember_missing(missing)
+
+    return pages
+
+async def clean_batch(pages: list[Page], executor: Optional[Executor]) -> list[str]:
+    """
+    Clean the pages across the process pool, one chunk per worker.
+    """
+    items = [(page.raw_format, page.raw_text) for page in pages]
+
+    if executor is None:
+        return clean_pages(items)
+
+    loop = asyncio.get_running_loop()
+    workers = getattr(executor, "_max_workers", 1)
+    chunks = list(batched(items, max(1, -(-len(items) // workers))))
+    cleaned = await asyncio.gather(*[loop.run_in_executor(executor, clean_pages, chunk) for chunk in chunks])
+
+    return [text for chunk in cleaned for text in chunk]
+
+async def save_redirects(session: AsyncSession, redirects: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    """
+    Save (alias_slug, target slug) redirects as aliases of their target article.
+    Returns the redirects whose target is not saved (yet).
+    """
+    if not redirects:
+        return []
+
+    saved = set(await session.scalars(
+        select(Article.word_slug).where(Article.word_slug.in_({target for _, target in redirects}))
+    ))
+    targets = values(column("alias_slug", String), column("target", String), name="redirect").data(redirects)
+
+    await session.execute(
+        insert(ArticleAlias)
+        .from_select(
+            ["alias_slug", "article_id"],
+            select(targets.c.alias_slug, Article.id).join(Article, Article.word_slug == targets.c.target),
+        )
+        .on_conflict_do_nothing()
+    )
+
+    return [redirect for redirect in redirects if redirect[1] not in saved]
+
+async def save_batch(
+    pages: list[Page],
+    texts: list[str],
+    word_count: Optional[int] = None,
+) -> tuple[int, list[tuple[str, str]]]:
+    """
+    Save a cleaned batch in one transaction: articles and their aliases with
+    multi-row inserts, dump redirects as aliases of their target, and, with
+    word_count, one summary job per new article. Returns the number of articles
+    created and the redirects whose target is not saved yet (see resolve_redirects).
+    """
+    articles = {
+        page.slug: {"word": page.title.replace(" ", "_"), "clean_text": text, "revision_id": page.revision_id}
+        for page, text in zip(pages, texts)
+        if page.redirect is None and text
+    }
+    redirects = [(page.slug, page.redirect.replace(" ", "_").lower()) for page in pages if page.redirect]
+    created: list[str] = []
+
+    async with AsyncSessionLocal() as session:
+        if articles:
+            saved = await save_articles(session, articles)
+            # Jobs take the canonical title as a term (spaces, not underscores) so
+            # normalize_word gives back the article's slug and URL.
+            created = [articles[slug]["word"].replace("_", " ") for slug, (_, is_new) in saved.items() if is_new]
+
+        unresolved = await save_redirects(session, redirects)
+
+        if word_count and created:
+            await session.execute(
+                sa_insert(SummaryJob).values([{"word": word, "word_count": word_count} for word in created])
+            )
+
+        await session.commit()
+
+    return len(created), unresolved
+
+async def resolve_redirects(checkpoint: Checkpoint, batch_size: int) -> int:
+    """
+    Final pass over the redirects saved before their target: by now every
+    article of the dump is saved. Returns the redirects still without a target
+    (pointing out of the main namespace, to another redirect or to an empty page).
+    """
+    dropped = 0
+
+    for redirects in batched(checkpoint.iter_redirects(), batch_size):
+        async with AsyncSessionLocal() as session:
+            dropped += len(await save_redirects(session, redirects))
+            await session.commit()
+
+    checkpoint.clear_redirects()
+
+    return dropped
+
+def create_executor(workers: int) -> Optional[ProcessPoolExecutor]:
+    if workers <= 0:
+        return None
+
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+async def ingest(
+    source: str,
+    path: str,
+    checkpoint: Checkpoint,
+    batch_size: Optional[int] = None,
+    word_count: Optional[int] = None,
+    workers: int = 0,
+) -> int:
+    """
+    Ingest a terms file (source "terms") or a pages-articles dump (source "dump"),
+    resuming after the position saved in the checkpoint. Returns the articles created.
+    """
+    position = checkpoint.load()
+    entries = iter_terms(path) if source == "terms" else iter_dump_pages(path)
+    executor = create_executor(workers)
+    total = 0
+
+    try:
+        for batch in batched(itertools.islice(entries, position, None), batch_size or INGEST_BATCH_SIZE):
+            pages = await fetch_terms(batch) if source == "terms" else batch
+            texts = await clean_batch([page for page in pages if page.redirect is None], executor)
+            texts_iter = iter(texts)
+            page_texts = ["" if page.redirect else next(texts_iter) for page in pages]
+
+            created, unresolved = await save_batch(pages, page_texts, word_count)
+            total += created
+            position += len(batch)
+            checkpoint.add_redirects(unresolved)
+            checkpoint.save(position)
+
+            logger.info('%s entries read, %s articles created.', position, total)
+
+        # Dump redirects may come before their target article.
+        dropped = await resolve_redirects(checkpoint, batch_size or INGEST_BATCH_SIZE)
+
+        if dropped:
+            logger.info('%s redirects to pages not ingested were skipped.', dropped)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    return total
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import os
+from datetime import timedelta
+from typing import Any, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+
+from db import AsyncSessionLocal
+
+from models import SummaryJob
+
+from schemas import WikiExtractorError
+
+from utils import metrics
+from utils.wiki_extractor import WikipediaTextExtractor
+
+logger = logging.getLogger(__name__)
+
+# Workers started inside each API process (0: the API only enqueues and the jobs
+# are run by `python worker.py`).
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+JOB_RETRY_DELAY = float(os.getenv('JOB_RETRY_DELAY', '10'))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '1'))
+JOB_LEASE_TIMEOUT = float(os.getenv('JOB_LEASE_TIMEOUT', '600'))
+JOB_SHUTDOWN_TIMEOUT = float(os.getenv('JOB_SHUTDOWN_TIMEOUT', '30'))
+
+JOB_FAILED_MESSAGE = 'Erro ao gerar o resumo para o termo solicitado.'
+
+_pool: Optional["JobWorkerPool"] = None
+
+async def enqueue_job(
+    word: str,
+    word_count: int,
+    tolerance: Optional[int] = None,
+    derive: Optional[bool] = None,
+) -> SummaryJob:
+    job = SummaryJob(word=word.strip(), word_count=word_count, tolerance=tolerance, derive=derive)
+
+    async with AsyncSessionLocal() as session:
+        session.add(job)
+        await session.commit()
+        await session.refresh(job)
+
+    if _pool is not None:
+        _pool.notify()
+
+    return job
+
+async def get_job(job_id: str) -> Optional[SummaryJob]:
+    async with AsyncSessionLocal() as session:
+        return await session.get(SummaryJob, job_id)
+
+async def claim_job() -> Optional[Any]:
+    """
+    Take the oldest runnable job: a queued one whose run_after has passed, or one
+    still running JOB_LEASE_TIMEOUT after it was claimed (its worker died).
+
+    An expired job that already used its JOB_MAX_ATTEMPTS (e.g. one that keeps
+    killing its worker) is marked failed instead of being claimed again.
+    """
+    expired = and_(
+        SummaryJob.status == 'running',
+        SummaryJob.locked_at < func.now() - timedelta(seconds=JOB_LEASE_TIMEOUT),
+    )
+    runnable = (
+        select(SummaryJob.id)
+        .where(or_(
+            and_(SummaryJob.status == 'queued', SummaryJob.run_after <= func.now()),
+            and_(expired, SummaryJob.attempts < JOB_MAX_ATTEMPTS),
+        ))
+        .order_by(SummaryJob.run_after)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(SummaryJob)
+            .where(expired, SummaryJob.attempts >= JOB_MAX_ATTEMPTS)
+            .values(status='failed', error=JOB_FAILED_MESSAGE, locked_at=None)
+            .execution_options(synchronize_session=False)
+        )
+
+        job = (await session.execute(
+            update(SummaryJob)
+            .where(SummaryJob.id.in_(runnable))
+            .values(status='running', attempts=SummaryJob.attempts + 1, locked_at=func.now())
+            .returning(
+                SummaryJob.id, SummaryJob.word, SummaryJob.word_count,
+                SummaryJob.tolerance, SummaryJob.derive, SummaryJob.attempts,
+            )
+            .execution_options(synchronize_session=False)
+        )).first()
+        await session.commit()
+
+    return job
+
+async def update_job(job_id: str, **values: Any) -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(SummaryJob)
+            .where(SummaryJob.id == job_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+async def run_job(job: Any) -> None:
+    """
+    Run the summary pipeline for a claimed job and record the outcome. Errors are
+    retried with exponential backoff up to JOB_MAX_ATTEMPTS; a missing page is final.
+    """
+    extractor = WikipediaTextExtractor(
+        word=job.word,
+        word_count=job.word_count,
+        tolerance=job.tolerance,
+        derive=job.derive,
+    )
+
+    try:
+        result = await extractor.extract()
+    except asyncio.CancelledError:
+        # Shutting down: hand the job back without spending an attempt.
+        await update_job(job.id, status='queued', attempts=job.attempts - 1, locked_at=None)
+        raise
+    except Exception as e:
+        logger.warning('Job %s failed (attempt %s): %r', job.id, job.attempts, e)
+
+        if job.attempts < JOB_MAX_ATTEMPTS:
+            delay = timedelta(seconds=JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+            await update_job(job.id, status='queued', run_after=func.now() + delay, locked_at=None)
+        else:
+            await update_job(job.id, status='failed', url=extractor.url, error=JOB_FAILED_MESSAGE, locked_at=None)
+
+        return
+
+    if isinstance(result, WikiExtractorError):
+        await update_job(job.id, status='failed', url=result.url, error=result.message, locked_at=None)
+    else:
+        await update_job(job.id, status='done', url=result.url, summary_text=result.summary, locked_at=None)
+
+class JobWorkerPool:
+    """
+    A bounded number of workers claiming jobs from wiki_summary_job. Jobs are
+    claimed with SKIP LOCKED, so any number of pools (API processes or
+    `python worker.py`) can share the queue.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self.busy = 0
+        self._tasks: list[asyncio.Task] = []
+        self._stopping: Optional[asyncio.Event] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        metrics.job_workers_busy.set_function(lambda: self.busy)
+
+    def notify(self) -> None:
+        """
+        Wake idle workers up without waiting for the next poll.
+        """
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = await claim_job()
+            except Exception:
+                logger.exception('Could not claim a job.')
+                job = None
+
+            if job is not None:
+                self.busy += 1
+                try:
+                    await run_job(job)
+                except Exception:
+                    # E.g. the result could not be recorded: the job is claimed
+                    # again once its lease expires, and this worker goes on.
+                    logger.exception('Job %s could not be run.', job.id)
+                finally:
+                    self.busy -= 1
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop claiming jobs and let the running ones finish for up to `timeout`
+        seconds; jobs still running after that are cancelled and requeued.
+        """
+        if not self._tasks:
+            return
+
+        self._stopping.set()
+        self._wakeup.set()
+
+        _, pending = await asyncio.wait(self._tasks, timeout=JOB_SHUTDOWN_TIMEOUT if timeout is None else timeout)
+
+        for task in pending:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+def start_job_workers(workers: Optional[int] = None) -> None:
+    global _pool
+
+    workers = JOB_WORKERS if workers is None else workers
+
+    if workers > 0 and _pool is None:
+        _pool = JobWorkerPool(workers)
+        _pool.start()
+
+async def stop_job_workers() -> None:
+    global _pool
+
+    if _pool is not None:
+        await _pool.stop()
+
+    _pool = None
@@ -0,0 +1,17 @@
+import logging
+import os
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+
+def configure_logging() -> None:
+    """
+    Send the records of the application's module loggers (utils.*) to stderr at
+    LOG_LEVEL, leaving the level of library loggers (httpx, sqlalchemy) alone.
+    """
+    logger = logging.getLogger('utils')
+    logger.setLevel(LOG_LEVEL)
+
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+        logger.addHandler(handler)
@@ -0,0 +1,164 @@
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from utils.http_client import get_http_client
+from utils.rate_limiter import ConcurrencyLimiter
+
+WIKI_API_URL = os.getenv('WIKI_API_URL', 'https://pt.wikipedia.org/w/api.php')
+
+# 'html' scrapes the rendered page (reference behaviour); 'api' requests plaintext
+# extracts from the MediaWiki action API.
+WIKI_FETCH_BACKEND = os.getenv('WIKI_FETCH_BACKEND', 'html')
+
+# Maximum number of titles per action API query.
+WIKI_API_BATCH_SIZE = 50
+
+# Action API queries in flight at once, across all callers.
+WIKI_API_CONCURRENCY = int(os.getenv('WIKI_API_CONCURRENCY', '4'))
+
+api_limiter = ConcurrencyLimiter(max_concurrency=WIKI_API_CONCURRENCY)
+
+@dataclass
+class WikiExtract:
+    title: str
+    text: str
+    revision_id: Optional[int] = None
+
+def _chunks(items: list[str], size: int) -> list[list[str]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _resolve(title: str, normalized: dict[str, str], redirects: dict[str, str]) -> str:
+    title = normalized.get(title, title)
+    seen = {title}
+
+    while title in redirects and redirects[title] not in seen:
+        title = redirects[title]
+        seen.add(title)
+
+    return title
+
+def _query_params(titles: list[str]) -> dict:
+    return {
+        "action": "query",
+        "format": "json",
+        "formatversion": "2",
+        "prop": "extracts|revisions",
+        "rvprop": "ids",
+        "explaintext": "1",
+        "exsectionformat": "plain",
+        "exlimit": "max",
+        "redirects": "1",
+        "titles": "|".join(titles),
+    }
+
+async def _query(params: dict) -> dict:
+    async with api_limiter.slot():
+        resp = await get_http_client().get(WIKI_API_URL, params=params)
+
+    resp.raise_for_status()
+
+    return resp.json()
+
+async def _query_batch(batch: list[str]) -> tuple[dict[str, Optional[WikiExtract]], dict[str, list[str]]]:
+    """
+    One query for a batch of titles, which resolves every title (normalization,
+    redirects, missing pages) but only carries the full text of one page.
+
+    Returns the extracts complete after it and, for the other pages, the
+    requested titles by canonical title.
+    """
+    query = (await _query(_query_params(batch))).get("query", {})
+
+    normalized = {item["from"]: item["to"] for item in query.get("normalized", [])}
+    redirects = {item["from"]: item["to"] for item in query.get("redirects", [])}
+    texts: dict[str, str] = {}
+    revisions: dict[str, int] = {}
+    missing: set[str] = set()
+
+    for page in query.get("pages", []):
+        if page.get("missing") or page.get("invalid"):
+            missing.add(page["title"])
+            continue
+
+        if page.get("extract"):
+            texts[page["title"]] = page["extract"]
+        if page.get("revisions"):
+            revisions[page["title"]] = page["revisions"][0]["revid"]
+
+    results: dict[str, Optional[WikiExtract]] = {}
+    pending: dict[str, list[str]] = {}
+
+    for title in batch:
+        canonical = _resolve(title, normalized, redirects)
+
+        if canonical in missing:
+            results[title] = None
+        elif canonical in texts:
+            results[title] = WikiExtract(title=canonical, text=texts[canonical], revision_id=revisions.get(canonical))
+        else:
+            pending.setdefault(canonical, []).append(title)
+
+    return results, pending
+
+async def _query_extract(canonical: str) -> WikiExtract:
+    """
+    The extract of one page, by its canonical title; a single-page query
+    returns the whole text at once.
+    """
+    pages = (await _query(_query_params([canonical]))).get("query", {}).get("pages", [])
+    page = next((page for page in pages if page.get("title") == canonical), {})
+    revisions = page.get("revisions") or [{}]
+
+    return WikiExtract(title=canonical, text=page.get("extract", ''), revision_id=revisions[0].get("revid"))
+
+async def iter_extracts(titles: list[str]) -> AsyncIterator[tuple[str, Optional[WikiExtract]]]:
+    """
+    Yield (title, extract) for every requested title as soon as its text is
+    fetched, with redirects resolved by the server; the extract is None when
+    the page does not exist.
+
+    TextExtracts only returns one full-article extract per response: titles
+    are resolved WIKI_API_BATCH_SIZE at a time, then the other pages of each
+    batch are fetched one per query, concurrently (up to WIKI_API_CONCURRENCY).
+    """
+    batches = _chunks(list(dict.fromkeys(titles)), WIKI_API_BATCH_SIZE)
+    pages: dict[asyncio.Future, list[str]] = {}
+    tasks: set[asyncio.Future] = {asyncio.ensure_future(_query_batch(batch)) for batch in batches}
+
+    try:
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                if task in pages:
+                    extract = task.result()
+
+                    for title in pages.pop(task):
+                        yield title, extract
+                    continue
+
+                results, pending = task.result()
+
+                for canonical, requested in pending.items():
+                    page = asyncio.ensure_future(_query_extract(canonical))
+                    pages[page] = requested
+                    tasks.add(page)
+
+                for title, extract in results.items():
+                    yield title, extract
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def fetch_extracts(titles: list[str]) -> dict[str, Optional[WikiExtract]]:
+    """
+    Fetch the plaintext extracts of the titles (see iter_extracts).
+
+    Returns one entry per requested title, in order: the extract under its
+    canonical title, or None when the page does not exist.
+    """
+    extracts = {title: extract async for title, extract in iter_extracts(titles)}
+
+    return {title: extracts[title] for title in dict.fromkeys(titles)}
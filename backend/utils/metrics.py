@@ -0,0 +1,80 @@
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import CONTENT_TYPE_LATEST, Gauge, Histogram, generate_latest
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+BYTE_BUCKETS = tuple(1024 * 4 ** i for i in range(9))
+
+STAGES = ('db_lookup', 'fetch', 'clean', 'llm', 'save')
+
+# How a summary request was answered: response_cache (serialized response in
+# memory), cache_hit (summary in memory), hit (saved summary), partial_hit (saved
+# article or longer summary, LLM call), miss (article fetched from Wikipedia),
+# not_found, coalesced (waited for an identical request) or error.
+OUTCOMES = ('response_cache', 'cache_hit', 'hit', 'partial_hit', 'miss', 'not_found', 'coalesced', 'error')
+
+stage_seconds = Histogram(
+    'wiki_stage_duration_seconds',
+    'Duration of each summary pipeline stage.',
+    ['stage'],
+    buckets=LATENCY_BUCKETS,
+)
+summary_seconds = Histogram(
+    'wiki_summary_duration_seconds',
+    'Duration of summary requests, by outcome.',
+    ['outcome'],
+    buckets=LATENCY_BUCKETS,
+)
+llm_wait_seconds = Histogram(
+    'wiki_llm_queue_wait_seconds',
+    'Time LLM calls waited for the local limiter (concurrency and per-minute limits).',
+    buckets=LATENCY_BUCKETS,
+)
+llm_tokens = Histogram(
+    'wiki_llm_tokens',
+    'Tokens per LLM call.',
+    ['kind'],
+    buckets=TOKEN_BUCKETS,
+)
+article_bytes = Histogram(
+    'wiki_article_bytes',
+    'Size of articles, as downloaded (raw), after cleaning (clean) and as stored, compressed (zstd).',
+    ['kind'],
+    buckets=BYTE_BUCKETS,
+)
+
+# Saturation, read when /metrics is scraped (see the set_function calls next to
+# each pool).
+llm_queue_depth = Gauge('wiki_llm_queue_depth', 'LLM calls waiting for the local limiter.')
+llm_in_flight = Gauge('wiki_llm_in_flight', 'LLM calls in progress.')
+db_pool_checked_out = Gauge('wiki_db_pool_checked_out', 'Database connections in use.')
+db_pool_capacity = Gauge('wiki_db_pool_capacity', 'Database connections allowed (pool size plus overflow).')
+job_workers_busy = Gauge('wiki_job_workers_busy', 'Job workers running a job.')
+
+# Label children resolved once, off the hot path.
+_stages = {stage: stage_seconds.labels(stage) for stage in STAGES}
+_outcomes = {outcome: summary_seconds.labels(outcome) for outcome in OUTCOMES}
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """
+    Observe the duration of the block as pipeline `stage`, also when it raises.
+    """
+    started_at = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        _stages[stage].observe(time.perf_counter() - started_at)
+
+def observe_summary(outcome: str, seconds: float) -> None:
+    _outcomes[outcome].observe(seconds)
+
+def render() -> tuple[bytes, str]:
+    """
+    The metrics of this process in the Prometheus text format, with its content type.
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
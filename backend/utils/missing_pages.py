@@ -0,0 +1,90 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from db import AsyncSessionLocal
+
+from models import MissingPage
+
+from utils.cache import LRUCache
+
+# How long a term with no Wikipedia article is answered as not found without
+# asking Wikipedia again.
+MISSING_PAGE_TTL = float(os.getenv('MISSING_PAGE_TTL', str(24 * 60 * 60)))
+MISSING_PAGE_CACHE_MAX_BYTES = int(os.getenv('MISSING_PAGE_CACHE_MAX_BYTES', str(4 * 1024 * 1024)))
+
+# In-memory filter in front of wiki_missing_page: known missing slugs, each kept
+# no longer than its row.
+missing_cache = LRUCache(max_bytes=MISSING_PAGE_CACHE_MAX_BYTES, ttl=MISSING_PAGE_TTL)
+
+def is_known_missing(word_slug: str) -> bool:
+    """
+    Check the in-memory filter only; no I/O.
+    """
+    return missing_cache.get(word_slug) is not None
+
+async def is_missing(word_slug: str) -> bool:
+    """
+    Check the in-memory filter, then the table, caching a hit for the rest of its TTL.
+    """
+    if is_known_missing(word_slug):
+        return True
+
+    async with AsyncSessionLocal() as session:
+        expires_at: Optional[datetime] = await session.scalar(
+            select(MissingPage.expires_at)
+            .where(MissingPage.word_slug == word_slug, MissingPage.expires_at > func.now())
+        )
+
+    if expires_at is None:
+        return False
+
+    missing_cache.set(word_slug, True, ttl=(expires_at - datetime.now(timezone.utc)).total_seconds())
+
+    return True
+
+async def remember_missing(word_slugs: list[str]) -> None:
+    """
+    Record terms with no Wikipedia article, restarting the TTL of known ones.
+    """
+    word_slugs = list(dict.fromkeys(slug for slug in word_slugs if slug))
+
+    if not word_slugs or MISSING_PAGE_TTL <= 0:
+        return
+
+    expires_at = func.now() + timedelta(seconds=MISSING_PAGE_TTL)
+    stmt = insert(MissingPage).values([{"word_slug": slug, "expires_at": expires_at} for slug in word_slugs])
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=[MissingPage.word_slug],
+            set_={"expires_at": stmt.excluded.expires_at, "updated_at": func.now()},
+        ))
+        await session.commit()
+
+    for slug in word_slugs:
+        missing_cache.set(slug, True)
+
+async def purge_missing(word_slug: Optional[str] = None) -> int:
+    """
+    Forget one term (or all of them, and any expired rows). Returns the rows deleted.
+
+    Only this process's in-memory filter is cleared; other workers keep theirs
+    until their entries expire.
+    """
+    stmt = delete(MissingPage)
+
+    if word_slug is not None:
+        stmt = stmt.where(MissingPage.word_slug == word_slug)
+        missing_cache.invalidate(word_slug)
+    else:
+        missing_cache.clear()
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(stmt)
+        await session.commit()
+
+    return result.rowcount
@@ -0,0 +1,31 @@
+import base64
+import json
+from typing import Optional
+
+class InvalidCursorError(ValueError):
+    """
+    Raised when a pagination cursor cannot be decoded.
+    """
+
+def encode_cursor(word: str, summary_id: int) -> str:
+    """
+    Opaque keyset cursor pointing at the last (word, summary id) of a page.
+    """
+    payload = json.dumps([word, summary_id], ensure_ascii=False).encode("utf-8")
+
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[tuple[str, int]]:
+    if not cursor:
+        return None
+
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        word, summary_id = json.loads(payload)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f'Invalid cursor: {cursor}') from e
+
+    if not isinstance(word, str) or not isinstance(summary_id, int):
+        raise InvalidCursorError(f'Invalid cursor: {cursor}')
+
+    return word, summary_id
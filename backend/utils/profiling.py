@@ -0,0 +1,252 @@
+import asyncio
+import cProfile
+import io
+import ipaddress
+import json
+import logging
+import os
+import pstats
+import time
+from asyncio import events
+from typing import Any, Optional
+from urllib.parse import parse_qs
+from uuid import uuid4
+
+from utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Client addresses (IPs or networks, comma separated) allowed to request a
+# profile with the `X-Profile: 1` header or the `profile=1` query parameter.
+# Empty disables profiling.
+PROFILE_ALLOWLIST = os.getenv('PROFILE_ALLOWLIST', '')
+
+# Event loop callbacks running longer than this are reported as blocking the loop.
+PROFILE_SLOW_CALLBACK_MS = float(os.getenv('PROFILE_SLOW_CALLBACK_MS', '20'))
+
+# Where to also write the raw cProfile data (<profile id>.prof), if set.
+PROFILE_DIR = os.getenv('PROFILE_DIR')
+
+PROFILE_TOP_FUNCTIONS = 40
+PROFILE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+PROFILE_CACHE_TTL = 3600
+
+# Reports (JSON) by profile id, served by /admin/profiles/{profile_id}.
+profile_reports = LRUCache(max_bytes=PROFILE_CACHE_MAX_BYTES, ttl=PROFILE_CACHE_TTL, sizeof=len)
+
+def parse_allowlist(value: str) -> list:
+    return [ipaddress.ip_network(item.strip(), strict=False) for item in value.split(',') if item.strip()]
+
+allowed_networks = parse_allowlist(PROFILE_ALLOWLIST)
+
+def client_allowed(host: Optional[str]) -> bool:
+    try:
+        address = ipaddress.ip_address(host or '')
+    except ValueError:
+        return False
+
+    return any(address in network for network in allowed_networks)
+
+def profile_requested(scope: dict) -> bool:
+    for name, value in scope.get("headers", []):
+        if name == b"x-profile":
+            return value in (b"1", b"true")
+
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+
+    return query.get("profile", [""])[-1] in ("1", "true")
+
+def describe_callback(callback: Any) -> str:
+    """
+    The innermost coroutine a loop callback (or task) ran and where it stopped,
+    or the callback itself.
+    """
+    task = callback if isinstance(callback, asyncio.Task) else getattr(getattr(callback, "_callback", None), "__self__", None)
+
+    if isinstance(task, asyncio.Task):
+        coro = task.get_coro()
+
+        while getattr(getattr(coro, "cr_await", None), "cr_frame", None) is not None:
+            coro = coro.cr_await
+
+        frame = getattr(coro, "cr_frame", None)
+        where = f" at {frame.f_code.co_filename}:{frame.f_lineno}" if frame is not None else ""
+
+        return f"{getattr(coro, '__qualname__', coro)}{where}"
+
+    return repr(callback)[:300]
+
+class LoopMonitor:
+    """
+    Measures how long the event loop waited for I/O (in the selector) while
+    started, the rest being time it was blocked running Python code, and reports
+    the callbacks that held it longer than the threshold: the synchronous
+    stretches between two awaits.
+
+    Patches asyncio's Handle._run and the loop's selector, so it only sees the
+    stdlib loop (not uvloop).
+    """
+
+    def __init__(self, threshold: float) -> None:
+        self.threshold = threshold
+        self.idle = 0.0
+        self.callbacks = 0
+        self.slow: list[dict[str, Any]] = []
+        self.supported = False
+        self._pending: Optional[tuple[Any, float]] = None
+        self._selector = None
+        self._original_run = None
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._selector = getattr(loop, "_selector", None)
+
+        if self._selector is None:
+            return
+
+        monitor = self
+        original_run = self._original_run = events.Handle._run
+        original_select = self._selector.select
+
+        def _run(handle: events.Handle) -> None:
+            monitor._close_pending()
+            monitor._pending = (handle, time.perf_counter())
+
+            try:
+                original_run(handle)
+            finally:
+                monitor._close_pending()
+
+        def select(timeout: Optional[float] = None):
+            monitor._close_pending()
+            started_at = time.perf_counter()
+
+            try:
+                return original_select(timeout)
+            finally:
+                monitor.idle += time.perf_counter() - started_at
+
+        events.Handle._run = _run
+        self._selector.select = select
+        self.supported = True
+
+        # The callback running now (the caller's task) is the first one timed.
+        self._pending = (asyncio.current_task(), time.perf_counter())
+
+    def stop(self) -> None:
+        if not self.supported:
+            return
+
+        # Likewise, the callback running now is timed up to here.
+        self._close_pending()
+        events.Handle._run = self._original_run
+        del self._selector.select
+
+    def _close_pending(self) -> None:
+        if self._pending is None:
+            return
+
+        callback, started_at = self._pending
+        elapsed = time.perf_counter() - started_at
+        self._pending = None
+        self.callbacks += 1
+
+        if elapsed >= self.threshold:
+            self.slow.append({"callback": describe_callback(callback), "ms": round(elapsed * 1000, 3)})
+
+class ProfilingMiddleware:
+    """
+    Runs allowlisted requests that ask for it under cProfile and the LoopMonitor,
+    until the last byte of the response (streamed responses included), and
+    stores a report under the id returned in the `X-Profile-Id` header.
+
+    One request is profiled at a time; both profilers see everything the process
+    runs meanwhile, including other requests. Off (empty allowlist), a request
+    costs one check.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+        self.active = False
+
+    async def __call__(self, scope, receive, send) -> None:
+        if (
+            not allowed_networks
+            or scope["type"] != "http"
+            or self.active
+            or not profile_requested(scope)
+            or not client_allowed((scope.get("client") or ("",))[0])
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid4().hex
+        status: Optional[int] = None
+
+        async def send_with_id(message) -> None:
+            nonlocal status
+
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+
+            await send(message)
+
+        profiler = cProfile.Profile()
+        monitor = LoopMonitor(PROFILE_SLOW_CALLBACK_MS / 1000)
+
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this process.
+            await self.app(scope, receive, send)
+            return
+
+        self.active = True
+        started_at = time.perf_counter()
+        monitor.start()
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.disable()
+            monitor.stop()
+            wall = time.perf_counter() - started_at
+            self.active = False
+
+            save_report(profile_id, build_report(scope, status, wall, monitor, profiler), profiler)
+
+def build_report(scope: dict, status: Optional[int], wall: float, monitor: LoopMonitor, profiler: cProfile.Profile) -> dict:
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+
+    return {
+        "method": scope.get("method"),
+        "path": scope.get("path"),
+        "query": scope.get("query_string", b"").decode("latin-1"),
+        "status": status,
+        "wall_ms": round(wall * 1000, 3),
+        # Times are measured under the profiler, which slows Python code down.
+        "loop_busy_ms": round(max(0.0, wall - monitor.idle) * 1000, 3) if monitor.supported else None,
+        "loop_idle_ms": round(monitor.idle * 1000, 3) if monitor.supported else None,
+        "loop_callbacks": monitor.callbacks,
+        "slow_callback_threshold_ms": PROFILE_SLOW_CALLBACK_MS,
+        "slow_callbacks": sorted(monitor.slow, key=lambda item: item["ms"], reverse=True),
+        "stats": stream.getvalue(),
+    }
+
+def save_report(profile_id: str, report: dict, profiler: cProfile.Profile) -> None:
+    profile_reports.set(profile_id, json.dumps({"profile_id": profile_id, **report}))
+
+    logger.info(
+        'Profiled %s %s (%s): %s ms wall, %s ms loop busy, %s slow callbacks.',
+        report["method"], report["path"], profile_id, report["wall_ms"],
+        report["loop_busy_ms"], len(report["slow_callbacks"]),
+    )
+
+    if PROFILE_DIR:
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            profiler.dump_stats(os.path.join(PROFILE_DIR, f"{profile_id}.prof"))
+        except OSError as e:
+            logger.warning('Could not write profile %s: %r', profile_id, e)
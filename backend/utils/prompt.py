@@ -19,4 +19,54 @@ SYSTEM_PROMPT = '''
     {original_text}
 
     **SUMMARY:**
-'''
\ No newline at end of file
+'''
+
+MAP_PROMPT = '''
+    You are an expert in summarizing Wikipedia articles.
+
+    The text below is part {part} of {parts} of a long Wikipedia article. Summarize this part in
+    no more than {word_count} words, keeping every fact, name, date and number that matters to
+    the article as a whole. **Do not** create or add informations that are not in the text.
+    The summary must always be written in **Brazilian Portuguese**.
+
+    Here is the part of the article to summarize:
+
+    {original_text}
+
+    **SUMMARY:**
+'''
+
+REDUCE_PROMPT = '''
+    You are an expert in generating concise and informative summaries of Wikipedia articles.
+
+    The text below is a sequence of partial summaries, in article order, of a long Wikipedia article.
+    Combine them into a single summary that captures the essential information in a clear and
+    engaging manner, accessible to a general audience.
+
+    1. **Focus on key points:** keep the most important facts, events, and concepts.
+    2. **Coherence:** the summary must read as one text, not as a list of parts. **Do not** create or add
+    informations that are not in the partial summaries.
+    3. **Size:** Respect the limit of {word_count} words in summary.
+    4. **Do not change the language:** the summary must always be generated in **Brazilian Portuguese**.
+
+    Here are the partial summaries:
+
+    {original_text}
+
+    **SUMMARY:**
+'''
+
+DERIVE_PROMPT = '''
+    You are an expert in generating concise and informative summaries of Wikipedia articles.
+
+    The text below is already a summary of a Wikipedia article. Condense it into a shorter summary
+    of no more than {word_count} words, keeping the most important facts, events, and concepts.
+    **Do not** create or add informations that are not in the text. The summary must read as one
+    coherent text and must always be written in **Brazilian Portuguese**.
+
+    Here is the summary to condense:
+
+    {original_text}
+
+    **SUMMARY:**
+'''
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate_per_minute`.
+
+    Callers reserve tokens up front and sleep until the reservation is covered,
+    so concurrent callers are served in arrival order without a lock.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def reserve(self, amount: float = 1) -> float:
+        """
+        Take `amount` tokens and return how many seconds to wait before using them.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+        self.tokens -= min(amount, self.capacity)
+
+        return max(0.0, -self.tokens / self.rate)
+
+    async def acquire(self, amount: float = 1) -> float:
+        wait = self.reserve(amount)
+
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        return wait
+
+class ConcurrencyLimiter:
+    """
+    Caps how many callers hold a slot at once and reports queueing stats.
+    A max_concurrency of 0 disables the cap.
+    """
+
+    def __init__(self, max_concurrency: int = 0) -> None:
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.acquired = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+    def _get_semaphore(self) -> Optional[asyncio.Semaphore]:
+        if self.max_concurrency <= 0:
+            return None
+
+        loop = asyncio.get_running_loop()
+
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+
+        return self._semaphore
+
+    async def _admit(self, tokens: int) -> None:
+        """
+        Wait for any limit besides the concurrency cap; none by default.
+        """
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0) -> AsyncIterator[None]:
+        semaphore = self._get_semaphore()
+        started_at = time.monotonic()
+
+        self.queue_depth += 1
+        try:
+            await self._admit(tokens)
+            if semaphore is not None:
+                await semaphore.acquire()
+        finally:
+            self.queue_depth -= 1
+
+        wait = time.monotonic() - started_at
+        self.acquired += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.last_wait = wait
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+            if semaphore is not None:
+                semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "avg_wait_seconds": self.total_wait / self.acquired if self.acquired else 0.0,
+            "max_wait_seconds": self.max_wait,
+            "last_wait_seconds": self.last_wait,
+        }
+
+class LLMLimiter(ConcurrencyLimiter):
+    """
+    Local admission control in front of the LLM: a concurrency cap plus
+    requests/min and tokens/min buckets. A value of 0 disables that limit.
+    """
+
+    def __init__(self, max_concurrency: int = 0, requests_per_minute: float = 0, tokens_per_minute: float = 0) -> None:
+        super().__init__(max_concurrency)
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+
+    async def _admit(self, tokens: int) -> None:
+        if self.requests is not None:
+            await self.requests.acquire(1)
+        if self.tokens is not None and tokens > 0:
+            await self.tokens.acquire(tokens)
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+        }
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import os
+from datetime import timedelta
+from typing import Any, Optional
+
+from sqlalchemy import func, select, update
+
+from db import AsyncSessionLocal
+
+from models import Article, Summary
+
+from utils.article_text import compress_texts
+from utils.article_text import stored_text
+from utils.article_text import text_values
+from utils.rate_limiter import TokenBucket
+from utils.response_cache import invalidate_words
+from utils.wiki_extractor import WikipediaPageNotFoundError
+from utils.wiki_extractor import WikipediaTextExtractor
+from utils.wiki_extractor import article_slugs
+from utils.wiki_extractor import forget_summaries
+from utils.wiki_extractor import page_url
+
+logger = logging.getLogger(__name__)
+
+# Saved articles are revalidated against Wikipedia once they are older than
+# ARTICLE_REFRESH_AGE seconds (0 disables the refresher), at most
+# ARTICLE_REFRESH_PER_MINUTE pages per minute per process.
+ARTICLE_REFRESH_AGE = float(os.getenv('ARTICLE_REFRESH_AGE', str(7 * 24 * 60 * 60)))
+ARTICLE_REFRESH_INTERVAL = float(os.getenv('ARTICLE_REFRESH_INTERVAL', '300'))
+ARTICLE_REFRESH_BATCH = int(os.getenv('ARTICLE_REFRESH_BATCH', '50'))
+ARTICLE_REFRESH_PER_MINUTE = float(os.getenv('ARTICLE_REFRESH_PER_MINUTE', '30'))
+
+_task: Optional[asyncio.Task] = None
+
+async def claim_stale_articles(limit: int) -> list[Any]:
+    """
+    Take the articles checked longest ago, past ARTICLE_REFRESH_AGE, moving their
+    checked_at to now so other workers (and the next rounds) skip them.
+    """
+    due = (
+        select(Article.id)
+        .where(Article.checked_at < func.now() - timedelta(seconds=ARTICLE_REFRESH_AGE))
+        .order_by(Article.checked_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(
+            update(Article)
+            .where(Article.id.in_(due))
+            .values(checked_at=func.now(), updated_at=Article.updated_at)
+            .returning(Article.id, Article.word, Article.revision_id, Article.etag, Article.last_modified)
+            .execution_options(synchronize_session=False)
+        )).all()
+        await session.commit()
+
+    return rows
+
+async def load_article_text(article_id: int) -> Optional[str]:
+    """
+    The saved text of an article, decompressed in a thread.
+    """
+    async with AsyncSessionLocal() as session:
+        row = (await session.execute(
+            select(Article.clean_text, Article.text_zstd).where(Article.id == article_id)
+        )).one_or_none()
+
+    return await asyncio.to_thread(stored_text, *row) if row else None
+
+async def refresh_article(row: Any) -> bool:
+    """
+    Revalidate one article with a conditional request. A 304 leaves it as claimed
+    (only checked_at moved); a new revision replaces the text and marks the
+    article's summaries stale. Returns whether the text changed.
+
+    When the saved or the new page has no revision id, the new text is compared
+    with the saved one instead.
+
+    When the text changed, the cached summaries and responses of every slug of the
+    article (its canonical term and aliases) are dropped.
+    """
+    extractor = WikipediaTextExtractor(row.word)
+    extractor.wiki_word, extractor.url = row.word, page_url(row.word)
+    extractor.revision_id, extractor.etag, extractor.last_modified = row.revision_id, row.etag, row.last_modified
+
+    if not await extractor.fecth_article():
+        return False
+
+    compare_text = row.revision_id is None or extractor.revision_id is None
+
+    if compare_text:
+        await extractor.text_cleaner_async()
+        changed = extractor.clean_text != await load_article_text(row.id)
+    else:
+        changed = extractor.revision_id != row.revision_id
+
+    values = {
+        "revision_id": extractor.revision_id,
+        "etag": extractor.etag,
+        "last_modified": extractor.last_modified,
+    }
+
+    if changed:
+        if not compare_text:
+            await extractor.text_cleaner_async()
+        [text_zstd] = await compress_texts([extractor.clean_text])
+        values.update(text_values(row.word, extractor.clean_text, text_zstd))
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(update(Article).where(Article.id == row.id).values(**values))
+
+        if changed:
+            await session.execute(
+                update(Summary)
+                .where(Summary.article_id == row.id, Summary.stale.is_(False))
+                .values(stale=True)
+            )
+            slugs = await article_slugs(session, [row.id]) | {row.word.lower()}
+
+        await session.commit()
+
+    if changed:
+        forget_summaries(slugs)
+        invalidate_words(slugs)
+
+    return changed
+
+async def refresh_stale_articles(bucket: TokenBucket, limit: Optional[int] = None) -> int:
+    """
+    Revalidate one batch of due articles, paced by the bucket. Returns the number claimed.
+    """
+    rows = await claim_stale_articles(limit or ARTICLE_REFRESH_BATCH)
+
+    for row in rows:
+        await bucket.acquire()
+
+        try:
+            if await refresh_article(row):
+                logger.info('Refreshed article "%s".', row.word)
+        except WikipediaPageNotFoundError:
+            logger.info('Article "%s" no longer exists on Wikipedia.', row.word)
+        except Exception:
+            logger.exception('Refresh failed for "%s".', row.word)
+
+    return len(rows)
+
+async def run_refresher() -> None:
+    bucket = TokenBucket(ARTICLE_REFRESH_PER_MINUTE, capacity=1)
+
+    while True:
+        try:
+            claimed = await refresh_stale_articles(bucket)
+        except Exception:
+            logger.exception('Article refresh round failed.')
+            claimed = 0
+
+        # A full batch means more articles are due: keep going without waiting.
+        if claimed < ARTICLE_REFRESH_BATCH:
+            await asyncio.sleep(ARTICLE_REFRESH_INTERVAL)
+
+def start_refresher() -> None:
+    global _task
+
+    if ARTICLE_REFRESH_AGE > 0 and ARTICLE_REFRESH_PER_MINUTE > 0 and _task is None:
+        _task = asyncio.create_task(run_refresher())
+
+async def stop_refresher() -> None:
+    global _task
+
+    if _task is None:
+        return
+
+    _task.cancel()
+
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+
+    _task = None
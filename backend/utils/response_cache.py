@@ -0,0 +1,84 @@
+import hashlib
+import os
+import sys
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+import orjson
+from fastapi import Request, Response
+
+from utils.cache import LRUCache
+
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', '300'))
+
+# max-age of the Cache-Control header of the cached endpoints, so browsers,
+# proxies and CDNs can answer repeated requests themselves; 0 makes them
+# revalidate every time (If-None-Match, answered with a 304 when unchanged).
+RESPONSE_MAX_AGE = int(os.getenv('RESPONSE_MAX_AGE', '60'))
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+
+def _sizeof(item: Any) -> int:
+    if isinstance(item, CachedResponse):
+        return len(item.body) + len(item.etag)
+
+    return sys.getsizeof(item) + sum(sys.getsizeof(part) for part in item)
+
+# Serialized JSON bodies keyed on (endpoint, word_slug, *parameters), grouped by
+# word_slug to be invalidated when a summary of the word is saved (see invalidate_words).
+response_cache = LRUCache(
+    max_bytes=RESPONSE_CACHE_MAX_BYTES,
+    ttl=RESPONSE_CACHE_TTL,
+    sizeof=_sizeof,
+    group=lambda key: key[1],
+)
+
+def make_etag(body: bytes) -> str:
+    """
+    Strong ETag of a body: it changes exactly when the summaries in it (their
+    text, id, flags) do.
+    """
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def serialize(content: Any) -> CachedResponse:
+    body = orjson.dumps(content)
+
+    return CachedResponse(body=body, etag=make_etag(body))
+
+def cache_response(key: tuple, content: Any) -> CachedResponse:
+    cached = serialize(content)
+    response_cache.set(key, cached)
+
+    return cached
+
+def get_cached(key: tuple) -> Optional[CachedResponse]:
+    return response_cache.get(key)
+
+def invalidate_words(word_slugs: Iterable[str]) -> int:
+    return sum(response_cache.invalidate_group(slug) for slug in set(word_slugs))
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+
+    if not if_none_match:
+        return False
+
+    # Weak comparison, as If-None-Match requires: W/"x" matches "x".
+    tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+
+    return etag in tags or '*' in tags
+
+def respond(request: Request, cached: CachedResponse) -> Response:
+    """
+    The cached body, or a 304 without it when the client already has this version.
+    """
+    headers = {"ETag": cached.etag, "Cache-Control": f"public, max-age={RESPONSE_MAX_AGE}"}
+
+    if etag_matches(request, cached.etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=cached.body, media_type="application/json", headers=headers)
@@ -0,0 +1,89 @@
+import os
+from typing import Any
+
+from sqlalchemy import Select, Float, Text, desc, func, literal, literal_column, select, union_all
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from models import Article, Summary
+
+# Text search configuration of the search_vector columns (see models).
+SEARCH_CONFIG = literal_column("'portuguese'::regconfig")
+
+# ts_headline parses the whole document, so snippets are taken from the start of
+# long articles only (see article_headlines); a match past it falls back to the
+# opening words.
+SEARCH_HEADLINE_MAX_CHARS = int(os.getenv('SEARCH_HEADLINE_MAX_CHARS', '20000'))
+SEARCH_HEADLINE_OPTIONS = 'MaxFragments=2, MinWords=10, MaxWords=30, FragmentDelimiter=" ... "'
+
+# ts_rank_cd normalization 32: rank / (rank + 1), in [0, 1) like similarity().
+RANK_NORMALIZATION = 32
+
+def article_search_vector(word: Any, text: Any) -> Any:
+    """
+    Search document of an article: its term (a column or a value), weighted above
+    its text.
+    """
+    return func.setweight(func.to_tsvector(SEARCH_CONFIG, func.replace(word, '_', ' ')), literal_column("'A'")).op("||")(
+        func.setweight(func.to_tsvector(SEARCH_CONFIG, text), literal_column("'B'"))
+    )
+
+def search_query(q: str, limit: int, offset: int = 0) -> Select:
+    """
+    Articles matching `q` in their text, their saved summaries or, fuzzily, their
+    term, best first, with the highlighted snippet of their best summary and their
+    stored text (for article_headlines).
+
+    Candidates come from the GIN indexes (search vectors and the trigram index on
+    the term); ranking and snippets are computed for the requested page only.
+    """
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+
+    hits = union_all(
+        select(Article.id.label("article_id"), func.ts_rank_cd(Article.search_vector, query, RANK_NORMALIZATION).label("rank"))
+        .where(Article.search_vector.op("@@")(query)),
+        select(Summary.article_id, func.ts_rank_cd(Summary.search_vector, query, RANK_NORMALIZATION))
+        .where(Summary.search_vector.op("@@")(query), Summary.stale.is_(False)),
+        select(Article.id, func.similarity(Article.word, q))
+        .where(Article.word.op("%")(q)),
+    ).subquery("hits")
+
+    page = (
+        select(hits.c.article_id, func.sum(hits.c.rank, type_=Float).label("rank"))
+        .group_by(hits.c.article_id)
+        .order_by(desc("rank"), hits.c.article_id)
+        .limit(limit)
+        .offset(offset)
+        .subquery("page")
+    )
+
+    summary_snippet = (
+        select(func.ts_headline(SEARCH_CONFIG, Summary.summary_text, query, SEARCH_HEADLINE_OPTIONS))
+        .where(Summary.article_id == Article.id, Summary.stale.is_(False), Summary.search_vector.op("@@")(query))
+        .order_by(func.ts_rank_cd(Summary.search_vector, query).desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+    return (
+        select(
+            Article.word,
+            page.c.rank,
+            Article.clean_text,
+            Article.text_zstd,
+            summary_snippet.label("summary_snippet"),
+        )
+        .join(page, page.c.article_id == Article.id)
+        .order_by(page.c.rank.desc(), Article.id)
+    )
+
+def article_headlines(q: str, texts: list[str]) -> Select:
+    """
+    Highlighted snippets of `q` in each text, in order. The texts are stored
+    compressed, so the app sends back their start (see SEARCH_HEADLINE_MAX_CHARS).
+    """
+    documents = func.unnest(literal(texts, ARRAY(Text))).table_valued("document", with_ordinality="position").render_derived()
+
+    return (
+        select(func.ts_headline(SEARCH_CONFIG, documents.c.document, func.websearch_to_tsquery(SEARCH_CONFIG, q), SEARCH_HEADLINE_OPTIONS))
+        .order_by(documents.c.position)
+    )
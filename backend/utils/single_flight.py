@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+from typing import Awaitable, Callable, Hashable, Optional, TypeVar
+
+from sqlalchemy import text
+
+from db import db_lock_pool_size
+from db import lock_engine
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls sharing the same key into a single execution.
+
+    The first caller for a key (the leader) runs the function; every caller that
+    arrives while it is in flight awaits the same result or exception.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def join(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> tuple[asyncio.Task, bool]:
+        """
+        The task running the key, started with `fn` unless one is in flight, and
+        whether this call started it (is the leader). Await it through asyncio.shield.
+        """
+        task = self._calls.get(key)
+
+        if task is not None:
+            return task, False
+
+        # The work runs in its own task so a cancelled caller (e.g. a client
+        # disconnect) does not cancel the result the other callers are awaiting.
+        task = asyncio.ensure_future(self._run(key, fn))
+        self._calls[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+
+        return task, True
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task, _ = self.join(key, fn)
+
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        return await fn()
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+        if not task.cancelled():
+            # Mark the exception as retrieved when every caller went away.
+            task.exception()
+
+def advisory_lock_id(key: Hashable) -> int:
+    """
+    Map a key to a stable signed 64-bit id usable by pg_advisory_lock.
+    """
+    digest = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=8).digest()
+
+    return int.from_bytes(digest, "big", signed=True)
+
+class AdvisoryLockSingleFlight(SingleFlight):
+    """
+    Single-flight that also serializes the leaders of different workers through a
+    Postgres session advisory lock, so only one process runs the work per key.
+
+    Locks are held on connections of db.lock_engine, never of the API pool the work
+    itself uses; at most `max_holders` keys hold one at a time, the other leaders
+    wait for a free connection.
+    """
+
+    def __init__(self, poll_interval: float = 0.05, max_holders: Optional[int] = None) -> None:
+        super().__init__()
+        self.poll_interval = poll_interval
+        self.max_holders = max_holders or db_lock_pool_size
+        self._holders: Optional[asyncio.Semaphore] = None
+        self._holders_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _holder_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+
+        if self._holders is None or self._holders_loop is not loop:
+            self._holders = asyncio.Semaphore(self.max_holders)
+            self._holders_loop = loop
+
+        return self._holders
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        lock_id = advisory_lock_id(key)
+
+        async with self._holder_slots(), lock_engine.connect() as conn:
+            while not await conn.scalar(text("SELECT pg_try_advisory_lock(:id)"), {"id": lock_id}):
+                await asyncio.sleep(self.poll_interval)
+
+            try:
+                return await fn()
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id})
@@ -1,28 +1,372 @@
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
+import asyncio
+import importlib
+import os
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Optional
+
+import httpx
 
 from utils.prompt import SYSTEM_PROMPT
+from utils.prompt import MAP_PROMPT
+from utils.prompt import REDUCE_PROMPT
+from utils.prompt import DERIVE_PROMPT
+from utils.rate_limiter import LLMLimiter
+from utils import metrics
 
-async def text_summarizer(original_text: str, word_count: int) -> str:
+SUMMARY_MODEL = os.getenv('SUMMARY_MODEL', 'gpt-5.1')
+SUMMARY_ENCODING = os.getenv('SUMMARY_ENCODING', 'o200k_base')
+
+# Articles up to SUMMARY_SINGLE_CALL_TOKENS go to the LLM in one prompt; longer ones
+# are split into SUMMARY_CHUNK_TOKENS chunks and summarized with map-reduce.
+SUMMARY_SINGLE_CALL_TOKENS = int(os.getenv('SUMMARY_SINGLE_CALL_TOKENS', '12000'))
+SUMMARY_CHUNK_TOKENS = int(os.getenv('SUMMARY_CHUNK_TOKENS', '6000'))
+SUMMARY_MAP_WORDS = int(os.getenv('SUMMARY_MAP_WORDS', '250'))
+SUMMARY_MAP_CONCURRENCY = int(os.getenv('SUMMARY_MAP_CONCURRENCY', '4'))
+
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '16'))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv('LLM_REQUESTS_PER_MINUTE', '500'))
+LLM_TOKENS_PER_MINUTE = float(os.getenv('LLM_TOKENS_PER_MINUTE', '500000'))
+LLM_HTTP_TIMEOUT = float(os.getenv('LLM_HTTP_TIMEOUT', '120'))
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv('LLM_HTTP_MAX_CONNECTIONS', '50'))
+
+# Rough characters per token, used when the tiktoken encoding is not available.
+CHARS_PER_TOKEN = 4
+
+# Prompt instructions around the article text, counted against the tokens/min budget.
+PROMPT_OVERHEAD_TOKENS = 400
+
+limiter = LLMLimiter(
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+)
+
+metrics.llm_queue_depth.set_function(lambda: limiter.queue_depth)
+metrics.llm_in_flight.set_function(lambda: limiter.in_flight)
+
+# LangChain and the OpenAI SDK take about a second to import, so they are loaded
+# on first use instead of at startup (see __getattr__): requests answered from
+# the cache or the database never pay for it.
+_LAZY_IMPORTS = {
+    "ChatOpenAI": ("langchain_openai", "ChatOpenAI"),
+    "PromptTemplate": ("langchain_core.prompts", "PromptTemplate"),
+}
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module, attr = _LAZY_IMPORTS[name]
+    value = globals()[name] = getattr(importlib.import_module(module), attr)
+
+    return value
+
+def _lazy(name: str) -> Any:
+    return globals().get(name) or __getattr__(name)
+
+_llm: Optional[Any] = None
+_llm_http_client: Optional[httpx.AsyncClient] = None
+_llm_loop: Optional[asyncio.AbstractEventLoop] = None
+_chains: dict[str, Any] = {}
+
+@lru_cache(maxsize=1)
+def get_encoding() -> Optional[Any]:
     """
-    Summarize a text into a given number of words using LangChain LCEL.
+    Load the tiktoken encoding, or None if it cannot be loaded (e.g. offline).
     """
+    try:
+        import tiktoken
 
-    llm = ChatOpenAI(
-        model="gpt-5.1",
-        temperature=0
-    )
+        return tiktoken.get_encoding(SUMMARY_ENCODING)
+    except Exception:
+        return None
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+
+    return len(encoding.encode(text, disallowed_special=()))
+
+def _split_long_line(line: str, max_tokens: int) -> list[str]:
+    encoding = get_encoding()
 
-    prompt = PromptTemplate(
-        template=SYSTEM_PROMPT,
-        input_variables=["original_text", "word_count"]
+    if encoding is None:
+        size = max_tokens * CHARS_PER_TOKEN
+        return [line[i:i + size] for i in range(0, len(line), size)]
+
+    tokens = encoding.encode(line, disallowed_special=())
+
+    return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+
+def split_by_tokens(text: str, max_tokens: Optional[int] = None) -> list[str]:
+    """
+    Split a text into chunks of at most max_tokens, breaking on line boundaries
+    whenever possible so paragraphs are kept together.
+    """
+    return [chunk for chunk, _ in split_by_tokens_counted(text, max_tokens)]
+
+def split_by_tokens_counted(text: str, max_tokens: Optional[int] = None) -> list[tuple[str, int]]:
+    """
+    Same as split_by_tokens, with the tokens of each chunk (counting one per line
+    break), so the chunks are not tokenized again to budget their LLM calls.
+    """
+    max_tokens = max_tokens or SUMMARY_CHUNK_TOKENS
+    chunks: list[tuple[str, int]] = []
+    current: list[str] = []
+    current_tokens = 0
+
+    for line in text.splitlines():
+        line_tokens = count_tokens(line) + 1
+
+        if line_tokens > max_tokens:
+            pieces = _split_long_line(line, max_tokens)
+        else:
+            pieces = [line]
+
+        for piece in pieces:
+            piece_tokens = line_tokens if len(pieces) == 1 else count_tokens(piece) + 1
+
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append(("\n".join(current).strip(), current_tokens))
+                current, current_tokens = [], 0
+
+            current.append(piece)
+            current_tokens += piece_tokens
+
+    if current:
+        chunks.append(("\n".join(current).strip(), current_tokens))
+
+    return [(chunk, tokens) for chunk, tokens in chunks if chunk]
+
+def get_llm() -> Any:
+    """
+    Return the shared chat model and its keep-alive HTTP pool, creating them on
+    first use (or again if the previous ones belong to a finished event loop).
+    """
+    global _llm, _llm_http_client, _llm_loop
+
+    loop = asyncio.get_running_loop()
+
+    if _llm is None or _llm_loop is not loop:
+        _chains.clear()
+        _llm_http_client = httpx.AsyncClient(
+            timeout=LLM_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_MAX_CONNECTIONS,
+            ),
+        )
+        _llm = _lazy("ChatOpenAI")(
+            model=SUMMARY_MODEL,
+            temperature=0,
+            http_async_client=_llm_http_client,
+        )
+        _llm_loop = loop
+
+    return _llm
+
+def build_chain(template: str, input_variables: tuple[str, ...] = ("original_text", "word_count")) -> Any:
+    prompt = _lazy("PromptTemplate")(
+        template=template,
+        input_variables=list(input_variables)
     )
 
-    chain = prompt | llm
+    return prompt | get_llm()
+
+def get_chain(template: str, input_variables: tuple[str, ...] = ("original_text", "word_count")) -> Any:
+    """
+    Return the compiled chain for a prompt template, built once and reused.
+    """
+    chain = _chains.get(template)
+
+    if chain is None:
+        chain = _chains[template] = build_chain(template, input_variables)
+
+    return chain
+
+async def open_llm() -> None:
+    """
+    Create the LLM client up front, for processes that will use it anyway (the
+    job worker); the API leaves it to the first summary it generates.
+    """
+    get_llm()
+
+async def close_llm() -> None:
+    global _llm, _llm_http_client, _llm_loop
+
+    if _llm_http_client is not None and not _llm_http_client.is_closed:
+        await _llm_http_client.aclose()
+
+    _chains.clear()
+    _llm = None
+    _llm_http_client = None
+    _llm_loop = None
+
+def estimate_tokens(payload: dict, text_tokens: Optional[int] = None) -> int:
+    """
+    Tokens a call is expected to consume: prompt plus the requested summary size.
+    `text_tokens` is the token count of the text when the caller already has it.
+    """
+    if text_tokens is None:
+        text_tokens = count_tokens(payload["original_text"])
+
+    return text_tokens + PROMPT_OVERHEAD_TOKENS + 2 * int(payload["word_count"])
+
+def observe_usage(payload: dict, estimated: int, output: str, usage: Optional[dict]) -> None:
+    """
+    Record the tokens of a call: as reported by the API, or else the prompt part
+    of the estimate and the output counted locally.
+    """
+    if usage:
+        input_tokens, output_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    else:
+        input_tokens = estimated - 2 * int(payload["word_count"])
+        output_tokens = count_tokens(output)
+
+    metrics.llm_tokens.labels("input").observe(input_tokens)
+    metrics.llm_tokens.labels("output").observe(output_tokens)
+
+async def invoke_chain(chain: Any, payload: dict, text_tokens: Optional[int] = None) -> str:
+    estimated = estimate_tokens(payload, text_tokens)
+    queued_at = time.perf_counter()
+
+    async with limiter.slot(estimated):
+        metrics.llm_wait_seconds.observe(time.perf_counter() - queued_at)
+
+        with metrics.timed("llm"):
+            response = await chain.ainvoke(payload)
+
+    observe_usage(payload, estimated, response.content, getattr(response, "usage_metadata", None))
+
+    return response.content
+
+async def stream_chain(chain: Any, payload: dict, text_tokens: Optional[int] = None) -> AsyncIterator[str]:
+    estimated = estimate_tokens(payload, text_tokens)
+    queued_at = time.perf_counter()
+    chunks: list[str] = []
+    usage: Optional[dict] = None
 
-    response = await chain.ainvoke({
+    async with limiter.slot(estimated):
+        metrics.llm_wait_seconds.observe(time.perf_counter() - queued_at)
+
+        with metrics.timed("llm"):
+            async for chunk in chain.astream(payload):
+                usage = getattr(chunk, "usage_metadata", None) or usage
+
+                if chunk.content:
+                    chunks.append(chunk.content)
+                    yield chunk.content
+
+    observe_usage(payload, estimated, "".join(chunks), usage)
+
+async def summarize_single(chain: Any, original_text: str, word_count: int, text_tokens: Optional[int] = None) -> str:
+    return await invoke_chain(chain, {
         "original_text": original_text,
         "word_count": word_count
-    })
+    }, text_tokens)
 
-    return response.content
+async def map_summaries(
+    chain: Any,
+    chunks: list[str],
+    word_count: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    chunk_tokens: Optional[list[int]] = None,
+) -> list[str]:
+    """
+    Map stage: summarize every chunk, at most `concurrency` LLM calls at a time.
+    `chunk_tokens` are the token counts of the chunks, if already known.
+    """
+    word_count = word_count or SUMMARY_MAP_WORDS
+    semaphore = asyncio.Semaphore(max(1, concurrency or SUMMARY_MAP_CONCURRENCY))
+
+    async def _summarize(index: int, chunk: str) -> str:
+        async with semaphore:
+            return await invoke_chain(chain, {
+                "original_text": chunk,
+                "word_count": word_count,
+                "part": index + 1,
+                "parts": len(chunks),
+            }, chunk_tokens[index] if chunk_tokens else None)
+
+    return list(await asyncio.gather(*[_summarize(i, chunk) for i, chunk in enumerate(chunks)]))
+
+async def reduce_summaries(
+    map_chain: Any,
+    reduce_chain: Any,
+    partials: list[str],
+    word_count: int,
+) -> str:
+    """
+    Reduce stage: combine the partial summaries into one of `word_count` words,
+    mapping again first if they still don't fit in a single prompt.
+    """
+    combined = await fit_partials(map_chain, partials)
+
+    return await summarize_single(reduce_chain, combined, word_count)
+
+async def fit_partials(map_chain: Any, partials: list[str]) -> str:
+    """
+    Join the partial summaries, summarizing them again until they fit in one prompt.
+    """
+    combined = "\n\n".join(partials)
+
+    while len(partials) > 1 and count_tokens(combined) > SUMMARY_SINGLE_CALL_TOKENS:
+        partials = await map_chunks(map_chain, combined)
+        combined = "\n\n".join(partials)
+
+    return combined
+
+async def map_chunks(map_chain: Any, text: str) -> list[str]:
+    """
+    Split a text into chunks and run the map stage on them.
+    """
+    counted = split_by_tokens_counted(text)
+
+    return await map_summaries(map_chain, [chunk for chunk, _ in counted], chunk_tokens=[tokens for _, tokens in counted])
+
+async def text_summarizer(original_text: str, word_count: int) -> str:
+    """
+    Summarize a text into a given number of words using LangChain LCEL.
+    """
+    # Counted once: the single call is budgeted with it, chunks with their own counts.
+    text_tokens = count_tokens(original_text)
+
+    if text_tokens <= SUMMARY_SINGLE_CALL_TOKENS:
+        return await summarize_single(get_chain(SYSTEM_PROMPT), original_text, word_count, text_tokens)
+
+    map_chain = get_chain(MAP_PROMPT, ("original_text", "word_count", "part", "parts"))
+
+    partials = await map_chunks(map_chain, original_text)
+
+    return await reduce_summaries(map_chain, get_chain(REDUCE_PROMPT), partials, word_count)
+
+async def text_summarizer_stream(original_text: str, word_count: int) -> AsyncIterator[str]:
+    """
+    Streaming version of text_summarizer: yields the final summary as it is
+    generated. For long texts the map stage runs first and the reduce is streamed.
+    """
+
+    text_tokens: Optional[int] = count_tokens(original_text)
+
+    if text_tokens <= SUMMARY_SINGLE_CALL_TOKENS:
+        chain, text = get_chain(SYSTEM_PROMPT), original_text
+    else:
+        map_chain = get_chain(MAP_PROMPT, ("original_text", "word_count", "part", "parts"))
+        partials = await map_chunks(map_chain, original_text)
+        chain, text, text_tokens = get_chain(REDUCE_PROMPT), await fit_partials(map_chain, partials), None
+
+    async for chunk in stream_chain(chain, {"original_text": text, "word_count": word_count}, text_tokens):
+        yield chunk
+
+async def text_condenser(summary_text: str, word_count: int) -> str:
+    """
+    Condense an existing (longer) summary into a given number of words.
+    """
+    return await summarize_single(get_chain(DERIVE_PROMPT), summary_text, word_count)
+
+async def text_condenser_stream(summary_text: str, word_count: int) -> AsyncIterator[str]:
+    async for chunk in stream_chain(get_chain(DERIVE_PROMPT), {"original_text": summary_text, "word_count": word_count}):
+        yield chunk
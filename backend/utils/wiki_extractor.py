@@ -4,29 +4,79 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+import asyncio
+import logging
+import os
 import re
+import time
 from urllib.parse import unquote
 from dataclasses import dataclass
-from typing import Optional
+from typing import AsyncIterator, Iterable, Optional
 from urllib.parse import quote
 
-import requests
-from bs4 import BeautifulSoup
+from sqlalchemy import Integer, String, Text, column, func, literal, select, values, and_, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from sqlalchemy import select
-from sqlalchemy.orm import DeclarativeBase, Session
+from db import AsyncSessionLocal
 
-from db import engine
-
-from models import Article, Summary
+from models import Article, ArticleAlias, Summary
 
 from schemas import WikiExtractorResult
 from schemas import WikiExtractorError
 
 from utils.summarizer import text_summarizer
+from utils.summarizer import text_summarizer_stream
+from utils.summarizer import text_condenser
+from utils.summarizer import text_condenser_stream
+from utils.http_client import get_http_client
+from utils.html_cleaner import NoArticleTextError
+from utils.html_cleaner import canonical_title
+from utils.html_cleaner import revision_id
+from utils.html_cleaner import clean_html
+from utils.html_cleaner import clean_html_async
+from utils.html_cleaner import normalize_lines
+from utils import mediawiki
+from utils import metrics
+from utils.single_flight import SingleFlight
+from utils.single_flight import AdvisoryLockSingleFlight
+from utils.cache import LRUCache
+from utils.response_cache import invalidate_words
+from utils.article_text import compress_texts
+from utils.article_text import stored_text_async
+from utils.article_text import text_values
+from utils.missing_pages import is_known_missing
+from utils.missing_pages import is_missing
+from utils.missing_pages import remember_missing
+
+logger = logging.getLogger(__name__)
 
 STOPWORDS = ["de", "da", "do", "das", "dos", "e", "em", "para", "por", "com"]
 
+# Shorter summaries are condensed from the nearest longer saved summary, and a saved
+# summary within SUMMARY_WORD_COUNT_TOLERANCE words of the request is served as is.
+SUMMARY_DERIVE = os.getenv('SUMMARY_DERIVE', '1') == '1'
+SUMMARY_WORD_COUNT_TOLERANCE = int(os.getenv('SUMMARY_WORD_COUNT_TOLERANCE', '0'))
+
+SUMMARY_CACHE_MAX_BYTES = int(os.getenv('SUMMARY_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+SUMMARY_CACHE_TTL = float(os.getenv('SUMMARY_CACHE_TTL', '300'))
+
+# Summary texts keyed on (word_slug, word_count), so hot terms skip the database.
+# An entry always holds a summary of exactly that word_count (see cache_summary);
+# entries are grouped by word_slug to be evicted per article (see forget_summaries).
+summary_cache = LRUCache(
+    max_bytes=SUMMARY_CACHE_MAX_BYTES,
+    ttl=SUMMARY_CACHE_TTL,
+    group=lambda key: key[0],
+)
+
+# Concurrent requests for the same summary (see flight_key) share one pipeline run.
+# The advisory lock variant extends the coalescing across workers/replicas.
+if os.getenv('SINGLE_FLIGHT_ADVISORY_LOCK') == '1':
+    summary_flight: SingleFlight = AdvisoryLockSingleFlight()
+else:
+    summary_flight = SingleFlight()
+
 class WikipediaPageNotFoundError(Exception):
     """
     Raised when the Wikipedia page for a given word does not exist.
@@ -49,168 +99,655 @@ def normalize_word(word: str) -> str:
 
     return '_'.join(normalized_words)
 
-def format_url(word: str) -> str:
-    wiki_word = normalize_word(word)
+def select_summaries(
+    summaries: list[Summary],
+    word_count: int,
+    tolerance: int = 0,
+    derive: bool = True,
+) -> tuple[Optional[Summary], Optional[Summary]]:
+    """
+    Pick, among the saved summaries of an article, the one that answers a request
+    (closest word_count within the tolerance) or else the source to derive it from
+    (the shortest summary generated from the article that is longer than requested).
+    Stale summaries are skipped.
+    """
+    summaries = [summary for summary in summaries if not summary.stale]
+    matches = [summary for summary in summaries if abs(summary.word_count - word_count) <= tolerance]
+
+    if matches:
+        return min(matches, key=lambda summary: (abs(summary.word_count - word_count), -summary.word_count)), None
+
+    if not derive:
+        return None, None
+
+    sources = [
+        summary for summary in summaries
+        if summary.word_count > word_count and summary.derived_from_id is None
+    ]
+
+    return None, min(sources, key=lambda summary: summary.word_count, default=None)
+
+def resolves_to(word_slug: str):
+    """
+    Filter on the article a slug resolves to, through its alias (or its own
+    word_slug, for articles saved before aliases were recorded).
+    """
+    alias = select(ArticleAlias.article_id).where(ArticleAlias.alias_slug == word_slug).scalar_subquery()
+
+    return or_(Article.id == alias, Article.word_slug == word_slug)
+
+async def article_slugs(session: AsyncSession, article_ids: Iterable[int]) -> set[str]:
+    """
+    Every slug that resolves to the articles: their aliases and their own word_slug.
+    """
+    ids = list(article_ids)
+
+    return set(await session.scalars(
+        select(ArticleAlias.alias_slug).where(ArticleAlias.article_id.in_(ids))
+        .union(select(Article.word_slug).where(Article.id.in_(ids)))
+    ))
 
-    return f"https://pt.wikipedia.org/wiki/{quote(wiki_word, safe=':_()')}"
+def forget_summaries(slugs: Iterable[str], word_count: Optional[int] = None) -> None:
+    """
+    Evict the cached summaries of an article under every slug of it (see
+    article_slugs): those of `word_count`, or all of them.
+    """
+    for slug in set(slugs):
+        if word_count is None:
+            summary_cache.invalidate_group(slug)
+        else:
+            summary_cache.invalidate((slug, word_count))
+
+async def save_articles(session: AsyncSession, articles: dict[str, dict]) -> dict[str, tuple[int, bool]]:
+    """
+    Save fetched articles under their canonical title and alias every requested slug
+    to them, so spelling variants of a saved article reuse it.
+
+    `articles` maps each requested slug to the Article column values, "word" being
+    the canonical title and "clean_text" the plain text, stored compressed.
+    Returns, per requested slug, the article id and whether the article was created.
+    """
+    canonical = {values["word"].lower(): values for values in articles.values()}
+    compressed = await compress_texts([values["clean_text"] for values in canonical.values()])
+    rows = [
+        {**values, **text_values(values["word"], values["clean_text"], data), "word_slug": slug}
+        for (slug, values), data in zip(canonical.items(), compressed)
+    ]
+
+    created = dict((await session.execute(
+        insert(Article)
+        .values(rows)
+        .on_conflict_do_nothing()
+        .returning(Article.word_slug, Article.id)
+    )).all())
+
+    ids = dict(created)
+    existing = [slug for slug in canonical if slug not in created]
+
+    if existing:
+        ids.update((await session.execute(
+            select(Article.word_slug, Article.id).where(Article.word_slug.in_(existing))
+        )).all())
+
+    aliases = {slug: ids[slug] for slug in canonical}
+    aliases.update({slug: ids[values["word"].lower()] for slug, values in articles.items()})
+
+    await session.execute(
+        insert(ArticleAlias)
+        .values([{"alias_slug": slug, "article_id": article_id} for slug, article_id in aliases.items()])
+        .on_conflict_do_nothing()
+    )
+
+    return {
+        slug: (ids[values["word"].lower()], values["word"].lower() in created)
+        for slug, values in articles.items()
+    }
+
+def page_url(title: str) -> str:
+    return f"https://pt.wikipedia.org/wiki/{quote(title, safe=':_()')}"
+
+def format_url(word: str) -> str:
+    return page_url(normalize_word(word))
 
 class WikipediaTextExtractor:
-    def __init__(self, word: str, word_count: int = 150) -> None:
+    def __init__(
+        self,
+        word: str,
+        word_count: int = 150,
+        tolerance: Optional[int] = None,
+        derive: Optional[bool] = None,
+    ) -> None:
         self.word = word and word.strip() or ''
         self.word_count = word_count
+        self.tolerance = SUMMARY_WORD_COUNT_TOLERANCE if tolerance is None else tolerance
+        self.derive = SUMMARY_DERIVE if derive is None else derive
         self.raw_text = ''
+        self.raw_format = 'html'
         self.clean_text = ''
         self.summary_text = ''
         self.wiki_word = normalize_word(self.word)
+        self.canonical_title = None
+        self.revision_id = None
+        self.etag = None
+        self.last_modified = None
         self.article = None
         self.article_id = None
+        self.alias_pending = False
         self.summary = None
+        self.source_summary = None
+        self.derived_from_id = None
+        self.outcome = None
 
         self.url = format_url(self.word)
 
-    def fecth_article(self) -> None:
-        session = requests.Session()
-        headers: dict = {
-            "User-Agent": "Mozilla/5.0 (compatible; WikipediaFetcher/1.0; +https://example.com)",
-            "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
-        }
+    async def fecth_article(self) -> bool:
+        """
+        Fetch the article page. When etag/last_modified are set the request is
+        conditional, and False is returned if the page did not change (304).
+        """
+        if mediawiki.WIKI_FETCH_BACKEND == 'api':
+            return await self.fetch_article_extract()
 
-        resp = session.get(self.url, headers=headers, timeout=15.0, allow_redirects=True)
+        client = get_http_client()
+
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+
+        resp = await client.get(self.url, headers=headers)
         if resp.status_code == 404:
             raise WikipediaPageNotFoundError(f'Wikipedia page not found for "{self.word}": {self.url}')
 
+        if resp.status_code == 304:
+            return False
+
         resp.raise_for_status()
 
+        metrics.article_bytes.labels('raw').observe(len(resp.content))
+
         self.raw_text = resp.text
+        self.canonical_title = canonical_title(resp.text)
+        self.revision_id = revision_id(resp.text)
+        self.etag = resp.headers.get('etag')
+        self.last_modified = resp.headers.get('last-modified')
+
+        return True
+
+    async def fetch_article_extract(self) -> bool:
+        """
+        Fetch the article as plaintext through the MediaWiki action API. Returns
+        False if it is still at the revision already known.
+        """
+        extract = (await mediawiki.fetch_extracts([self.wiki_word])).get(self.wiki_word)
+
+        if extract is None:
+            raise WikipediaPageNotFoundError(f'Wikipedia page not found for "{self.word}": {self.url}')
+
+        if self.revision_id is not None and extract.revision_id == self.revision_id:
+            return False
+
+        metrics.article_bytes.labels('raw').observe(len(extract.text.encode()))
+
+        self.raw_text = extract.text
+        self.raw_format = 'text'
+        self.canonical_title = extract.title
+        self.revision_id = extract.revision_id
+
+        return True
 
     def text_cleaner(self) -> None:
-        soup = BeautifulSoup(self.raw_text, "html.parser")
+        if self.raw_format == 'text':
+            self._set_clean_text(normalize_lines(self.raw_text))
+            return
 
-        if soup.select_one("div.noarticletext"):
+        try:
+            clean_text = clean_html(self.raw_text)
+        except NoArticleTextError:
             raise WikipediaPageNotFoundError(f'Wikipedia page not found for "{self.word}"')
 
-        content = soup.select_one("div#mw-content-text") or soup
-
-        for tag in content.select(
-            "script, style, noscript, svg, img, figure, table, "
-            "div.navbox, div.infobox, div.metadata, div.reflist, "
-            "ol.references, sup.reference, span.mw-editsection"
-        ):
-            tag.decompose()
-
-        text = content.get_text(separator="\n", strip=True)
-
-        lines = [ln.strip() for ln in text.splitlines()]
-        cleaned_lines = []
-        last_blank = False
-        for ln in lines:
-            if not ln:
-                if not last_blank:
-                    cleaned_lines.append("")
-                last_blank = True
-            else:
-                cleaned_lines.append(ln)
-                last_blank = False
-        
-        self.clean_text = "\n".join(cleaned_lines).strip()
+        self._set_clean_text(clean_text)
+
+    async def text_cleaner_async(self) -> None:
+        """
+        Same as text_cleaner, but parses the page on the cleaner process pool.
+        """
+        if self.raw_format == 'text':
+            self.text_cleaner()
+            return
+
+        try:
+            clean_text = await clean_html_async(self.raw_text)
+        except NoArticleTextError:
+            raise WikipediaPageNotFoundError(f'Wikipedia page not found for "{self.word}"')
+
+        self._set_clean_text(clean_text)
+
+    def _set_clean_text(self, clean_text: str) -> None:
+        self.clean_text = clean_text
 
         if not self.clean_text:
             raise WikipediaPageNotFoundError(f'No extractable text found for "{self.word}"')
-        
+
+        metrics.article_bytes.labels('clean').observe(len(clean_text.encode()))
+
+    async def fetch_article_text(self) -> None:
+        """
+        Fetch and clean the article, remembering terms that have none.
+        """
+        try:
+            with metrics.timed('fetch'):
+                await self.fecth_article()
+
+            with metrics.timed('clean'):
+                await self.text_cleaner_async()
+        except WikipediaPageNotFoundError:
+            await remember_missing([self.word_slug])
+            raise
+
+    async def check_missing(self, deep: bool = False) -> None:
+        """
+        Fail fast for a term known to have no article: from the in-memory filter,
+        or also from the database with deep=True.
+        """
+        missing = await is_missing(self.word_slug) if deep else is_known_missing(self.word_slug)
+
+        if missing:
+            raise WikipediaPageNotFoundError(f'Wikipedia page not found for "{self.word}" (cached)')
+
     async def text_summary(self) -> None:
         summary = await text_summarizer(self.clean_text, word_count=self.word_count)
 
         self.summary_text = summary
 
-    async def extract_from_wikipedia(self) -> None:
-        self.fecth_article()
-        self.text_cleaner()
-        self.save_article()
+    async def fetch_new_article(self) -> None:
+        """
+        Fetch the article of a term with none saved; it is saved along with its first
+        summary. When the term turns out to be another name (a redirect) of a saved
+        article, that article's summaries are looked up so they are reused instead
+        of generated again.
+        """
+        await self.check_missing(deep=True)
+        await self.fetch_article_text()
+
+        if self.canonical_slug != self.word_slug:
+            await self.lookup_summary(self.canonical_slug)
+            self.alias_pending = self.article is not None
+
+    @property
+    def canonical_title_word(self) -> str:
+        return self.canonical_title.replace(' ', '_') if self.canonical_title else self.wiki_word
+
+    @property
+    def canonical_slug(self) -> str:
+        return self.canonical_title_word.lower()
+
+    @property
+    def word_slug(self) -> str:
+        return self.wiki_word.strip().lower()
+
+    @property
+    def cache_key(self) -> tuple[str, int]:
+        return (self.word_slug, self.word_count)
+
+    def cache_summary(self) -> None:
+        """
+        Cache the summary text under the word_count it actually has: a saved summary
+        matched within the tolerance does not answer the requested word_count exactly.
+        """
+        word_count = self.summary.word_count if self.summary else self.word_count
+        summary_cache.set((self.word_slug, word_count), self.summary_text)
+
+    @property
+    def flight_key(self) -> tuple:
+        return (self.wiki_word.strip().lower(), self.word_count, self.tolerance, self.derive)
+
+    async def text_condense(self) -> None:
+        self.summary_text = await text_condenser(self.source_summary.summary_text, word_count=self.word_count)
+        self.derived_from_id = self.source_summary.id
+
+    async def lookup_summary(self, word_slug: Optional[str] = None) -> None:
+        """
+        Load the saved article and the summary that answers the requested word_count,
+        or the longer summary it can be derived from.
+        """
+        word_slug = word_slug or self.word_slug
+
+        # The extractor opens its own short-lived sessions instead of borrowing the
+        # request session: a coalesced pipeline may outlive the request that started it.
+        async with AsyncSessionLocal() as session:
+            with metrics.timed('db_lookup'):
+                rows = (await session.execute(
+                    select(Article, Summary)
+                    .outerjoin(Summary, and_(
+                        Summary.article_id == Article.id,
+                        Summary.word_count >= self.word_count - self.tolerance,
+                    ))
+                    .where(resolves_to(word_slug))
+                )).all()
+
+        article = rows[0][0] if rows else None
+        summaries = [summary for _, summary in rows if summary is not None]
+
+        self.article = article
+        self.summary, self.source_summary = select_summaries(
+            summaries, self.word_count, self.tolerance, self.derive
+        )
+        self.article_id = article.id if article else None
+
+    async def load_article_text(self) -> None:
+        """
+        Load the saved article text, which lookup_summary leaves out.
+        """
+        async with AsyncSessionLocal() as session:
+            with metrics.timed('db_lookup'):
+                row = (await session.execute(
+                    select(Article.clean_text, Article.text_zstd).where(Article.id == self.article_id)
+                )).one_or_none()
 
-        await self.text_summary()
-        self.save_summary()
+        self.clean_text = await stored_text_async(row.clean_text, row.text_zstd) if row else None
 
     async def load_summary(self) -> None:
         if not self.wiki_word:
             return
-        
-        word_slug = self.wiki_word.strip().lower()
 
-        with Session(engine) as session:
-            article = session.scalar(
-                select(Article).where(Article.word_slug == word_slug)
-            )
-
-            summary = article and session.scalar(
-                select(Summary).where(Summary.article_id == article.id, Summary.word_count == self.word_count)
-            )
+        cached = summary_cache.get(self.cache_key)
+        if cached is not None:
+            self.outcome = 'cache_hit'
+            self.summary_text = cached
+            return
 
-        self.article = article
-        self.summary = summary
-        self.article_id = article.id if article else None
+        await self.check_missing()
+        await self.lookup_summary()
 
         if not self.article:
-            print('Load from Wikipedia.')
-            await self.extract_from_wikipedia()
-        elif self.summary:
-            print('Load from database.')
+            logger.debug('Summary of "%s": loading the article from Wikipedia.', self.word)
+            self.outcome = 'miss'
+            await self.fetch_new_article()
+
+        if self.summary:
+            logger.debug('Summary of "%s": loaded from the database.', self.word)
+            self.outcome = self.outcome or 'hit'
             self.summary_text = self.summary.summary_text
+
+            if self.alias_pending:
+                await self.save_alias()
+        elif self.source_summary:
+            self.outcome = self.outcome or 'partial_hit'
+
+            await self.text_condense()
+            await self.save_summary()
         else:
-            print('Generate new summary.')
+            logger.debug('Summary of "%s": generating a new summary.', self.word)
+            self.outcome = self.outcome or 'partial_hit'
 
-            self.clean_text = self.article.clean_text
+            if not self.clean_text:
+                await self.load_article_text()
 
             await self.text_summary()
-            self.save_summary()
-
-    def save_article(self) -> None:
-        with Session(engine) as session:
-            if not self.wiki_word:
-                return
-            
-            word_slug = self.wiki_word.strip().lower()
-            
-            article = Article(
-                word=self.wiki_word,
-                word_slug=word_slug,
-                clean_text=self.clean_text
-            )
+            await self.save_summary()
 
-            session.add(article)
-            session.commit()
-            session.refresh(article)
+        self.cache_summary()
 
-        self.article = article
-        self.article_id = article.id
-
-    def save_summary(self) -> None:
-        with Session(engine) as session:
-            if not self.article_id:
-                return
-            
-            summary = Summary(
-                article_id=self.article_id,
-                word_count=self.word_count,
-                summary_text=self.summary_text
-            )
+    async def load_summary_coalesced(self) -> None:
+        # Stays 'coalesced' unless this request is the one running the pipeline.
+        self.outcome = 'coalesced'
+        self.summary_text = await summary_flight.do(self.flight_key, self._load_summary_text)
+
+    async def _load_summary_text(self) -> str:
+        await self.load_summary()
+
+        return self.summary_text
+
+    async def stream_summary(self) -> AsyncIterator[str]:
+        """
+        Yield the summary text as the LLM generates it, saving it once complete.
+        A saved summary is yielded at once, in a single chunk.
+
+        The generation is registered in summary_flight like load_summary_coalesced:
+        concurrent requests for the same summary (streamed or not) wait for its
+        final text instead of generating it again, and get it in a single chunk.
+        """
+        if not self.wiki_word:
+            return
+
+        cached = summary_cache.get(self.cache_key)
+        if cached is not None:
+            self.outcome = 'cache_hit'
+            self.summary_text = cached
+            yield self.summary_text
+            return
+
+        chunks: asyncio.Queue[Optional[str]] = asyncio.Queue()
+        flight, leader = summary_flight.join(self.flight_key, lambda: self._stream_summary_into(chunks))
+
+        if not leader:
+            self.outcome = 'coalesced'
+            self.summary_text = await asyncio.shield(flight)
+            yield self.summary_text
+            return
+
+        # The pipeline runs in the flight's task, so it completes (and is saved for
+        # the other requests) even if this client disconnects.
+        while (chunk := await chunks.get()) is not None:
+            yield chunk
+
+        self.summary_text = await asyncio.shield(flight)
+
+    async def _stream_summary_into(self, chunks: asyncio.Queue) -> str:
+        """
+        Run stream_summary's pipeline, putting the chunks in the queue and then None.
+        """
+        try:
+            async for chunk in self._generate_summary_stream():
+                chunks.put_nowait(chunk)
+        finally:
+            chunks.put_nowait(None)
+
+        return self.summary_text
+
+    async def _generate_summary_stream(self) -> AsyncIterator[str]:
+        await self.check_missing()
+        await self.lookup_summary()
+
+        if not self.article:
+            self.outcome = 'miss'
+            await self.fetch_new_article()
+
+        if self.summary:
+            self.outcome = self.outcome or 'hit'
+            self.summary_text = self.summary.summary_text
+            self.cache_summary()
+
+            if self.alias_pending:
+                await self.save_alias()
+
+            yield self.summary_text
+            return
+
+        self.outcome = self.outcome or 'partial_hit'
+
+        if self.source_summary:
+            stream = text_condenser_stream(self.source_summary.summary_text, word_count=self.word_count)
+            self.derived_from_id = self.source_summary.id
+        else:
+            if not self.clean_text:
+                await self.load_article_text()
+
+            stream = text_summarizer_stream(self.clean_text, word_count=self.word_count)
+
+        chunks: list[str] = []
+        async for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+
+        self.summary_text = "".join(chunks)
+        await self.save_summary()
 
-            session.add(summary)
-            session.commit()
+        self.cache_summary()
+
+    def _alias_upsert(self, article_id):
+        """
+        Aliases of the article to record: the requested term and, for a new article,
+        its canonical title. `article_id` is an id or the column of the article CTE.
+        """
+        slugs = {self.word_slug: None}
+
+        if not self.article_id:
+            slugs[self.canonical_slug] = None
+
+        aliases = values(column("alias_slug", String), name="slugs").data([(slug,) for slug in slugs])
+
+        return (
+            insert(ArticleAlias)
+            .from_select(["alias_slug", "article_id"], select(aliases.c.alias_slug, article_id))
+            .on_conflict_do_nothing()
+        )
+
+    async def save_alias(self) -> None:
+        async with AsyncSessionLocal() as session:
+            with metrics.timed('save'):
+                await session.execute(self._alias_upsert(literal(self.article_id, Integer)))
+                await session.commit()
+
+        self.alias_pending = False
+
+    async def save_summary(self) -> None:
+        """
+        Save the summary with a single upsert on (article_id, word_count), which also
+        replaces a stale one. A newly fetched article is upserted in the same
+        statement along with its aliases, so both rows are written or neither is.
+
+        The cached summaries of this word_count and the cached responses of every
+        slug of the article are dropped, not only those of the requested spelling.
+        """
+        if not self.wiki_word:
+            return
+
+        columns = ["article_id", "word_count", "summary_text", "derived_from_id"]
+        summary_values = (
+            literal(self.word_count, Integer),
+            literal(self.summary_text, Text),
+            literal(self.derived_from_id, Integer),
+        )
+        ctes = []
+
+        if self.article_id:
+            stmt = insert(Summary).from_select(columns, select(literal(self.article_id, Integer), *summary_values))
+
+            if self.alias_pending:
+                ctes.append(self._alias_upsert(literal(self.article_id, Integer)).cte("alias"))
+        else:
+            [text_zstd] = await compress_texts([self.clean_text])
+            article_insert = insert(Article).values(
+                word=self.canonical_title_word,
+                word_slug=self.canonical_slug,
+                **text_values(self.canonical_title_word, self.clean_text, text_zstd),
+                revision_id=self.revision_id,
+                etag=self.etag,
+                last_modified=self.last_modified,
+            )
+            # A no-op update, so RETURNING also yields the id of an existing row.
+            article = article_insert.on_conflict_do_update(
+                index_elements=[Article.word_slug],
+                set_={"word_slug": article_insert.excluded.word_slug},
+            ).returning(Article.id).cte("article")
+
+            stmt = insert(Summary).from_select(columns, select(article.c.id, *summary_values))
+            ctes.append(self._alias_upsert(article.c.id).cte("alias"))
+
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Summary.article_id, Summary.word_count],
+            set_={
+                "summary_text": stmt.excluded.summary_text,
+                "derived_from_id": stmt.excluded.derived_from_id,
+                "stale": False,
+                "updated_at": func.now(),
+            },
+        ).returning(Summary.id, Summary.article_id)
+
+        if ctes:
+            stmt = stmt.add_cte(*ctes)
+
+        async with AsyncSessionLocal() as session:
+            with metrics.timed('save'):
+                saved = (await session.execute(stmt)).one()
+                slugs = await article_slugs(session, [saved.article_id])
+                await session.commit()
+
+        self.article_id = saved.article_id
+        self.alias_pending = False
+        slugs |= {self.word_slug, self.canonical_slug}
+        forget_summaries(slugs, self.word_count)
+        invalidate_words(slugs)
+
+    def observe(self, started_at: float) -> None:
+        metrics.observe_summary(self.outcome or 'error', time.perf_counter() - started_at)
 
-        self.summary = summary
-    
     async def extract(self) -> WikiExtractorResult | WikiExtractorError:
+        started_at = time.perf_counter()
+
         try:
-            await self.load_summary()
+            await self.load_summary_coalesced()
         except WikipediaPageNotFoundError as e:
+            self.outcome = 'not_found'
             return WikiExtractorError(
                 word=self.word,
                 url=self.url,
                 message='Página da Wikipedia não encontrada para o termo solicitado.'
             )
+        except Exception:
+            self.outcome = 'error'
+            raise
+        finally:
+            self.observe(started_at)
 
         return WikiExtractorResult(
             word=self.word,
             url=self.url,
             summary=self.summary_text
         )
+
+    async def extract_stream(self) -> AsyncIterator[tuple[str, dict]]:
+        """
+        Streaming version of extract: yields (event, data) pairs, a "start" event
+        right away, one "token" event per summary chunk and a final "done" or
+        "error" event carrying the same payload extract would return. Any failure,
+        e.g. of the LLM in the middle of the summary, ends with an "error" event.
+        """
+        yield 'start', {'word': self.word, 'url': self.url}
+
+        started_at = time.perf_counter()
+
+        try:
+            async for chunk in self.stream_summary():
+                if chunk:
+                    yield 'token', {'text': chunk}
+        except WikipediaPageNotFoundError:
+            self.outcome = 'not_found'
+            yield 'error', WikiExtractorError(
+                word=self.word,
+                url=self.url,
+                message='Página da Wikipedia não encontrada para o termo solicitado.'
+            ).model_dump()
+            return
+        except Exception:
+            # The response has already started: end it with an error event rather
+            # than cutting the stream short.
+            logger.exception('Summary stream for "%s" failed.', self.word)
+            self.outcome = 'error'
+            yield 'error', WikiExtractorError(
+                word=self.word,
+                url=self.url,
+                message='Erro ao gerar o resumo para o termo solicitado.'
+            ).model_dump()
+            return
+        finally:
+            self.observe(started_at)
+
+        yield 'done', WikiExtractorResult(
+            word=self.word,
+            url=self.url,
+            summary=self.summary_text
+        ).model_dump()
@@ -0,0 +1,48 @@
+import asyncio
+import signal
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from db import async_engine
+from db import lock_engine
+
+from utils.logs import configure_logging
+from utils.http_client import open_http_client
+from utils.http_client import close_http_client
+from utils.html_cleaner import shutdown_cleaner_pool
+from utils.summarizer import open_llm
+from utils.summarizer import close_llm
+from utils.jobs import JOB_WORKERS
+from utils.jobs import start_job_workers
+from utils.jobs import stop_job_workers
+
+async def main() -> None:
+    """
+    Run summary jobs outside the API: `python worker.py`. Stops on SIGINT/SIGTERM,
+    letting the running jobs finish (up to JOB_SHUTDOWN_TIMEOUT).
+    """
+    configure_logging()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await open_http_client()
+    await open_llm()
+    start_job_workers(max(JOB_WORKERS, 1))
+
+    await stop.wait()
+
+    await stop_job_workers()
+    await close_llm()
+    await close_http_client()
+    shutdown_cleaner_pool()
+    await async_engine.dispose()
+    await lock_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,48 @@
+import argparse
+import asyncio
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import func, select
+
+from db import AsyncSessionLocal
+from db import async_engine
+
+from models import Article
+
+from utils.article_text import stored_text
+from utils.article_text import train_dictionary
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Train a zstd dictionary for the article texts on a sample of the saved articles.",
+    )
+    parser.add_argument("output", help="dictionary file to write; list it first in ARTICLE_ZSTD_DICTS to use it")
+    parser.add_argument("--samples", type=int, default=2000, help="articles sampled")
+    parser.add_argument("--size", type=int, default=112640, help="dictionary size in bytes")
+    parser.add_argument("--sample-bytes", type=int, default=16384, help="bytes taken from the start of each article")
+
+    return parser.parse_args(argv)
+
+async def main(argv=None) -> None:
+    args = parse_args(argv)
+
+    try:
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(
+                select(Article.clean_text, Article.text_zstd).order_by(func.random()).limit(args.samples)
+            )).all()
+    finally:
+        await async_engine.dispose()
+
+    dictionary = train_dictionary([stored_text(row.clean_text, row.text_zstd) for row in rows], args.size, args.sample_bytes)
+
+    with open(args.output, "wb") as f:
+        f.write(dictionary)
+
+    print(f"Trained a {len(dictionary)} byte dictionary on {len(rows)} articles: {args.output}")
+
+if __name__ == "__main__":
+    asyncio.run(main())